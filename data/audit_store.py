@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Keyed, idempotent upserts into audit_all_data.csv.
+
+Usage: python3 data/audit_store.py UPDATES.csv [--dry-run]
+  Merges every row of UPDATES.csv (any subset of the columns, but always
+  view, year and id) into audit_all_data.csv and prints what changed.
+
+Rows are keyed by (view, year, id). An upsert inserts rows whose key is
+new and, for existing keys, overwrites only the fields the update
+carries and whose value differs; other fields are left as they are.
+A caller that fills in defaults for a new row (extract_2025_state.py)
+passes ``columns``: existing keys then take only those fields from the
+update, so hand-edited fields survive a rerun.
+Applying the same rows twice changes nothing the second time, and a
+run that changes nothing does not touch the file.
+
+The file keeps its canonical layout: CSV_COLUMNS order (plus any extra
+columns it already had, after them), rows grouped by view (VIEW_ORDER)
+and year, existing rows in their current order within a group and new
+rows at the end of theirs. Rows that share a key (left by the old append
+path) are merged into the first one. Every change is a single pass
+over the file, written to a temp file and renamed over the original.
+"""
+
+import csv
+import os
+import sys
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+
+CSV_COLUMNS = [
+    "view", "year", "id", "name", "region", "is_estimate", "color_group",
+    "siting_regime", "confidence", "wholesale_price_mwh", "all_in_price_mwh",
+    "retail_price_cents_kwh", "price_2023_mwh", "capacity_additions_mw",
+    "capacity_additions_elcc_mw", "project_count", "peak_demand_gw",
+    "queue_completion_pct", "queue_cohort", "avg_queue_duration_months",
+    "qualitative_note", "source_price", "source_capacity", "source_peak",
+    "source_queue", "retirements_mw",
+]
+KEY = ("view", "year", "id")
+VIEW_ORDER = ("iso", "state")
+
+
+def _cell(value):
+    """CSV text for a value, as csv.DictWriter writes it (None -> "")."""
+    return "" if value is None else str(value)
+
+
+def row_key(row):
+    """(view, year, id) of a row dict; raises ValueError when one is blank."""
+    key = tuple(_cell(row.get(k)).strip() for k in KEY)
+    if not all(key):
+        raise ValueError(f"row has no {'/'.join(KEY)} key: {dict(row)}")
+    return key
+
+
+def _group(row):
+    view, year = row["view"], row["year"]
+    rank = VIEW_ORDER.index(view) if view in VIEW_ORDER else len(VIEW_ORDER)
+    return rank, view, int(year) if year.isdigit() else sys.maxsize, year
+
+
+class AuditStore:
+    """audit_all_data.csv in memory, indexed by (view, year, id)."""
+
+    def __init__(self, path=CSV_PATH):
+        self.path = path
+        self.columns = list(CSV_COLUMNS)
+        self.rows = []
+        self.index = {}
+        self.deduplicated = 0
+        self.dirty = False
+        self.lineterminator = "\n"
+        if os.path.exists(path):
+            self._read()
+
+    def _read(self):
+        with open(self.path, "rb") as f:
+            head = f.readline()
+        if head.endswith(b"\r\n"):
+            self.lineterminator = "\r\n"
+        with open(self.path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            self.columns += [c for c in reader.fieldnames or () if c not in self.columns]
+            if reader.fieldnames != self.columns:
+                self.dirty = True
+            for row in reader:
+                key = row_key(row)
+                if key in self.index:
+                    # An earlier append duplicated the key: later values win
+                    first = self.rows[self.index[key]]
+                    first.update({c: v for c, v in row.items() if v})
+                    self.deduplicated += 1
+                    self.dirty = True
+                    continue
+                self.index[key] = len(self.rows)
+                self.rows.append(row)
+
+    def get(self, key):
+        i = self.index.get(tuple(str(k) for k in key))
+        return None if i is None else self.rows[i]
+
+    def upsert(self, rows, columns=None):
+        """Merge row dicts; returns {"inserted": [key], "updated": {key: [column]}}.
+
+        ``columns``, if given, limits what an existing key takes from its
+        update; the update's other fields are used only for a new key.
+        """
+        inserted, updated = [], {}
+        for update in rows:
+            key = row_key(update)
+            unknown = [c for c in update if c not in self.columns]
+            if unknown:
+                raise ValueError(f"{'/'.join(key)}: unknown column(s) {', '.join(unknown)}")
+            i = self.index.get(key)
+            if i is None:
+                row = dict.fromkeys(self.columns, "")
+                row.update({c: _cell(v) for c, v in update.items()})
+                row.update(zip(KEY, key))
+                self.index[key] = len(self.rows)
+                self.rows.append(row)
+                inserted.append(key)
+                continue
+            row = self.rows[i]
+            changed = [c for c, v in update.items()
+                       if c not in KEY and (columns is None or c in columns)
+                       and row.get(c, "") != _cell(v)]
+            for c in changed:
+                row[c] = _cell(update[c])
+            if changed and key not in inserted:
+                updated.setdefault(key, [])
+                updated[key] += [c for c in changed if c not in updated[key]]
+        self.dirty |= bool(inserted or updated)
+        return {"inserted": inserted, "updated": updated}
+
+    def save(self):
+        """Write the file if anything changed; returns bytes written (0 if not)."""
+        if not self.dirty:
+            return 0
+        # Stable: existing rows keep their order within a (view, year) group
+        self.rows.sort(key=_group)
+        self.index = {row_key(r): i for i, r in enumerate(self.rows)}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns, restval="",
+                                    lineterminator=self.lineterminator)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        os.replace(tmp, self.path)
+        self.dirty = False
+        return os.path.getsize(self.path)
+
+
+def upsert_rows(rows, path=CSV_PATH, dry_run=False, columns=None):
+    """Upsert ``rows`` into the CSV at ``path`` in one rewrite.
+
+    ``columns`` is passed to AuditStore.upsert().
+    Returns AuditStore.upsert()'s result plus "deduplicated" (duplicate
+    keys merged on load) and "bytes" (size written, 0 when unchanged).
+    """
+    store = AuditStore(path)
+    result = store.upsert(rows, columns)
+    result["deduplicated"] = store.deduplicated
+    result["bytes"] = 0 if dry_run else store.save()
+    return result
+
+
+def print_result(result, total):
+    inserted, updated = result["inserted"], result["updated"]
+    for key in inserted:
+        print(f"  + {'/'.join(key)}")
+    for key, columns in updated.items():
+        print(f"  ~ {'/'.join(key)}: {', '.join(columns)}")
+    unchanged = total - len(inserted) - len(updated)
+    dedup = f", {result['deduplicated']} duplicate row(s) merged" if result["deduplicated"] else ""
+    print(f"  {len(inserted)} inserted, {len(updated)} updated, {unchanged} unchanged{dedup}")
+
+
+def main():
+    args = sys.argv[1:]
+    dry_run = "--dry-run" in args
+    paths = [a for a in args if not a.startswith("--")]
+    if len(paths) != 1:
+        print(__doc__)
+        sys.exit(2)
+    with open(paths[0], newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    try:
+        result = upsert_rows(rows, dry_run=dry_run)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    print(f"{'Would upsert' if dry_run else 'Upserted'} {len(rows)} row(s) into {CSV_PATH}")
+    print_result(result, len({row_key(r) for r in rows}))
+
+
+if __name__ == "__main__":
+    main()
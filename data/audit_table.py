@@ -0,0 +1,393 @@
+"""Typed, columnar loader for audit_all_data.csv with a parse-once cache.
+
+Every data script reads the audit CSV through ``load_table()``. The
+file is parsed once into an AuditTable: each column is an int32 code
+array into a table of its distinct cell strings, so repeated values
+(views, regions, sources, most numbers) are stored once. Numbers are
+parsed once per distinct string, not once per cell.
+
+The parsed columns are stored under data/.cache/audit_table/ as .npy
+files keyed by the CSV's SHA-256. A small stamp per source file records
+its mtime and size, so an unchanged file is loaded without being read
+or hashed. A touched file whose bytes are unchanged is hashed once and
+then reuses the entry.
+
+Rows are AuditRow views (``__slots__``: table + index, no per-row dict)
+that behave like the csv.DictReader dicts the scripts used before:
+``row["id"]``, ``row.get(...)``, ``dict(row)``. Typed access:
+
+    row.value(col)         JSON value: None (blank), int or float, with
+                           build_from_csv's old parse_num rules; raises
+                           ValueError for a cell that is not a number
+    row.value(col, True)   the same, truncated to int
+    row.number(col)        float, or None for blank or unparseable cells
+
+and column-wise: ``table.numbers(col)`` (float64, NaN = blank or
+unparseable), ``table.invalid(col)``, ``table.text(col)``.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Mapping
+
+import numpy as np
+
+from eia860m_cache import file_sha256
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+CACHE_DIR = os.path.join(DATA_DIR, ".cache", "audit_table")
+
+# Bump when the on-disk layout or parsing rules change
+CACHE_VERSION = 1
+
+NUMERIC_FIELDS = [
+    "wholesale_price_mwh", "all_in_price_mwh", "retail_price_cents_kwh",
+    "price_2023_mwh", "capacity_additions_mw", "capacity_additions_elcc_mw",
+    "project_count", "peak_demand_gw", "queue_completion_pct",
+    "avg_queue_duration_months",
+    "retirements_mw",
+]
+
+# Marks a non-blank cell that does not parse as a number in values()
+INVALID = object()
+
+
+def parse_value(text, as_int=False):
+    """JSON value of one cell: None if blank, else int or float.
+
+    Whole numbers written without a decimal point ("31") become ints;
+    "31.0" stays a float. Raises ValueError for non-numeric text.
+    """
+    text = text.strip()
+    if text == "":
+        return None
+    f = float(text)
+    if as_int:
+        return int(f)
+    if f == int(f) and "." not in text:
+        return int(f)
+    return f
+
+
+# ---------------------------------------------------------------------------
+# Table
+# ---------------------------------------------------------------------------
+
+class AuditTable:
+    """CSV columns as code arrays into per-column label lists.
+
+    Iterating yields AuditRow views in file order; ``len()`` is the row
+    count. Derived per-column data (decoded text, numbers, JSON values)
+    is computed on first use and kept.
+    """
+
+    __slots__ = ("columns", "_codes", "_labels", "n_rows", "_index",
+                 "_text", "_numbers", "_values", "_ints")
+
+    def __init__(self, columns, codes, labels, n_rows):
+        self.columns = list(columns)
+        self._codes = codes      # column -> int32 array
+        self._labels = labels    # column -> [str, ...]
+        self.n_rows = n_rows
+        self._index = {c: j for j, c in enumerate(self.columns)}
+        self._text = {}          # column -> [str] per row
+        self._numbers = {}       # column -> (float64 values, invalid mask)
+        self._values = {}        # column -> [value] per row
+        self._ints = {}          # column -> [value] per row, as_int=True
+
+    def __reduce__(self):
+        # Workers get the codes and labels, not the derived caches
+        codes = {c: np.asarray(a) for c, a in self._codes.items()}
+        return AuditTable, (self.columns, codes, self._labels, self.n_rows)
+
+    def __len__(self):
+        return self.n_rows
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.n_rows
+        if not 0 <= i < self.n_rows:
+            raise IndexError(i)
+        return AuditRow(self, i)
+
+    def __iter__(self):
+        for i in range(self.n_rows):
+            yield AuditRow(self, i)
+
+    @classmethod
+    def from_rows(cls, rows, columns=None):
+        """Build a table from row dicts (missing cells become "")."""
+        rows = list(rows)
+        if columns is None:
+            columns = list(rows[0].keys()) if rows else []
+        raw = [["" if r.get(c) is None else str(r.get(c)) for r in rows] for c in columns]
+        codes, labels = _encode_columns(columns, raw)
+        return cls(columns, codes, labels, len(rows))
+
+    def take(self, indices):
+        """A table of the given rows (in the given order), sharing labels."""
+        idx = np.asarray(indices, dtype=np.intp)
+        codes = {c: np.asarray(a)[idx] for c, a in self._codes.items()}
+        return AuditTable(self.columns, codes, self._labels, len(idx))
+
+    def labels(self, col):
+        """Distinct cell strings of a column; codes index into this list."""
+        return self._labels[col]
+
+    def codes(self, col):
+        return self._codes[col]
+
+    def _col_codes(self, col):
+        if col in self._codes:
+            return self._codes[col]
+        return np.zeros(self.n_rows, dtype=np.int32)  # all "" (label 0)
+
+    def text(self, col):
+        """Raw cell strings of a column, as a list ("" for a missing column)."""
+        column = self._text.get(col)
+        if column is None:
+            labels = np.asarray(self._labels.get(col, [""]), dtype=object)
+            column = self._text[col] = labels[self._col_codes(col)].tolist()
+        return column
+
+    def _parsed(self, col):
+        parsed = self._numbers.get(col)
+        if parsed is None:
+            labels = self._labels.get(col, [""])
+            nums = np.full(len(labels), np.nan)
+            bad = np.zeros(len(labels), dtype=bool)
+            for k, label in enumerate(labels):
+                s = label.strip()
+                if s:
+                    try:
+                        nums[k] = float(s)
+                    except ValueError:
+                        bad[k] = True
+            codes = self._col_codes(col)
+            parsed = self._numbers[col] = (nums[codes], bad[codes])
+        return parsed
+
+    def numbers(self, col):
+        """float64 array; NaN for blank and unparseable cells."""
+        return self._parsed(col)[0]
+
+    def invalid(self, col):
+        """Boolean mask of non-blank cells that are not numbers."""
+        return self._parsed(col)[1]
+
+    def values(self, col, as_int=False):
+        """List of parse_value() results; INVALID marks unparseable cells."""
+        cache = self._ints if as_int else self._values
+        column = cache.get(col)
+        if column is None:
+            per_label = np.empty(len(self._labels.get(col, [""])), dtype=object)
+            for k, label in enumerate(self._labels.get(col, [""])):
+                try:
+                    per_label[k] = parse_value(label, as_int)
+                except (ValueError, OverflowError):
+                    per_label[k] = INVALID
+            column = cache[col] = per_label[self._col_codes(col)].tolist()
+        return column
+
+    def row_items(self):
+        """Yield each row's [(column, text), ...], as row.items() would."""
+        columns = self.columns
+        for cells in zip(*[self.text(c) for c in columns]):
+            yield list(zip(columns, cells))
+
+    def dicts(self, extra=None):
+        """Yield each row as a plain dict, plus ``extra`` {column: [value]}."""
+        columns = self.columns + list(extra or {})
+        lists = [self.text(c) for c in self.columns] + list((extra or {}).values())
+        for cells in zip(*lists):
+            yield dict(zip(columns, cells))
+
+
+class AuditRow(Mapping):
+    """Read-only view of one table row with the dict interface."""
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, col):
+        table = self._table
+        column = table._text.get(col)
+        if column is None:
+            if col not in table._index:
+                raise KeyError(col)
+            column = table.text(col)
+        return column[self._i]
+
+    def __iter__(self):
+        return iter(self._table.columns)
+
+    def __len__(self):
+        return len(self._table.columns)
+
+    def __repr__(self):
+        return f"AuditRow({dict(self.items())!r})"
+
+    def items(self):
+        table, i = self._table, self._i
+        return [(c, table.text(c)[i]) for c in table.columns]
+
+    def value(self, col, as_int=False):
+        """parse_value() of a cell; None for a missing column."""
+        table = self._table
+        column = (table._ints if as_int else table._values).get(col)
+        if column is None:
+            if col not in table._index:
+                return None
+            column = table.values(col, as_int)
+        v = column[self._i]
+        if v is INVALID:
+            raise ValueError(f"{col}: not a number: {self[col]!r}")
+        return v
+
+    def number(self, col):
+        """Cell as a float; None when blank, unparseable or missing."""
+        if col not in self._table._index:
+            return None
+        v = float(self._table.numbers(col)[self._i])
+        return None if v != v else v
+
+
+def _encode_columns(columns, raw):
+    codes = {}
+    labels = {}
+    for col, values in zip(columns, raw):
+        index = {"": 0}  # label 0 is always the blank cell
+        arr = np.empty(len(values), dtype=np.int32)
+        for i, v in enumerate(values):
+            code = index.get(v)
+            if code is None:
+                code = index[v] = len(index)
+            arr[i] = code
+        codes[col] = arr
+        labels[col] = list(index)
+    return codes, labels
+
+
+# ---------------------------------------------------------------------------
+# Parse + cache
+# ---------------------------------------------------------------------------
+
+def parse_csv(path):
+    """Parse a CSV into an AuditTable (no cache)."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader, [])
+        raw = [[] for _ in columns]
+        width = len(columns)
+        for record in reader:
+            if not record:
+                continue  # DictReader skips blank lines too
+            if len(record) < width:
+                record = record + [""] * (width - len(record))
+            for values, v in zip(raw, record):
+                values.append(v)
+    codes, labels = _encode_columns(columns, raw)
+    return AuditTable(columns, codes, labels, len(raw[0]) if raw else 0)
+
+
+def _stamp_path(path):
+    key = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"{os.path.basename(path)}-{key}.stamp.json")
+
+
+def _entry_dir(content_sha):
+    return os.path.join(CACHE_DIR, f"v{CACHE_VERSION}-{content_sha[:24]}")
+
+
+def _load_entry(entry):
+    with open(os.path.join(entry, "meta.json")) as f:
+        meta = json.load(f)
+    codes = {
+        col: np.load(os.path.join(entry, f"c{j:03d}.npy"), mmap_mode="r")
+        for j, col in enumerate(meta["columns"])
+    }
+    return AuditTable(meta["columns"], codes, dict(zip(meta["columns"], meta["labels"])),
+                      meta["n_rows"])
+
+
+def _store_entry(entry, table, source):
+    """Write an entry into a temp dir, then rename it into place."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=CACHE_DIR, prefix=".tmp-")
+    try:
+        for j, col in enumerate(table.columns):
+            np.save(os.path.join(tmp, f"c{j:03d}.npy"), table.codes(col))
+        meta = {
+            "source": source,
+            "columns": table.columns,
+            "labels": [table.labels(c) for c in table.columns],
+            "n_rows": table.n_rows,
+        }
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, entry)
+    except OSError:
+        # Another process stored the same entry first
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(entry):
+            raise
+
+
+def _write_stamp(stamp, stat, content_sha):
+    tmp = stamp + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                   "sha256": content_sha}, f)
+    os.replace(tmp, stamp)
+
+
+def _read_stamp(stamp):
+    try:
+        with open(stamp) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+_memo = {}
+
+
+def load_table(path=CSV_PATH):
+    """Return the CSV at ``path`` as an AuditTable, parsing it at most once.
+
+    Lookup order: this process's memo (same mtime and size), the on-disk
+    entry named by the file's stamp (same mtime and size), the entry for
+    the file's SHA-256, and finally a fresh parse that is then stored.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key in _memo:
+        return _memo[key]
+
+    stamp_path = _stamp_path(path)
+    stamp = _read_stamp(stamp_path)
+    content_sha = None
+    if stamp.get("mtime_ns") == stat.st_mtime_ns and stamp.get("size") == stat.st_size:
+        content_sha = stamp.get("sha256")
+    entry = _entry_dir(content_sha) if content_sha else None
+    if entry is None or not os.path.isfile(os.path.join(entry, "meta.json")):
+        content_sha = file_sha256(path)
+        entry = _entry_dir(content_sha)
+        if not os.path.isfile(os.path.join(entry, "meta.json")):
+            _store_entry(entry, parse_csv(path), os.path.basename(path))
+            old = stamp.get("sha256")
+            if old and old != content_sha:
+                shutil.rmtree(_entry_dir(old), ignore_errors=True)
+        _write_stamp(stamp_path, stat, content_sha)
+
+    table = _memo[key] = _load_entry(entry)
+    return table
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Time the data pipeline on synthetic inputs and check outputs against goldens.
+
+Usage: python3 data/benchmark.py [--scales 10000,100000] [--seed S]
+                                 [--record] [--update-golden]
+
+For each scale N, synthetic.py writes an EIA-860M-shaped workbook with N
+operating generators and an audit CSV with N rows (cached in
+data/.cache/bench/, regenerated only when missing). Then it times:
+
+  parse_eia860m (cold)    workbook → projected tables → cube → 2025 rollup,
+                          with an empty column cache
+  parse_eia860m (cached)  the same against the warm cache
+  read CSV (cold)         audit_table.load_table with an empty cache
+  read CSV (cached)       the same against the warm on-disk cache
+  validate                validate_data.validate(rows)
+  build_record            build_record + json.dumps for every (view, year) group
+  build_html              build_audit_html.build_audit (chunked above 5,000 rows)
+
+Each stage's output is hashed (dates stripped from the audit page) and
+compared with data/bench/golden.json; a mismatch means the stage's
+output changed, not just its speed. --update-golden rewrites the digests
+for the scales run. --record appends one line per stage to
+data/bench/results.jsonl with the commit, so timings can be compared
+across commits:
+
+    python3 data/benchmark.py --scales 10000,100000 --record
+
+1M generators (--scales 1000000) needs a few minutes and ~2 GB of RAM.
+"""
+
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+import synthetic
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_DIR = os.path.join(DATA_DIR, ".cache", "bench")
+BENCH_DIR = os.path.join(DATA_DIR, "bench")
+GOLDEN_PATH = os.path.join(BENCH_DIR, "golden.json")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results.jsonl")
+DEFAULT_SCALES = [10_000, 100_000]
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+def ensure_inputs(n, seed=0):
+    """Synthetic workbook and CSV for scale ``n``; generated on first use."""
+    os.makedirs(INPUT_DIR, exist_ok=True)
+    wb_path = os.path.join(INPUT_DIR, f"eia860m-{n}-s{seed}.xlsx")
+    csv_path = os.path.join(INPUT_DIR, f"audit-{n}-s{seed}.csv")
+    if not os.path.exists(wb_path):
+        synthetic.write_workbook(wb_path, n, seed)
+    if not os.path.exists(csv_path):
+        synthetic.write_audit_csv(csv_path, n, seed)
+    return wb_path, csv_path
+
+
+def digest(obj):
+    """sha256 of bytes, str, or a JSON-serializable object."""
+    if isinstance(obj, str):
+        obj = obj.encode("utf-8")
+    elif not isinstance(obj, bytes):
+        obj = json.dumps(obj, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(obj).hexdigest()
+
+
+def audit_digest(out_path):
+    """Hash the audit page (and its chunk directory), ignoring the build date."""
+    today = date.today().isoformat()
+    h = hashlib.sha256()
+    with open(out_path, encoding="utf-8") as f:
+        h.update(f.read().replace(today, "DATE").encode("utf-8"))
+    data_dir = os.path.splitext(out_path)[0] + "_data"
+    if os.path.isdir(data_dir):
+        for name in sorted(os.listdir(data_dir)):
+            h.update(name.encode())
+            with open(os.path.join(data_dir, name), "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+
+def bench_parse(wb_path, cache_dir):
+    """parse_eia860m over the synthetic workbook; returns (rows, digest)."""
+    import capacity_cube
+    import eia860m_cache
+    import extract_2025_state
+
+    saved = eia860m_cache.CACHE_DIR, extract_2025_state.EIA860M_PATH
+    eia860m_cache.CACHE_DIR = cache_dir
+    extract_2025_state.EIA860M_PATH = wb_path
+    try:
+        operating, _retired = extract_2025_state.load_workbook_tables()
+        cube = capacity_cube.CapacityCube.from_table(operating)
+        result = extract_2025_state.parse_eia860m(2025, cube=cube)
+    finally:
+        eia860m_cache.CACHE_DIR, extract_2025_state.EIA860M_PATH = saved
+    return len(operating), digest(result)
+
+
+def bench_read(csv_path, cache_dir):
+    import audit_table
+
+    saved = audit_table.CACHE_DIR
+    audit_table.CACHE_DIR = cache_dir
+    audit_table._memo.clear()  # time the disk cache, not this process's memo
+    try:
+        return audit_table.load_table(csv_path)
+    finally:
+        audit_table.CACHE_DIR = saved
+
+
+def bench_validate(rows):
+    from validate_data import validate
+    report = validate(rows)
+    return len(rows), digest([report["errors"], report["warnings"]])
+
+
+def bench_build_record(rows):
+    from build_from_csv import build_record
+    groups = {}
+    for row in rows:
+        groups.setdefault((row["view"], row["year"]), []).append(row)
+    h = hashlib.sha256()
+    for key in sorted(groups):
+        records = [build_record(r) for r in groups[key]]
+        h.update(json.dumps(records, indent=2, ensure_ascii=False).encode("utf-8"))
+    return len(rows), h.hexdigest()
+
+
+def bench_build_html(rows, out_dir):
+    from build_audit_html import build_audit
+    out_path = os.path.join(out_dir, "audit.html")
+    n, _chunked = build_audit(rows, out_path=out_path)
+    return n, audit_digest(out_path)
+
+
+def run_scale(n, seed=0):
+    """Time every stage at one scale; returns [(stage, seconds, rows, digest)]."""
+    wb_path, csv_path = ensure_inputs(n, seed)
+    results = []
+
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        out = fn(*args)
+        elapsed = time.perf_counter() - start
+        return stage, elapsed, out
+
+    work = tempfile.mkdtemp(prefix="bench-")
+    try:
+        cache_dir = os.path.join(work, "cache")
+        for stage in ("parse_eia860m (cold)", "parse_eia860m (cached)"):
+            stage, elapsed, (count, d) = timed(stage, bench_parse, wb_path, cache_dir)
+            results.append((stage, elapsed, count, d))
+
+        for stage in ("read CSV (cold)", "read CSV (cached)"):
+            stage, elapsed, rows = timed(stage, bench_read, csv_path, cache_dir)
+            results.append((stage, elapsed, len(rows), None))
+
+        for stage, fn, args in (
+            ("validate", bench_validate, (rows,)),
+            ("build_record", bench_build_record, (rows,)),
+            ("build_html", bench_build_html, (rows, work)),
+        ):
+            stage, elapsed, (count, d) = timed(stage, fn, *args)
+            results.append((stage, elapsed, count, d))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Goldens and results
+# ---------------------------------------------------------------------------
+
+def load_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+
+def write_json_atomic(path, obj):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=DATA_DIR,
+            capture_output=True, text=True, check=True)
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=DATA_DIR,
+            capture_output=True, text=True, check=True).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def golden_key(n, seed):
+    return f"{n}" if seed == 0 else f"{n}-s{seed}"
+
+
+def main():
+    args = sys.argv[1:]
+    scales = DEFAULT_SCALES
+    seed = 0
+    if "--scales" in args:
+        scales = [int(s.replace("_", "")) for s in args[args.index("--scales") + 1].split(",")]
+    if "--seed" in args:
+        seed = int(args[args.index("--seed") + 1])
+    record = "--record" in args
+    update = "--update-golden" in args
+
+    golden = load_json(GOLDEN_PATH, {})
+    commit = git_commit()
+    created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    failed = False
+    lines = []
+
+    print(f"{'scale':>10}  {'stage':<24}{'seconds':>9}{'rows/s':>13}  golden")
+    for n in scales:
+        key = golden_key(n, seed)
+        expected = golden.get(key, {})
+        for stage, elapsed, count, d in run_scale(n, seed):
+            if d is None:
+                check = "-"
+            elif update:
+                expected[stage] = d
+                check = "updated"
+            elif stage not in expected:
+                check = "none"
+            elif expected[stage] == d:
+                check = "ok"
+            else:
+                check = "MISMATCH"
+                failed = True
+            rate = count / elapsed if elapsed > 0 else 0
+            print(f"{n:>10,}  {stage:<24}{elapsed:>9.3f}{rate:>13,.0f}  {check}")
+            lines.append({
+                "commit": commit, "created": created,
+                "python": platform.python_version(), "scale": n, "seed": seed,
+                "stage": stage, "seconds": round(elapsed, 4), "rows": count,
+                "rows_per_s": round(rate, 1), "golden": check,
+            })
+        if update:
+            golden[key] = expected
+
+    if update:
+        write_json_atomic(GOLDEN_PATH, golden)
+        print(f"Golden digests written to {GOLDEN_PATH}")
+    if record:
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        with open(RESULTS_PATH, "a") as f:
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+        print(f"Recorded {len(lines)} results to {RESULTS_PATH}")
+    if failed:
+        print("Output digests differ from golden.json (--update-golden if intended)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
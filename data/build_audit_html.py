@@ -1,18 +1,48 @@
 #!/usr/bin/env python3
 """Generate an HTML audit table from audit_all_data.csv.
 
-Usage: python3 data/build_audit_html.py
+Usage: python3 data/build_audit_html.py [CSV] [--out PATH] [--chunked] [--profile [--cprofile]]
 Output: data/audit.html
+
+The page is streamed to disk through a buffered writer, one row at a
+time. Inputs of up to INLINE_LIMIT rows (the audit CSV) get a single
+static table. Larger inputs (generator-level extracts) — or any input
+with --chunked — are written as a small page plus a data directory next
+to it (audit.html → audit_data/):
+
+  index.js            columns, row count, page layout
+  page-00000.js ...   PAGE_SIZE rows each, as JSON arrays
+  sort-<column>.js    row order for that column (ascending, blanks
+                      last) and its count of non-blank cells
+
+Each file is a JSON payload wrapped in a callback so the page also works
+when opened from disk (file:// blocks fetch). The page renders only the
+rows in view, loads pages as they scroll into view and sort orders when
+a header is clicked; filtering loads the remaining pages first.
 """
 
-import csv
+import io
+import json
 import os
+import shutil
+import sys
 from datetime import date
 
+import numpy as np
+
+import profiling
+from audit_table import load_table
+from profiling import phase, wrote
+
 DATA_DIR = os.path.dirname(os.path.abspath(__file__))
 CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
 OUT_PATH = os.path.join(DATA_DIR, "audit.html")
 
+# Rows above this are written as chunked pages instead of one table
+INLINE_LIMIT = 5000
+PAGE_SIZE = 2000
+WRITE_BUFFER = 1 << 20
+
 # Columns to display (in order), plus derived columns computed on the fly
 DISPLAY_COLUMNS = [
     "view", "year", "id", "name", "region", "is_estimate", "color_group",
@@ -32,30 +62,192 @@ COLOR_MAP = {
     "broken": "#F44336",
 }
 
+NUM_COLS = {
+    "wholesale_price_mwh", "all_in_price_mwh", "retail_price_cents_kwh",
+    "price_2023_mwh", "capacity_additions_mw", "capacity_additions_elcc_mw",
+    "project_count", "peak_demand_gw", "queue_completion_pct",
+    "mw_per_gw_peak", "elcc_mw_per_gw_peak",
+}
+NOTE_COLS = {"qualitative_note"}
+SOURCE_COLS = {"source_price", "source_capacity", "source_peak", "source_queue"}
 
-def compute_derived(row):
-    """Add derived columns to a row dict."""
-    try:
-        cap = float(row.get("capacity_additions_mw", "") or 0)
-        peak = float(row.get("peak_demand_gw", "") or 0)
-        if peak > 0:
-            row["mw_per_gw_peak"] = f"{cap / peak:.1f}"
-        else:
-            row["mw_per_gw_peak"] = ""
-    except (ValueError, ZeroDivisionError):
-        row["mw_per_gw_peak"] = ""
+STYLE = """\
+  body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 20px; background: #fafafa; }
+  h1 { font-size: 1.4rem; margin-bottom: 4px; }
+  .meta { color: #666; font-size: 0.85rem; margin-bottom: 16px; }
+  table { border-collapse: collapse; font-size: 0.75rem; width: 100%; }
+  th, td { border: 1px solid #ddd; padding: 4px 6px; text-align: left; white-space: nowrap; }
+  th { background: #333; color: #fff; position: sticky; top: 0; z-index: 1; }
+  tr:nth-child(even) { background: #f5f5f5; }
+  tr:hover { background: #e8f0fe; }
+  td.num { text-align: right; font-variant-numeric: tabular-nums; }
+  td.note { white-space: normal; max-width: 300px; font-size: 0.7rem; }
+  td.source { white-space: normal; max-width: 250px; font-size: 0.7rem; color: #555; }
+  .color-badge { display: inline-block; padding: 1px 6px; border-radius: 3px; color: #fff; font-size: 0.7rem; }
+  .group-header { background: #e0e0e0; font-weight: bold; }
+  .group-header td { padding: 8px 6px; font-size: 0.85rem; }
+"""
 
-    try:
-        elcc = float(row.get("capacity_additions_elcc_mw", "") or 0)
-        peak = float(row.get("peak_demand_gw", "") or 0)
-        if peak > 0 and elcc > 0:
-            row["elcc_mw_per_gw_peak"] = f"{elcc / peak:.1f}"
-        else:
-            row["elcc_mw_per_gw_peak"] = ""
-    except (ValueError, ZeroDivisionError):
-        row["elcc_mw_per_gw_peak"] = ""
+# Fixed row height keeps the virtualized table's scroll math exact
+VIRTUAL_STYLE = """\
+  #scroller { height: 80vh; overflow: auto; border: 1px solid #ddd; background: #fff; }
+  #scroller td { height: 14px; line-height: 14px; overflow: hidden; text-overflow: ellipsis; }
+  #scroller td.note, #scroller td.source { white-space: nowrap; }
+  #scroller th { cursor: pointer; user-select: none; }
+  .controls { margin-bottom: 8px; font-size: 0.85rem; }
+  .controls input { width: 280px; padding: 3px 6px; }
+  #status { color: #666; margin-left: 8px; }
+"""
+
+VIRTUAL_SCRIPT = """\
+(function () {
+  var ROW_H = 23, OVERSCAN = 20, DIR = %(dir)s, COLORS = %(colors)s;
+  var meta, pages = [], requested = {}, sorts = {}, filled = {};
+  var view = null, sortCol = null, desc = false, query = "";
+  var scroller = document.getElementById("scroller");
+  var tbody = document.querySelector("#grid tbody");
+  var status = document.getElementById("status");
+
+  function load(name) {
+    if (requested[name]) return;
+    requested[name] = true;
+    var s = document.createElement("script");
+    s.src = DIR + "/" + name;
+    document.head.appendChild(s);
+  }
+  function pageName(i) { return "page-" + String(i).padStart(5, "0") + ".js"; }
+  function esc(s) {
+    return String(s).replace(/&/g, "&amp;").replace(/</g, "&lt;")
+      .replace(/>/g, "&gt;").replace(/"/g, "&quot;");
+  }
+  function row(r) {
+    var p = pages[Math.floor(r / meta.page_size)];
+    return p ? p[r %% meta.page_size] : null;
+  }
+  function cell(j, v) {
+    var cls = meta.classes[j];
+    if (cls === "badge") {
+      return '<td><span class="color-badge" style="background:' +
+        (COLORS[v] || "#999") + '">' + esc(v) + "</span></td>";
+    }
+    return "<td" + (cls ? ' class="' + cls + '"' : "") +
+      (cls === "note" || cls === "source" ? ' title="' + esc(v) + '"' : "") +
+      ">" + esc(v) + "</td>";
+  }
+  function allLoaded() {
+    for (var i = 0; i < meta.pages; i++) if (!pages[i]) return false;
+    return true;
+  }
 
-    return row
+  function rebuild() {
+    var base = sortCol === null ? null : sorts[sortCol];
+    var n = meta.n_rows, ids = new Int32Array(n), k = 0, i;
+    // Descending reverses only the non-blank head: blanks stay last
+    var m = base ? filled[sortCol] : 0;
+    for (i = 0; i < n; i++) ids[i] = base ? base[desc && i < m ? m - 1 - i : i] : i;
+    if (query) {
+      if (!allLoaded()) {
+        for (i = 0; i < meta.pages; i++) load(pageName(i));
+        status.textContent = "loading rows for filter…";
+        return;
+      }
+      var q = query.toLowerCase();
+      for (i = 0; i < n; i++) {
+        if (row(ids[i]).join("\\u0001").toLowerCase().indexOf(q) >= 0) ids[k++] = ids[i];
+      }
+      ids = ids.subarray(0, k);
+    }
+    view = ids;
+    status.textContent = view.length.toLocaleString() + " of " +
+      n.toLocaleString() + " rows";
+    render();
+  }
+
+  function render() {
+    if (!view) return;
+    var first = Math.max(0, Math.floor(scroller.scrollTop / ROW_H) - OVERSCAN);
+    var last = Math.min(view.length,
+      Math.ceil((scroller.scrollTop + scroller.clientHeight) / ROW_H) + OVERSCAN);
+    var ncol = meta.columns.length, html = [];
+    html.push('<tr style="height:' + first * ROW_H + 'px"></tr>');
+    for (var i = first; i < last; i++) {
+      var r = row(view[i]);
+      if (!r) {
+        load(pageName(Math.floor(view[i] / meta.page_size)));
+        html.push('<tr><td colspan="' + ncol + '">…</td></tr>');
+        continue;
+      }
+      var tr = "<tr>";
+      for (var j = 0; j < ncol; j++) tr += cell(j, r[j]);
+      html.push(tr + "</tr>");
+    }
+    html.push('<tr style="height:' + (view.length - last) * ROW_H + 'px"></tr>');
+    tbody.innerHTML = html.join("");
+  }
+
+  window.auditIndex = function (m) {
+    meta = m;
+    var head = document.querySelector("#grid thead tr");
+    meta.labels.forEach(function (label, j) {
+      var th = document.createElement("th");
+      th.textContent = label;
+      th.onclick = function () {
+        var col = meta.columns[j];
+        desc = sortCol === col ? !desc : false;
+        sortCol = col;
+        if (!sorts[col]) { load("sort-" + col + ".js"); status.textContent = "loading sort…"; }
+        else rebuild();
+      };
+      head.appendChild(th);
+    });
+    rebuild();
+  };
+  window.auditPage = function (i, rows) {
+    pages[i] = rows;
+    if (query && allLoaded()) rebuild(); else render();
+  };
+  window.auditSort = function (col, order, count) {
+    sorts[col] = order;
+    filled[col] = count;
+    if (col === sortCol) rebuild();
+  };
+
+  var timer = null;
+  scroller.addEventListener("scroll", function () {
+    if (timer === null) timer = requestAnimationFrame(function () { timer = null; render(); });
+  });
+  document.getElementById("filter").addEventListener("input", function (e) {
+    query = e.target.value.trim();
+    scroller.scrollTop = 0;
+    rebuild();
+  });
+  load("index.js");
+})();
+"""
+
+
+def compute_derived(table):
+    """Derived columns for every row of an AuditTable, as {column: [text]}.
+
+    Blank inputs count as 0; a cell that is not a number blanks the
+    derived value for its row.
+    """
+    def ratio(numerator, need_positive):
+        num = table.numbers(numerator)
+        num = np.where(np.isnan(num), 0.0, num)
+        peak = table.numbers("peak_demand_gw")
+        peak = np.where(np.isnan(peak), 0.0, peak)
+        ok = (peak > 0) & ~table.invalid(numerator) & ~table.invalid("peak_demand_gw")
+        if need_positive:
+            ok &= num > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = num / peak
+        return [f"{v:.1f}" if k else "" for v, k in zip(values.tolist(), ok.tolist())]
+
+    return {
+        "mw_per_gw_peak": ratio("capacity_additions_mw", False),
+        "elcc_mw_per_gw_peak": ratio("capacity_additions_elcc_mw", True),
+    }
 
 
 def escape_html(text):
@@ -68,91 +260,244 @@ def escape_html(text):
     )
 
 
-def build_html(rows):
+def display_columns(header):
+    """DISPLAY_COLUMNS for the audit CSV; any other CSV shows its own header."""
+    if "view" in header and "capacity_additions_mw" in header:
+        return DISPLAY_COLUMNS
+    return list(header)
+
+
+def column_class(col):
+    if col == "color_group":
+        return "badge"
+    if col in NUM_COLS:
+        return "num"
+    if col in NOTE_COLS:
+        return "note"
+    if col in SOURCE_COLS:
+        return "source"
+    return ""
+
+
+def render_cell(col, val):
+    if col == "color_group":
+        color = COLOR_MAP.get(val, "#999")
+        return f'<td><span class="color-badge" style="background:{color}">{escape_html(val)}</span></td>'
+    cls = column_class(col)
+    if cls:
+        return f'<td class="{cls}">{escape_html(val)}</td>'
+    return f"<td>{escape_html(val)}</td>"
+
+
+def write_head(out, n_rows, extra_style=""):
     today = date.today().isoformat()
-    html = f"""<!DOCTYPE html>
+    out.write(f"""<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
 <title>Electricity Supply Response — Data Audit ({today})</title>
 <style>
-  body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 20px; background: #fafafa; }}
-  h1 {{ font-size: 1.4rem; margin-bottom: 4px; }}
-  .meta {{ color: #666; font-size: 0.85rem; margin-bottom: 16px; }}
-  table {{ border-collapse: collapse; font-size: 0.75rem; width: 100%; }}
-  th, td {{ border: 1px solid #ddd; padding: 4px 6px; text-align: left; white-space: nowrap; }}
-  th {{ background: #333; color: #fff; position: sticky; top: 0; z-index: 1; }}
-  tr:nth-child(even) {{ background: #f5f5f5; }}
-  tr:hover {{ background: #e8f0fe; }}
-  td.num {{ text-align: right; font-variant-numeric: tabular-nums; }}
-  td.note {{ white-space: normal; max-width: 300px; font-size: 0.7rem; }}
-  td.source {{ white-space: normal; max-width: 250px; font-size: 0.7rem; color: #555; }}
-  .color-badge {{ display: inline-block; padding: 1px 6px; border-radius: 3px; color: #fff; font-size: 0.7rem; }}
-  .group-header {{ background: #e0e0e0; font-weight: bold; }}
-  .group-header td {{ padding: 8px 6px; font-size: 0.85rem; }}
-</style>
+{STYLE}{extra_style}</style>
 </head>
 <body>
 <h1>Electricity Supply Response — Data Audit</h1>
-<p class="meta">Generated {today} from <code>data/audit_all_data.csv</code> · {len(rows)} rows · Bottlenecks Lab</p>
-<table>
-<thead><tr>
-"""
-    for col in DISPLAY_COLUMNS:
+<p class="meta">Generated {today} from <code>data/audit_all_data.csv</code> · {n_rows:,} rows · Bottlenecks Lab</p>
+""")
+
+
+# ---------------------------------------------------------------------------
+# Inline table (small inputs)
+# ---------------------------------------------------------------------------
+
+def write_html(rows, out, columns=DISPLAY_COLUMNS):
+    """Stream a single-table page for ``rows`` (a list) to ``out``."""
+    write_head(out, len(rows))
+    out.write("<table>\n<thead><tr>\n")
+    for col in columns:
         label = col.replace("_", " ").title()
-        html += f"  <th>{escape_html(label)}</th>\n"
-    html += "</tr></thead>\n<tbody>\n"
-
-    NUM_COLS = {
-        "wholesale_price_mwh", "all_in_price_mwh", "retail_price_cents_kwh",
-        "price_2023_mwh", "capacity_additions_mw", "capacity_additions_elcc_mw",
-        "project_count", "peak_demand_gw", "queue_completion_pct",
-        "mw_per_gw_peak", "elcc_mw_per_gw_peak",
-    }
-    NOTE_COLS = {"qualitative_note"}
-    SOURCE_COLS = {"source_price", "source_capacity", "source_peak", "source_queue"}
+        out.write(f"  <th>{escape_html(label)}</th>\n")
+    out.write("</tr></thead>\n<tbody>\n")
 
+    grouped = "view" in columns and "year" in columns
     current_group = None
     for row in rows:
-        group_key = f"{row['view'].upper()} — {row['year']}"
-        if group_key != current_group:
-            current_group = group_key
-            html += f'<tr class="group-header"><td colspan="{len(DISPLAY_COLUMNS)}">{escape_html(group_key)}</td></tr>\n'
-
-        html += "<tr>"
-        for col in DISPLAY_COLUMNS:
-            val = row.get(col, "")
-            if col == "color_group":
-                color = COLOR_MAP.get(val, "#999")
-                html += f'<td><span class="color-badge" style="background:{color}">{escape_html(val)}</span></td>'
-            elif col in NUM_COLS:
-                html += f'<td class="num">{escape_html(val)}</td>'
-            elif col in NOTE_COLS:
-                html += f'<td class="note">{escape_html(val)}</td>'
-            elif col in SOURCE_COLS:
-                html += f'<td class="source">{escape_html(val)}</td>'
-            else:
-                html += f"<td>{escape_html(val)}</td>"
-        html += "</tr>\n"
-
-    html += """</tbody>
+        if grouped:
+            group_key = f"{row['view'].upper()} — {row['year']}"
+            if group_key != current_group:
+                current_group = group_key
+                out.write(f'<tr class="group-header"><td colspan="{len(columns)}">{escape_html(group_key)}</td></tr>\n')
+
+        out.write("<tr>" + "".join(render_cell(col, row.get(col, "")) for col in columns)
+                  + "</tr>\n")
+
+    out.write("""</tbody>
 </table>
 </body>
 </html>
-"""
-    return html
+""")
+
+
+def build_html(rows):
+    """Return the single-table page as a string."""
+    buf = io.StringIO()
+    write_html(rows, buf)
+    return buf.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Chunked pages + virtualized table (large inputs)
+# ---------------------------------------------------------------------------
+
+def _write_js(path, callback, *args):
+    payload = ",".join(json.dumps(a, ensure_ascii=False, separators=(",", ":")) for a in args)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{callback}({payload});\n")
+
+
+def sort_order(values, numeric):
+    """(row ids in ascending order of ``values``, count of non-blank rows).
+
+    Blanks (and, for numeric columns, unparseable cells) sort last; the
+    page reverses only the first ``count`` ids for a descending sort, so
+    they stay last in both directions.
+    """
+    if numeric:
+        keys = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                keys[i] = float(v) if v != "" else np.nan
+            except ValueError:
+                pass
+        # NaN sorts last
+        return np.argsort(keys, kind="stable"), int(np.count_nonzero(~np.isnan(keys)))
+    keys = np.array(values, dtype=object)
+    blank = keys == ""
+    order = np.argsort(keys[~blank].astype(str), kind="stable")
+    filled = np.flatnonzero(~blank)
+    return np.concatenate([filled[order], np.flatnonzero(blank)]), len(filled)
+
+
+def write_chunked(rows, out, out_path, columns):
+    """Write index, page and sort files next to ``out_path``; stream the page to ``out``.
+
+    ``rows`` may be any iterable of dicts; it is consumed once. Returns the
+    number of rows written.
+    """
+    data_name = os.path.splitext(os.path.basename(out_path))[0] + "_data"
+    data_dir = os.path.join(os.path.dirname(out_path), data_name)
+    if os.path.isdir(data_dir):
+        shutil.rmtree(data_dir)
+    os.makedirs(data_dir)
+
+    values = [[] for _ in columns]
+    page, n_pages, n_rows = [], 0, 0
+
+    def flush():
+        path = os.path.join(data_dir, f"page-{n_pages:05d}.js")
+        _write_js(path, "auditPage", n_pages, page)
+        wrote(rec, path)
+        for j, column in enumerate(zip(*page)):
+            values[j].extend(column)
+
+    with phase("pages") as rec:
+        for row in rows:
+            page.append([row.get(col, "") or "" for col in columns])
+            n_rows += 1
+            if len(page) == PAGE_SIZE:
+                flush()
+                page, n_pages = [], n_pages + 1
+        if page:
+            flush()
+            n_pages += 1
+        rec["rows"] = n_rows
+
+    with phase("sort indexes", rows=n_rows) as rec:
+        for j, col in enumerate(columns):
+            order, count = sort_order(values[j], col in NUM_COLS)
+            path = os.path.join(data_dir, f"sort-{col}.js")
+            _write_js(path, "auditSort", col, order.tolist(), count)
+            wrote(rec, path)
+            values[j] = None
+
+    _write_js(os.path.join(data_dir, "index.js"), "auditIndex", {
+        "columns": columns,
+        "labels": [c.replace("_", " ").title() for c in columns],
+        "classes": [column_class(c) for c in columns],
+        "n_rows": n_rows,
+        "page_size": PAGE_SIZE,
+        "pages": n_pages,
+    })
+
+    write_head(out, n_rows, VIRTUAL_STYLE)
+    script = VIRTUAL_SCRIPT % {"dir": json.dumps(data_name), "colors": json.dumps(COLOR_MAP)}
+    out.write(f"""<div class="controls"><input id="filter" placeholder="Filter rows…"><span id="status">loading…</span></div>
+<div id="scroller">
+<table id="grid">
+<thead><tr></tr></thead>
+<tbody></tbody>
+</table>
+</div>
+<script>
+{script}</script>
+</body>
+</html>
+""")
+    return n_rows
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def build_audit(table, columns=DISPLAY_COLUMNS, out_path=OUT_PATH, chunked=False):
+    """Write the audit page for an AuditTable (see audit_table.py).
+
+    Rows are produced once, as dicts with the derived columns added. Returns
+    (rows written, whether the chunked layout was used).
+    """
+    rows = table.dicts(compute_derived(table))
+
+    # Buffer up to INLINE_LIMIT rows; anything larger goes chunked
+    head = []
+    if not chunked:
+        for row in rows:
+            head.append(row)
+            if len(head) > INLINE_LIMIT:
+                chunked = True
+                break
+
+    with open(out_path, "w", buffering=WRITE_BUFFER) as out:
+        if chunked:
+            def all_rows():
+                yield from head
+                yield from rows
+            return write_chunked(all_rows(), out, out_path, columns), True
+        write_html(head, out, columns)
+        return len(head), False
 
 
 def main():
-    with open(CSV_PATH, newline="") as f:
-        reader = csv.DictReader(f)
-        rows = [compute_derived(row) for row in reader]
+    args = sys.argv[1:]
+    chunked = "--chunked" in args
+    out_path = OUT_PATH
+    if "--out" in args:
+        i = args.index("--out")
+        out_path = os.path.abspath(args[i + 1])
+        del args[i:i + 2]
+    positional = [a for a in args if not a.startswith("--")]
+    csv_path = positional[0] if positional else CSV_PATH
 
-    html = build_html(rows)
-    with open(OUT_PATH, "w") as f:
-        f.write(html)
+    profiling.start("build_audit_html")
+    with phase("read CSV + write page") as rec:
+        table = load_table(csv_path)
+        columns = display_columns(table.columns)
+        n, chunked = build_audit(table, columns, out_path, chunked)
+        rec["rows"] = n
+        wrote(rec, out_path)
 
-    print(f"Wrote {len(rows)} rows to {OUT_PATH}")
+    mode = f"chunked, {PAGE_SIZE:,} rows per page" if chunked else "single table"
+    print(f"Wrote {n:,} rows to {out_path} ({mode})")
+    profiling.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Build the production dataset bundle from the verified JSON files.
+
+Usage: python3 data/build_bundle.py [--report]
+
+Writes to public/data/ (served by Vite at <base>/data/):
+  datasets.bundle.json   every (view, year) dataset in struct-of-arrays
+                         layout: one array per field, minified, plus
+                         its trendline fits
+  datasets.strings.json  deduplicated table of long strings (notes and
+                         sources); bundle columns hold indexes into it
+Each file also ships as precompressed .gz and, when the optional `brotli`
+package is installed, .br (without it, existing .br files are left as
+they are and a warning is printed).
+
+The chart paints from the bundle alone and fetches the string table
+afterwards (src/lib/bundle.ts). build_from_csv.py calls build_bundle()
+after every build; files are only rewritten when their bytes change.
+--report compares size and parse time against the six JSON files.
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+
+try:
+    import brotli
+except ImportError:  # optional: .br variants are skipped without it
+    brotli = None
+
+from build_from_csv import OUTPUT_MAP, VERIFIED_DIR
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+PUBLIC_DATA_DIR = os.path.join(os.path.dirname(DATA_DIR), "public", "data")
+BUNDLE_NAME = "datasets.bundle.json"
+STRINGS_NAME = "datasets.strings.json"
+BUNDLE_VERSION = 1
+
+# Record fields, in output order. Values are stored column-wise; absent
+# optional fields are null and dropped again when the bundle is decoded.
+EAGER_FIELDS = [
+    "id", "name", "region", "wholesale_price_mwh", "all_in_price_mwh",
+    "retail_price_cents_kwh", "capacity_additions_mw",
+    "capacity_additions_elcc_mw", "retirements_mw", "project_count",
+    "peak_demand_gw", "mw_per_gw_peak", "elcc_mw_per_gw_peak",
+    "net_mw_per_gw_peak", "net_elcc_mw_per_gw_peak",
+    "queue_completion_pct", "queue_cohort",
+    "avg_queue_duration_months", "price_2023_mwh", "isEstimate",
+    "confidence", "color_group",
+]
+
+# Long, repetitive strings: stored as indexes into the lazy string table
+LAZY_FIELDS = [
+    "qualitative_note", "sources.price", "sources.capacity",
+    "sources.peak", "sources.queue",
+]
+
+
+def _get(rec, field):
+    if field.startswith("sources."):
+        return rec.get("sources", {}).get(field.split(".", 1)[1])
+    return rec.get(field)
+
+
+def load_datasets():
+    """Read the verified JSON files as {"view/year": (top_key, dataset)}."""
+    datasets = {}
+    for (view, year), (filename, top_key) in sorted(OUTPUT_MAP.items()):
+        path = os.path.join(VERIFIED_DIR, filename)
+        with open(path, encoding="utf-8") as f:
+            datasets[f"{view}/{year}"] = (top_key, json.load(f))
+    return datasets
+
+
+def make_bundle(datasets):
+    """Convert datasets to (bundle, string table)."""
+    strings = []
+    string_index = {}
+
+    def intern(value):
+        if value is None:
+            return None
+        idx = string_index.get(value)
+        if idx is None:
+            idx = string_index[value] = len(strings)
+            strings.append(value)
+        return idx
+
+    out = {}
+    for key, (top_key, dataset) in datasets.items():
+        records = dataset[top_key]
+        columns = {}
+        for field in EAGER_FIELDS:
+            values = [_get(r, field) for r in records]
+            if any(v is not None for v in values):
+                columns[field] = values
+        lazy = {field: [intern(_get(r, field)) for r in records]
+                for field in LAZY_FIELDS}
+        out[key] = {
+            "key": top_key,
+            "length": len(records),
+            "metadata": dataset["metadata"],
+            "columns": columns,
+            "lazy": lazy,
+        }
+        if "fits" in dataset:
+            out[key]["fits"] = dataset["fits"]
+
+    bundle = {
+        "version": BUNDLE_VERSION,
+        "strings": STRINGS_NAME,
+        "datasets": out,
+    }
+    return bundle, strings
+
+
+def _minify(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _variants(text, compress=True):
+    """{suffix: bytes} for the plain, gzip and (optional) brotli files."""
+    raw = text.encode("utf-8")
+    if not compress:
+        return {"": raw}
+    out = {"": raw, ".gz": gzip.compress(raw, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        out[".br"] = brotli.compress(raw, quality=11)
+    return out
+
+
+def _write_if_changed(path, data):
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def build_bundle(datasets=None, out_dir=PUBLIC_DATA_DIR, compress=True):
+    """Write the bundle and string table; returns the list of files written.
+
+    ``compress=False`` writes only the plain files (the dev server does
+    not serve the .gz/.br variants); watch_dataset.py uses it per save.
+    """
+    if datasets is None:
+        datasets = load_datasets()
+    bundle, strings = make_bundle(datasets)
+    os.makedirs(out_dir, exist_ok=True)
+
+    written = []
+    for name, text in ((BUNDLE_NAME, _minify(bundle)),
+                       (STRINGS_NAME, _minify(strings))):
+        variants = _variants(text, compress)
+        for suffix, data in variants.items():
+            if _write_if_changed(os.path.join(out_dir, name + suffix), data):
+                written.append(name + suffix)
+        stale_br = os.path.join(out_dir, name + ".br")
+        if compress and ".br" not in variants and os.path.exists(stale_br):
+            # Committed file: leave it rather than delete it on machines
+            # without the optional package
+            print(f"  WARNING: brotli not installed; {name}.br not refreshed")
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Size / parse-time report
+# ---------------------------------------------------------------------------
+
+def _parse_ms(data, repeat=200):
+    text = data.decode("utf-8")
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(text)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def report(out_dir=PUBLIC_DATA_DIR):
+    """Print sizes (raw / gzip / brotli) and parse time, six files vs bundle."""
+    def sizes(paths):
+        # Files are fetched (and compressed) individually
+        total = {}
+        for p in paths:
+            with open(p, encoding="utf-8") as f:
+                for suffix, data in _variants(f.read()).items():
+                    total[suffix] = total.get(suffix, 0) + len(data)
+        return total
+
+    def parse_ms(paths):
+        total = 0.0
+        for p in paths:
+            with open(p, "rb") as f:
+                total += _parse_ms(f.read())
+        return total
+
+    six = [os.path.join(VERIFIED_DIR, f) for f, _k in OUTPUT_MAP.values()]
+    bundle = [os.path.join(out_dir, BUNDLE_NAME)]
+    strings = [os.path.join(out_dir, STRINGS_NAME)]
+
+    rows = []
+    for label, paths in (("6 JSON files (indent=2)", six),
+                         ("bundle (first paint)", bundle),
+                         ("string table (lazy)", strings),
+                         ("bundle + strings", bundle + strings)):
+        rows.append((label, sizes(paths), parse_ms(paths)))
+
+    print(f"  {'':<26}{'raw':>10}{'gzip':>10}{'brotli':>10}{'parse ms':>10}")
+    for label, size, parse in rows:
+        br = f"{size['.br']:,}" if ".br" in size else "-"
+        print(f"  {label:<26}{size['']:>10,}{size['.gz']:>10,}{br:>10}{parse:>10.3f}")
+
+
+def main():
+    written = build_bundle()
+    if written:
+        print(f"Bundle: wrote {', '.join(written)}")
+    else:
+        print("Bundle: unchanged")
+    if brotli is None:
+        print("  (brotli not installed; .br variants skipped)")
+    if "--report" in sys.argv[1:]:
+        report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""Run the data pipeline as a DAG of declared stages.
+
+Usage: python3 data/build_dataset.py [STAGE ...] [--extract] [--force]
+                                     [--serial] [--list]
+   or: build-dataset ...   (pyproject.toml entry point)
+
+Stages (inputs → outputs):
+  fetch        data/sources.json → data/eia860m/, data/epm/, ...   (only with --extract;
+               once its files are present, --force or fetch_sources.py checks for updates)
+  extract      EIA-860M + data/epm/ workbooks → audit_all_data.csv   (only with --extract)
+  validate     audit_all_data.csv → (pass/fail)
+  build        audit_all_data.csv → data/verified/*.json, public/data bundle
+  audit        audit_all_data.csv → data/audit.html
+  drilldown    EIA-860M workbook + CSV years → public/data/drilldown/
+  elcc         EIA-860M workbook + CSV years → public/data/elcc_bands.json
+               (drilldown and elcc are skipped when the workbook is not present)
+  uncertainty  audit_all_data.csv → public/data/trend_uncertainty.json
+
+A stage runs after the stages it depends on; stages whose dependencies
+are done run in parallel worker processes (build, audit, drilldown, elcc
+and uncertainty all follow validate). A stage is skipped when the content hashes of its
+inputs (data files and the scripts implementing it) match its last
+successful run, recorded in data/.cache/pipeline_manifest.json, and its
+outputs still exist. The CSV is read once (audit_table.py) and handed to
+every stage.
+
+Naming stages runs only those (plus their non-optional dependencies);
+the default is every stage. Stage modules are imported inside the
+worker that runs them, so `build-dataset validate` never loads the
+extraction stack.
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import redirect_stdout
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(DATA_DIR)
+if DATA_DIR not in sys.path:  # entry point runs as data.build_dataset
+    sys.path.insert(0, DATA_DIR)
+
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+MANIFEST_PATH = os.path.join(DATA_DIR, ".cache", "pipeline_manifest.json")
+EIA860M_PATH = os.path.join(DATA_DIR, "eia860m", "january_generator2026.xlsx")  # eia860m_cache.py
+EPM_DIR = os.path.join(DATA_DIR, "epm")                                        # epm_retail.py
+SOURCES_PATH = os.path.join(DATA_DIR, "sources.json")                          # fetch_sources.py
+VERIFIED_DIR = os.path.join(DATA_DIR, "verified")
+PUBLIC_DATA_DIR = os.path.join(ROOT_DIR, "public", "data")
+
+
+def _data(*names):
+    return [os.path.join(DATA_DIR, n) for n in names]
+
+
+def _workbooks(directory):
+    """Every .xlsx in ``directory``: a directory is fingerprinted by its files."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                  if f.lower().endswith(".xlsx") and not f.startswith("~$"))
+
+
+def _source_dests():
+    """Download destinations declared in sources.json.
+
+    A dest with a {period} is named after the download; those files are
+    covered by the directory listing of the extract inputs.
+    """
+    try:
+        with open(SOURCES_PATH, encoding="utf-8") as f:
+            return [os.path.join(DATA_DIR, s["dest"]) for s in json.load(f)["sources"]
+                    if "{period}" not in s["dest"]]
+    except (FileNotFoundError, ValueError, KeyError):
+        return []
+
+
+class Stage:
+    """One pipeline step: a function plus its declared inputs and outputs.
+
+    ``run(rows, force)`` executes in a worker process, prints its report
+    and returns True on success. ``optional`` stages only run when asked
+    for; ``requires`` lists input files without which the stage is
+    skipped rather than failed.
+    """
+
+    def __init__(self, name, run, deps=(), inputs=(), outputs=(),
+                 optional=False, requires=()):
+        self.name = name
+        self.run = run
+        self.deps = tuple(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.optional = optional
+        self.requires = list(requires)
+
+
+# ---------------------------------------------------------------------------
+# Stage functions (run in workers; imports are deliberately local)
+# ---------------------------------------------------------------------------
+
+def run_fetch(rows, force):
+    from fetch_sources import fetch_all, load_manifest
+    results = fetch_all(load_manifest(), force=force)
+    for name, status in sorted(results.items()):
+        print(f"  {name}: {status}")
+    return not any(status.startswith("failed") for status in results.values())
+
+
+def run_extract(rows, force):
+    import extract_2025_state
+    extract_2025_state.main()
+    return True
+
+
+def run_validate(rows, force):
+    from validate_data import validate
+    report = validate(rows)
+    errors, warnings = report["errors"], report["warnings"]
+    for w in warnings:
+        print(f"  WARNING: {w}")
+    for e in errors:
+        print(f"  ERROR: {e}")
+    print(f"  {len(rows)} rows, {len(errors)} error(s), {len(warnings)} warning(s)")
+    return not errors
+
+
+def run_build(rows, force):
+    from build_from_csv import build_all
+    build_all(rows, force)
+    return True
+
+
+def run_audit(rows, force):
+    from build_audit_html import OUT_PATH, build_audit
+    n, _chunked = build_audit(rows)
+    print(f"  Wrote {n} rows to {OUT_PATH}")
+    return True
+
+
+def run_drilldown(rows, force):
+    from build_drilldown import build_drilldown
+    years = sorted(set(rows.values("year", as_int=True)))
+    written, unchanged, removed = build_drilldown(years=years)
+    print(f"  {written} shards written, {unchanged} unchanged, {removed} removed")
+    return True
+
+
+def run_elcc(rows, force):
+    from elcc_scenarios import BANDS_PATH, build_bands
+    years = sorted(set(rows.values("year", as_int=True)))
+    result = build_bands(years=years)
+    print(f"  {len(result['bands'])} points × {result['scenarios']} scenarios → {BANDS_PATH}")
+    return True
+
+
+def run_uncertainty(rows, force):
+    from trend_uncertainty import OUT_PATH, bootstrap, write_uncertainty
+    result = bootstrap(rows)
+    write_uncertainty(result)
+    print(f"  {len(result['groups'])} groups × {result['resamples']:,} resamples → {OUT_PATH}")
+    return True
+
+
+# Every stage that reads the CSV goes through the shared loader, which
+# imports eia860m_cache for its file hash
+CSV_LOADER = ("audit_table.py", "eia860m_cache.py")
+
+STAGES = [
+    Stage("fetch", run_fetch,
+          inputs=[SOURCES_PATH] + _data("fetch_sources.py"),
+          outputs=_source_dests(), optional=True),
+    Stage("extract", run_extract, deps=["fetch"],
+          inputs=sorted({EIA860M_PATH, *_workbooks(EPM_DIR), *_source_dests()}) + _data(
+              "extract_2025_state.py", "capacity_cube.py", "mappings.py",
+              "eia860m_cache.py", "eia860m_warehouse.py", "xlsx_reader.py", "epm_retail.py",
+              "audit_store.py", "audit_table.py", "profiling.py"),
+          outputs=[CSV_PATH],
+          optional=True, requires=[EIA860M_PATH, EPM_DIR]),
+    Stage("validate", run_validate, deps=["extract"],
+          inputs=[CSV_PATH] + _data("validate_data.py", "consistency.py", "mappings.py",
+                                    *CSV_LOADER, "profiling.py")),
+    Stage("build", run_build, deps=["validate"],
+          inputs=[CSV_PATH] + _data("build_from_csv.py", "build_bundle.py", "chart_metrics.py",
+                                    *CSV_LOADER, "profiling.py"),
+          outputs=[VERIFIED_DIR, os.path.join(PUBLIC_DATA_DIR, "datasets.bundle.json")]),
+    Stage("audit", run_audit, deps=["validate"],
+          inputs=[CSV_PATH] + _data("build_audit_html.py", *CSV_LOADER, "profiling.py"),
+          outputs=_data("audit.html")),
+    Stage("drilldown", run_drilldown, deps=["validate"],
+          inputs=[EIA860M_PATH, CSV_PATH] + _data(
+              "build_drilldown.py", "capacity_cube.py", "mappings.py",
+              "xlsx_reader.py", *CSV_LOADER),
+          outputs=[os.path.join(PUBLIC_DATA_DIR, "drilldown", "index.json")],
+          requires=[EIA860M_PATH]),
+    Stage("elcc", run_elcc, deps=["validate"],
+          inputs=[EIA860M_PATH, CSV_PATH] + _data(
+              "elcc_scenarios.py", "capacity_cube.py", "mappings.py",
+              "xlsx_reader.py", *CSV_LOADER),
+          outputs=[os.path.join(PUBLIC_DATA_DIR, "elcc_bands.json")],
+          requires=[EIA860M_PATH]),
+    Stage("uncertainty", run_uncertainty, deps=["validate"],
+          inputs=[CSV_PATH] + _data("trend_uncertainty.py", "chart_metrics.py", *CSV_LOADER),
+          outputs=[os.path.join(PUBLIC_DATA_DIR, "trend_uncertainty.json")]),
+]
+STAGE_BY_NAME = {s.name: s for s in STAGES}
+
+
+# ---------------------------------------------------------------------------
+# Fingerprints
+# ---------------------------------------------------------------------------
+
+def file_hash(path, chunk_size=1 << 20):
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(stage):
+    """Content hash of a stage's inputs; identical inputs → identical outputs."""
+    h = hashlib.sha256(stage.name.encode())
+    for path in stage.inputs:
+        h.update(f"{path}\0{file_hash(path)}\0".encode())
+    return h.hexdigest()
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, MANIFEST_PATH)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def select_stages(names, include_optional):
+    """Requested stages plus their dependencies, in declaration order."""
+    explicit = set(names or [])
+    wanted = set()
+
+    def add(name):
+        stage = STAGE_BY_NAME[name]
+        if stage.optional and not include_optional and name not in explicit:
+            return
+        wanted.add(name)
+        for dep in stage.deps:
+            add(dep)
+
+    for name in names or [s.name for s in STAGES]:
+        add(name)
+    return [s for s in STAGES if s.name in wanted]
+
+
+def read_rows():
+    from audit_table import load_table
+    return load_table(CSV_PATH)
+
+
+def _execute(name, rows, force):
+    """Worker entry point: run one stage, capturing its output."""
+    stage = STAGE_BY_NAME[name]
+    buf = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(buf):
+            ok = stage.run(rows, force)
+    except SystemExit as exc:  # scripts' main() exit codes
+        ok = not exc.code
+    except Exception as exc:  # report, don't take down the pool
+        buf.write(f"  {type(exc).__name__}: {exc}\n")
+        ok = False
+    return ok, buf.getvalue(), time.perf_counter() - start
+
+
+def run_pipeline(names=None, force=False, include_optional=False, parallel=True):
+    """Run the selected stages; returns True when none failed."""
+    stages = select_stages(names, include_optional)
+    manifest = {} if force else load_manifest()
+    status = {}          # name -> "ok" | "skipped" | "failed" | "blocked"
+    rows = None
+    pending = list(stages)
+    running = {}
+
+    def ready(stage):
+        deps = [d for d in stage.deps if d in {s.name for s in stages}]
+        if any(status.get(d) in ("failed", "blocked") for d in deps):
+            return "blocked"
+        return "ready" if all(d in status for d in deps) else None
+
+    def finish(stage, ok, output, elapsed):
+        label = "done" if ok else "FAILED"
+        print(f"[{stage.name}] {label} in {elapsed:.2f}s")
+        if output:
+            print(output.rstrip("\n"))
+        status[stage.name] = "ok" if ok else "failed"
+        if ok:
+            manifest[stage.name] = fingerprint(stage)
+        else:
+            manifest.pop(stage.name, None)
+
+    pool = ProcessPoolExecutor() if parallel else None
+    try:
+        while pending or running:
+            for stage in list(pending):
+                state = ready(stage)
+                if state is None:
+                    continue
+                pending.remove(stage)
+                if state == "blocked":
+                    status[stage.name] = "blocked"
+                    print(f"[{stage.name}] not run (dependency failed)")
+                    continue
+                missing = [p for p in stage.requires if not os.path.exists(p)]
+                if missing:
+                    status[stage.name] = "skipped"
+                    print(f"[{stage.name}] skipped (missing {', '.join(missing)})")
+                    continue
+                if (manifest.get(stage.name) == fingerprint(stage)
+                        and all(os.path.exists(p) for p in stage.outputs)):
+                    status[stage.name] = "skipped"
+                    print(f"[{stage.name}] skipped (inputs unchanged)")
+                    continue
+
+                if stage.name in ("fetch", "extract"):
+                    # these replace the files the CSV is built from, and
+                    # extract rewrites the CSV the other stages read: run inline
+                    finish(stage, *_execute(stage.name, [], force))
+                    continue
+                if rows is None:
+                    rows = read_rows()
+                if pool is None:
+                    finish(stage, *_execute(stage.name, rows, force))
+                    continue
+                running[pool.submit(_execute, stage.name, rows, force)] = stage
+
+            if not running:
+                if pending and all(ready(s) is None for s in pending):
+                    raise RuntimeError("stage graph has a cycle or unknown dependency")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(running.pop(future), *future.result())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        save_manifest(manifest)
+
+    return "failed" not in status.values()
+
+
+def main():
+    args = sys.argv[1:]
+    if "--list" in args:
+        for s in STAGES:
+            deps = f" (after {', '.join(s.deps)})" if s.deps else ""
+            flag = " [--extract]" if s.optional else ""
+            print(f"  {s.name}{deps}{flag}")
+        return
+    names = [a for a in args if not a.startswith("--")]
+    unknown = [n for n in names if n not in STAGE_BY_NAME]
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(unknown)}; see --list")
+        sys.exit(2)
+
+    start = time.perf_counter()
+    ok = run_pipeline(
+        names or None,
+        force="--force" in args,
+        include_optional="--extract" in args,
+        parallel="--serial" not in args,
+    )
+    print(f"Pipeline {'finished' if ok else 'FAILED'} in {time.perf_counter() - start:.2f}s")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Write generator-level drill-down shards behind each chart point.
+
+Usage: python3 data/build_drilldown.py [YEAR ...]
+  Defaults to every year with rows in audit_all_data.csv.
+
+For every (view, year, id) the generators counted in that row's capacity
+columns are written to public/data/drilldown/<view>/<year>/<id>.json,
+largest first, so the chart can fetch one point's units on demand
+(src/lib/drilldown.ts). Generators are selected exactly as in the
+capacity cube: ISO shards by BA-derived ISO, state shards by plant state,
+with the same ELCC factor the rollup applies.
+
+Shards are columnar. Technology, state, BA and plant names are interned
+into small per-shard string tables and stored as indexes. index.json
+lists every shard with its size, total MW and a hash of its source rows;
+a shard is only re-serialized when that hash changes.
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from audit_table import load_table
+from capacity_cube import ISO_LABELS, ba_iso_codes
+from mappings import STATE_ISO, TECH_CATEGORY, get_elcc_factor
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+DRILLDOWN_DIR = os.path.join(os.path.dirname(DATA_DIR), "public", "data", "drilldown")
+INDEX_NAME = "index.json"
+VINTAGE = "Jan 2026"
+
+# Bump when the shard layout changes; forces every shard to be rewritten
+DRILLDOWN_VERSION = 1
+
+# Interned string columns: shard column -> generator table category column
+STRING_COLUMNS = {
+    "plant": "plant_name",
+    "technology": "technology",
+    "state": "state",
+    "ba": "ba_code",
+}
+
+
+# ---------------------------------------------------------------------------
+# Generator arrays
+# ---------------------------------------------------------------------------
+
+def elcc_factor_table(techs, isos):
+    """ELCC factor for every (technology code, ISO label) pair."""
+    return np.array([
+        [get_elcc_factor(TECH_CATEGORY.get(t, "other_firm"), iso) for iso in isos]
+        for t in techs
+    ]).reshape(len(techs), len(isos))
+
+
+def generator_arrays(table, year_column="operating_year"):
+    """Filtered per-generator arrays for drill-down.
+
+    Keeps the same generators as CapacityCube.from_table (finite, non-zero
+    nameplate and a valid year). ``iso_factor`` is the factor the ISO view
+    applies (generator's ISO, else the state's parent ISO); ``state_factor``
+    the one the state view applies (state's parent ISO).
+    """
+    mw = np.asarray(table["nameplate_mw"])
+    year = np.asarray(table[year_column])
+    keep = np.isfinite(mw) & (mw != 0) & (year >= 0)
+
+    states = list(table.labels("state"))
+    techs = [t or "Unknown" for t in table.labels("technology")]
+    parent = np.array([ISO_LABELS.index(STATE_ISO.get(s, "")) for s in states],
+                      dtype=np.int64)
+
+    state = np.asarray(table["state"])[keep]
+    tech = np.asarray(table["technology"])[keep]
+    iso = ba_iso_codes(table)[keep]
+    factors = elcc_factor_table(techs, ISO_LABELS)
+
+    return {
+        "year": year[keep],
+        "iso": iso,
+        "state": state,
+        "technology": tech,
+        "ba_code": np.asarray(table["ba_code"])[keep],
+        "plant_name": np.asarray(table["plant_name"])[keep],
+        "plant_id": np.asarray(table["plant_id"])[keep],
+        "generator_id": np.asarray(table["generator_id"])[keep],
+        "nameplate_mw": mw[keep],
+        "iso_factor": factors[tech, np.where(iso > 0, iso, parent[state])],
+        "state_factor": factors[tech, parent[state]],
+        "labels": {
+            "state": states,
+            "technology": techs,
+            "ba_code": list(table.labels("ba_code")),
+            "plant_name": list(table.labels("plant_name")),
+            "generator_id": list(table.labels("generator_id")),
+        },
+    }
+
+
+def shard_groups(gens, years):
+    """Yield (view, year, id, row indexes) for every non-empty shard.
+
+    One stable argsort over a combined (view group, year) key; no per-shard
+    masks over the full generator list.
+    """
+    year_list = sorted(years)
+    year_code = np.searchsorted(year_list, gens["year"])
+    in_years = np.isin(gens["year"], year_list)
+
+    state_labels = gens["labels"]["state"]
+    state_ok = np.array([s in STATE_ISO for s in state_labels], dtype=bool)
+
+    views = (
+        ("iso", gens["iso"], gens["iso"] > 0, ISO_LABELS),
+        ("state", gens["state"], state_ok[gens["state"]], state_labels),
+    )
+    for view, group, valid, labels in views:
+        rows = np.flatnonzero(in_years & valid)
+        key = year_code[rows].astype(np.int64) * len(labels) + group[rows]
+        perm = np.argsort(key, kind="stable")
+        order, key = rows[perm], key[perm]
+        keys, starts = np.unique(key, return_index=True)
+        bounds = list(starts) + [len(order)]
+        for k, start, end in zip(keys, bounds[:-1], bounds[1:]):
+            y, g = divmod(int(k), len(labels))
+            yield view, year_list[y], labels[g], order[start:end]
+
+
+# ---------------------------------------------------------------------------
+# Shards
+# ---------------------------------------------------------------------------
+
+def source_hash(gens, rows, view):
+    """Hash of the generator rows (and their labels) behind one shard."""
+    h = hashlib.sha256(f"{DRILLDOWN_VERSION}/{view}".encode())
+    rows = np.sort(rows)
+    for col in ("plant_id", "nameplate_mw", f"{view}_factor"):
+        h.update(np.ascontiguousarray(gens[col][rows]).tobytes())
+    for col in (*STRING_COLUMNS.values(), "generator_id"):
+        labels = gens["labels"][col]
+        h.update("\x1f".join(labels[c] for c in gens[col][rows]).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def make_shard(gens, rows, view, year, region):
+    """Columnar shard dict for one (view, year, id), largest units first."""
+    mw = gens["nameplate_mw"][rows]
+    rows = rows[np.argsort(-mw, kind="stable")]
+    mw = gens["nameplate_mw"][rows]
+    factor = gens[f"{view}_factor"][rows]
+
+    strings = {}
+    columns = {"plant_id": [int(p) if p >= 0 else None for p in gens["plant_id"][rows]]}
+    for name, col in STRING_COLUMNS.items():
+        used, local = np.unique(gens[col][rows], return_inverse=True)
+        labels = gens["labels"][col]
+        strings[name] = [labels[c] for c in used]
+        columns[name] = local.tolist()
+    gen_labels = gens["labels"]["generator_id"]
+    columns["generator_id"] = [gen_labels[c] for c in gens["generator_id"][rows]]
+    columns["nameplate_mw"] = [round(float(v), 1) for v in mw]
+    columns["elcc_factor"] = [round(float(v), 4) for v in factor]
+
+    return {
+        "version": DRILLDOWN_VERSION,
+        "view": view,
+        "year": year,
+        "id": region,
+        "vintage": VINTAGE,
+        "length": len(rows),
+        "totals": {
+            "nameplate_mw": round(float(mw.sum()), 1),
+            "elcc_mw": round(float((mw * factor).sum()), 1),
+        },
+        "strings": strings,
+        "columns": columns,
+    }
+
+
+def load_index(out_dir=DRILLDOWN_DIR):
+    try:
+        with open(os.path.join(out_dir, INDEX_NAME)) as f:
+            index = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return index if index.get("version") == DRILLDOWN_VERSION else {}
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def build_drilldown(table=None, years=None, out_dir=DRILLDOWN_DIR):
+    """Write changed shards and the index; returns (written, unchanged, removed)."""
+    if table is None:
+        from eia860m_cache import load_generators
+        table = load_generators()
+    if years is None:
+        years = csv_years()
+
+    gens = generator_arrays(table)
+    previous = load_index(out_dir).get("shards", {})
+    shards = {}
+    written = unchanged = 0
+
+    for view, year, region, rows in shard_groups(gens, years):
+        key = f"{view}/{year}/{region}"
+        path = f"{key}.json"
+        digest = source_hash(gens, rows, view)
+        prev = previous.get(key)
+        if (prev and prev["hash"] == digest
+                and os.path.exists(os.path.join(out_dir, path))):
+            shards[key] = prev
+            unchanged += 1
+            continue
+        shard = make_shard(gens, rows, view, year, region)
+        _write_atomic(os.path.join(out_dir, path),
+                      json.dumps(shard, ensure_ascii=False, separators=(",", ":")))
+        shards[key] = {
+            "path": path,
+            "length": shard["length"],
+            "nameplate_mw": shard["totals"]["nameplate_mw"],
+            "hash": digest,
+        }
+        written += 1
+
+    removed = 0
+    for key, entry in previous.items():
+        if key not in shards:
+            stale = os.path.join(out_dir, entry["path"])
+            if os.path.exists(stale):
+                os.remove(stale)
+            removed += 1
+
+    index = {
+        "version": DRILLDOWN_VERSION,
+        "vintage": VINTAGE,
+        "shards": dict(sorted(shards.items())),
+    }
+    _write_atomic(os.path.join(out_dir, INDEX_NAME),
+                  json.dumps(index, ensure_ascii=False, separators=(",", ":")))
+    return written, unchanged, removed
+
+
+def csv_years():
+    return sorted(set(load_table(CSV_PATH).values("year", as_int=True)))
+
+
+def main():
+    years = [int(a) for a in sys.argv[1:]] or None
+    written, unchanged, removed = build_drilldown(years=years)
+    print(f"Drill-down shards: {written} written, {unchanged} unchanged, "
+          f"{removed} removed → {DRILLDOWN_DIR}")
+
+
+if __name__ == "__main__":
+    main()
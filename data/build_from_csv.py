@@ -1,18 +1,44 @@
 #!/usr/bin/env python3
-"""Generate the 5 verified JSON files from audit_all_data.csv.
+"""Generate the 6 verified JSON files from audit_all_data.csv.
 
-Usage: python3 data/build_from_csv.py
+Usage: python3 data/build_from_csv.py [--force] [--profile [--cprofile]]
 
 The CSV is the single source of truth. JSON files are build artifacts.
+
+Builds are incremental: data/.cache/build_manifest.json records a content
+hash of each (view, year) group's input rows, its METADATA entry, this
+script, and the file written. Outputs whose inputs are unchanged are
+skipped; the rest are written atomically (temp file + rename), so Vite
+only reloads datasets that actually changed. --force rebuilds everything.
+
+Each record also carries its x value for every capacity toggle
+(chart_metrics.X_FIELDS), and each dataset a "fits" object with the
+least-squares trendline for every toggle combination. Both are computed
+for all rows and groups in one vectorized pass (chart_metrics.py), so
+the chart does no math when a toggle changes.
+
+The production bundle (public/data/, see build_bundle.py) is refreshed
+at the end of every run. --profile reports per-stage timings (see
+profiling.py).
 """
 
-import csv
+import hashlib
 import json
+import math
 import os
+import sys
+import tempfile
+
+import chart_metrics
+import profiling
+from audit_table import load_table
+from profiling import phase, wrote
 
 DATA_DIR = os.path.dirname(os.path.abspath(__file__))
 VERIFIED_DIR = os.path.join(DATA_DIR, "verified")
 CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+MANIFEST_PATH = os.path.join(DATA_DIR, ".cache", "build_manifest.json")
+MANIFEST_VERSION = 1
 
 # ---------------------------------------------------------------------------
 # Metadata templates keyed by (view, year)
@@ -124,21 +150,13 @@ OUTPUT_MAP = {
 }
 
 
-def parse_num(val, as_int=False):
-    """Parse a numeric string, returning None for empty."""
-    if val is None or val == "":
-        return None
-    f = float(val)
-    if as_int:
-        return int(f)
-    # Return int if it's a whole number (e.g. 31.0 -> 31)
-    if f == int(f) and "." not in val:
-        return int(f)
-    return f
+def build_record(row, derived=None):
+    """Convert an AuditRow into a JSON record.
 
-
-def build_record(row):
-    """Convert a CSV row dict into a JSON record."""
+    Numbers come from row.value() (audit_table.parse_value): None for
+    blank, int for whole numbers written without a decimal point.
+    ``derived`` ({X_FIELDS name: value}) is written after peak demand.
+    """
     view = row["view"]
     rec = {}
 
@@ -146,35 +164,37 @@ def build_record(row):
     rec["name"] = row["name"]
     rec["region"] = row["region"]
 
-    rec["wholesale_price_mwh"] = parse_num(row["wholesale_price_mwh"])
-    rec["all_in_price_mwh"] = parse_num(row["all_in_price_mwh"])
+    rec["wholesale_price_mwh"] = row.value("wholesale_price_mwh")
+    rec["all_in_price_mwh"] = row.value("all_in_price_mwh")
 
     # retail_price_cents_kwh: only for state rows
-    retail = parse_num(row.get("retail_price_cents_kwh", ""))
+    retail = row.value("retail_price_cents_kwh")
     if retail is not None:
         rec["retail_price_cents_kwh"] = retail
 
-    rec["capacity_additions_mw"] = parse_num(row["capacity_additions_mw"], as_int=True)
+    rec["capacity_additions_mw"] = row.value("capacity_additions_mw", as_int=True)
 
-    elcc = parse_num(row.get("capacity_additions_elcc_mw", ""), as_int=True)
+    elcc = row.value("capacity_additions_elcc_mw", as_int=True)
     if elcc is not None:
         rec["capacity_additions_elcc_mw"] = elcc
 
-    retirements = parse_num(row.get("retirements_mw", ""), as_int=True)
+    retirements = row.value("retirements_mw", as_int=True)
     if retirements is not None:
         rec["retirements_mw"] = retirements
 
-    rec["project_count"] = parse_num(row["project_count"], as_int=True)
-    rec["peak_demand_gw"] = parse_num(row["peak_demand_gw"])
-    rec["queue_completion_pct"] = parse_num(row["queue_completion_pct"])
+    rec["project_count"] = row.value("project_count", as_int=True)
+    rec["peak_demand_gw"] = row.value("peak_demand_gw")
+    if derived:
+        rec.update(derived)
+    rec["queue_completion_pct"] = row.value("queue_completion_pct")
     rec["queue_cohort"] = row["queue_cohort"]
 
-    aqd = parse_num(row.get("avg_queue_duration_months", ""), as_int=True)
+    aqd = row.value("avg_queue_duration_months", as_int=True)
     if aqd is not None:
         rec["avg_queue_duration_months"] = aqd
 
     # price_2023_mwh: only for iso 2024 rows
-    p2023 = parse_num(row.get("price_2023_mwh", ""))
+    p2023 = row.value("price_2023_mwh")
     if p2023 is not None:
         rec["price_2023_mwh"] = p2023
 
@@ -206,52 +226,229 @@ def build_record(row):
     return rec
 
 
-def main():
-    # Read CSV
-    with open(CSV_PATH, newline="") as f:
-        reader = csv.DictReader(f)
-        all_rows = list(reader)
+# ---------------------------------------------------------------------------
+# Build manifest
+# ---------------------------------------------------------------------------
+
+def content_hash(obj):
+    """Stable SHA-256 of a JSON-serializable value (or raw bytes)."""
+    if not isinstance(obj, bytes):
+        obj = json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(obj).hexdigest()
+
+
+def file_hash(path):
+    try:
+        with open(path, "rb") as f:
+            return content_hash(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def builder_hash():
+    """Hash of this script and chart_metrics.py, so code changes
+    invalidate every output."""
+    return content_hash([file_hash(os.path.abspath(__file__)),
+                         file_hash(os.path.abspath(chart_metrics.__file__))])
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("outputs", {})
+
+
+def _default_mode():
+    """0o666 minus the process umask: the mode open() would create a file with."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_atomic(path, text):
+    """Write text to path via a temp file in the same directory + rename."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        # mkstemp creates 0600 files; give outputs the usual permissions
+        os.chmod(tmp, _default_mode())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def save_manifest(outputs):
+    manifest = {"version": MANIFEST_VERSION, "outputs": outputs}
+    write_atomic(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+
+def group_inputs(view, year, rows, builder):
+    """Manifest inputs of one (view, year) output; see rebuild_reason."""
+    return {
+        "group": f"{view}/{year}",
+        "builder": builder,
+        "rows": content_hash([list(r.items()) for r in rows]),
+        "metadata": content_hash(METADATA[(view, year)]),
+    }
+
+
+def rebuild_reason(prev, inputs, out_path):
+    """Why an output must be rebuilt, or None if it is up to date."""
+    if prev is None:
+        return "not in manifest"
+    if prev.get("builder") != inputs["builder"]:
+        return "build script changed"
+    if prev.get("rows") != inputs["rows"]:
+        return "input rows changed"
+    if prev.get("metadata") != inputs["metadata"]:
+        return "metadata changed"
+    current = file_hash(out_path)
+    if current is None:
+        return "output missing"
+    if current != prev.get("output"):
+        return "output modified on disk"
+    return None
 
-    print(f"Read {len(all_rows)} rows from CSV")
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def derived_records(table):
+    """Per-row {X_FIELDS name: value} dicts; None where undefined."""
+    columns = chart_metrics.derived_columns(table)
+    values = [
+        [round(v, 4) if math.isfinite(v) else None for v in col.tolist()]
+        for col in columns.values()
+    ]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def build_output(view, year, rows, derived=None, fits=None):
+    """Render one (view, year) dataset as JSON text.
+
+    ``derived`` is parallel to ``rows`` (derived_records); ``fits`` is
+    the group's chart_metrics.group_fits() entry.
+    """
+    _filename, top_key = OUTPUT_MAP[(view, year)]
+    meta_template = METADATA[(view, year)]
+    if derived is None:
+        derived = [None] * len(rows)
+
+    # Sort by capacity_additions_mw descending
+    pairs = sorted(zip(rows, derived),
+                   key=lambda p: p[0].value("capacity_additions_mw") or 0,
+                   reverse=True)
+
+    records = [build_record(r, d) for r, d in pairs]
+
+    metadata = {
+        "title": meta_template["title"],
+        "author": meta_template["author"],
+        "compiled": str(meta_template["primary_year"]),
+        "primary_year": meta_template["primary_year"],
+        "notes": meta_template["notes"],
+    }
+
+    output = {"metadata": metadata}
+    if fits is not None:
+        output["fits"] = fits
+    output[top_key] = records
+    return json.dumps(output, indent=2, ensure_ascii=False) + "\n", len(records)
+
+
+def build_all(all_rows, force=False):
+    """Write every changed verified JSON file and the bundle.
+
+    Returns the number of JSON files written.
+    """
+    # Derived x values and trendlines for every row and group at once
+    with phase("derived metrics + fits", rows=len(all_rows)):
+        derived = derived_records(all_rows)
+        fits = chart_metrics.group_fits(all_rows)
 
     # Group by (view, year)
     groups = {}
-    for row in all_rows:
+    for i, row in enumerate(all_rows):
         key = (row["view"], int(row["year"]))
-        groups.setdefault(key, []).append(row)
+        groups.setdefault(key, []).append(i)
+
+    manifest = {} if force else load_manifest()
+    outputs = {}
+    builder = builder_hash()
+    written = skipped = 0
 
     # Generate each output file
-    for (view, year), rows in sorted(groups.items()):
+    for (view, year), indices in sorted(groups.items()):
+        rows = [all_rows[i] for i in indices]
         if (view, year) not in OUTPUT_MAP:
             print(f"  WARNING: No output mapping for ({view}, {year}), skipping")
             continue
 
-        filename, top_key = OUTPUT_MAP[(view, year)]
-        meta_template = METADATA[(view, year)]
-
-        # Sort by capacity_additions_mw descending
-        rows.sort(key=lambda r: float(r["capacity_additions_mw"] or 0), reverse=True)
-
-        records = [build_record(r) for r in rows]
+        filename, _top_key = OUTPUT_MAP[(view, year)]
+        out_path = os.path.join(VERIFIED_DIR, filename)
+        inputs = group_inputs(view, year, rows, builder)
+
+        prev = manifest.get(filename)
+        reason = "--force" if force else rebuild_reason(prev, inputs, out_path)
+        if reason is None:
+            outputs[filename] = prev
+            skipped += 1
+            print(f"  {filename}: skipped (inputs unchanged, {len(rows)} rows)")
+            continue
 
-        metadata = {
-            "title": meta_template["title"],
-            "author": meta_template["author"],
-            "compiled": str(meta_template["primary_year"]),
-            "primary_year": meta_template["primary_year"],
-            "notes": meta_template["notes"],
-        }
+        with phase(f"build {filename}", rows=len(rows)) as rec:
+            with phase("records + JSON"):
+                text, n_records = build_output(
+                    view, year, rows, [derived[i] for i in indices],
+                    fits.get((view, year)))
+            digest = content_hash(text.encode("utf-8"))
+            if digest == file_hash(out_path):
+                print(f"  {filename}: {n_records} records, output identical "
+                      f"({reason}); not rewritten")
+            else:
+                with phase("write"):
+                    write_atomic(out_path, text)
+                wrote(rec, out_path)
+                written += 1
+                print(f"  {filename}: {n_records} records ({reason})")
+
+        outputs[filename] = dict(inputs, output=digest)
+
+    save_manifest(outputs)
+    print(f"Done. {written} written, {skipped} skipped.")
+
+    from build_bundle import PUBLIC_DATA_DIR, build_bundle
+    with phase("bundle", rows=len(all_rows)) as rec:
+        bundle_files = build_bundle()
+        for name in bundle_files:
+            wrote(rec, os.path.join(PUBLIC_DATA_DIR, name))
+    if bundle_files:
+        print(f"Bundle: wrote {', '.join(bundle_files)}")
+    return written
 
-        output = {"metadata": metadata, top_key: records}
 
-        out_path = os.path.join(VERIFIED_DIR, filename)
-        with open(out_path, "w") as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
-            f.write("\n")
+def main():
+    force = "--force" in sys.argv[1:]
+    profiling.start("build_from_csv")
 
-        print(f"  {filename}: {len(records)} records")
+    # Read CSV
+    with phase("read CSV") as rec:
+        all_rows = load_table(CSV_PATH)
+        rec["rows"] = len(all_rows)
 
-    print("Done.")
+    print(f"Read {len(all_rows)} rows from CSV")
+    build_all(all_rows, force)
+    profiling.finish()
 
 
 if __name__ == "__main__":
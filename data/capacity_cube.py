@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Grouped capacity cube built from one pass over the EIA-860M Operating sheet.
+
+Every generator is assigned to a cell of
+(operating year × plant state × ISO × technology); each cell holds the
+summed nameplate MW, ELCC MW and generator count. Rolling the cube up to a
+(view, year) gives the capacity fields for every row of
+audit_all_data.csv without rescanning the workbook per year or per view.
+
+ISO comes from the generator's Balancing Authority Code (BA_ISO); ""
+marks generators outside the seven ISOs or with no BA code.
+
+Usage: python3 data/capacity_cube.py
+  Prints cube capacity next to the CSV values for every (view, year) row.
+"""
+
+import os
+
+import numpy as np
+
+from audit_table import load_table
+from mappings import (
+    BA_ISO, ISOS, STATE_ISO, TECH_CATEGORY, get_elcc_factor, normalize_ba,
+)
+from profiling import phase
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+
+
+# ISO categories: code 0 is "" (no BA code, or a BA outside the seven ISOs)
+ISO_LABELS = [""] + ISOS
+
+
+def ba_iso_codes(table):
+    """Integer ISO code per generator, derived from its BA code.
+
+    The BA → ISO lookup runs once per distinct BA label; generators are
+    then mapped with a single array take. Returns int64 codes into
+    ISO_LABELS (0 = unmapped).
+    """
+    iso_index = {iso: i for i, iso in enumerate(ISO_LABELS)}
+    lut = np.array(
+        [iso_index[BA_ISO.get(normalize_ba(label), "")]
+         for label in table.labels("ba_code")],
+        dtype=np.int64,
+    )
+    return lut[np.asarray(table["ba_code"])]
+
+
+class CapacityCube:
+    """Sparse (year, state, iso, technology) aggregate of generator capacity.
+
+    Dimension labels live in ``years``, ``states``, ``isos`` and ``techs``;
+    each non-empty cell is one entry of the parallel cell arrays
+    (``year_idx``, ``state_idx``, ``iso_idx``, ``tech_idx``,
+    ``nameplate_mw``, ``elcc_mw``, ``count``).
+    """
+
+    def __init__(self, years, states, isos, techs, cells):
+        self.years = years
+        self.states = states
+        self.isos = isos
+        self.techs = techs
+        (self.year_idx, self.state_idx, self.iso_idx, self.tech_idx,
+         self.nameplate_mw, self.elcc_mw, self.count) = cells
+
+    def __len__(self):
+        return len(self.nameplate_mw)
+
+    @classmethod
+    def from_table(cls, table, year_column="operating_year"):
+        """Build the cube from a generator ColumnTable (see eia860m_cache.py)."""
+        mw = np.asarray(table["nameplate_mw"])
+        year = np.asarray(table[year_column])
+        keep = np.isfinite(mw) & (mw != 0) & (year >= 0)
+
+        mw = mw[keep]
+        year = year[keep]
+        state_code = np.asarray(table["state"])[keep]
+        iso_code = ba_iso_codes(table)[keep]
+        tech_code = np.asarray(table["technology"])[keep]
+        isos = ISO_LABELS
+
+        years, year_code = np.unique(year, return_inverse=True)
+        states = list(table.labels("state"))
+        techs = [t or "Unknown" for t in table.labels("technology")]
+
+        n_state, n_iso, n_tech = len(states), len(isos), len(techs)
+        key = ((year_code.astype(np.int64) * n_state + state_code) * n_iso
+               + iso_code) * n_tech + tech_code
+        cell_keys, cell_of_row = np.unique(key, return_inverse=True)
+
+        nameplate = np.bincount(cell_of_row, weights=mw, minlength=len(cell_keys))
+        count = np.bincount(cell_of_row, minlength=len(cell_keys))
+
+        rest, t_idx = np.divmod(cell_keys, n_tech)
+        rest, i_idx = np.divmod(rest, n_iso)
+        y_idx, s_idx = np.divmod(rest, n_state)
+
+        # ELCC factor per cell: the cell's ISO, or the state's parent ISO
+        # for generators outside the mapped BAs
+        with phase("ELCC factors", rows=len(cell_keys)):
+            factor = np.array([
+                get_elcc_factor(
+                    TECH_CATEGORY.get(techs[t], "other_firm"),
+                    isos[i] or STATE_ISO.get(states[s], ""),
+                )
+                for s, i, t in zip(s_idx, i_idx, t_idx)
+            ])
+
+        cells = (y_idx, s_idx, i_idx, t_idx, nameplate, nameplate * factor, count)
+        return cls([int(y) for y in years], states, isos, techs, cells)
+
+    # -- rollups ------------------------------------------------------------
+
+    def year_mask(self, year):
+        """Boolean mask over cells for one operating year."""
+        if year not in self.years:
+            return np.zeros(len(self), dtype=bool)
+        return self.year_idx == self.years.index(year)
+
+    def rollup(self, view, year):
+        """Aggregate one (view, year) to {id: {nameplate_mw, elcc_mw, project_count}}.
+
+        The state view covers every STATE_ISO state and applies the parent
+        ISO's ELCC factors, as extract_2025_state.py always has; the ISO
+        view groups by BA-derived ISO and uses the cube's per-cell ELCC.
+        """
+        mask = self.year_mask(year)
+        if view == "state":
+            ids = sorted(STATE_ISO)
+            label_idx = {s: i for i, s in enumerate(self.states)}
+            group = self.state_idx[mask]
+            factor = np.array([
+                get_elcc_factor(
+                    TECH_CATEGORY.get(self.techs[t], "other_firm"),
+                    STATE_ISO.get(self.states[s], ""),
+                )
+                for s, t in zip(group, self.tech_idx[mask])
+            ])
+            elcc = self.nameplate_mw[mask] * factor
+        elif view == "iso":
+            ids = ISOS
+            label_idx = {iso: i for i, iso in enumerate(self.isos)}
+            group = self.iso_idx[mask]
+            elcc = self.elcc_mw[mask]
+        else:
+            raise ValueError(f"Unknown view {view!r}")
+
+        size = len(self.states) if view == "state" else len(self.isos)
+        nameplate = np.bincount(group, weights=self.nameplate_mw[mask], minlength=size)
+        elcc_sum = np.bincount(group, weights=elcc, minlength=size)
+        count = np.bincount(group, weights=self.count[mask], minlength=size)
+
+        results = {}
+        for region in ids:
+            i = label_idx.get(region)
+            results[region] = {
+                "nameplate_mw": round(float(nameplate[i]), 1) if i is not None else 0.0,
+                "elcc_mw": round(float(elcc_sum[i]), 1) if i is not None else 0.0,
+                "project_count": int(count[i]) if i is not None else 0,
+            }
+        return results
+
+    def csv_fields(self, view, year):
+        """Capacity columns of audit_all_data.csv for one (view, year)."""
+        return {
+            region: {
+                "capacity_additions_mw": int(c["nameplate_mw"]),
+                "capacity_additions_elcc_mw": int(c["elcc_mw"]),
+                "project_count": c["project_count"],
+            }
+            for region, c in self.rollup(view, year).items()
+        }
+
+
+# ---------------------------------------------------------------------------
+# Main: compare cube rollups with the CSV
+# ---------------------------------------------------------------------------
+
+def main():
+    from extract_2025_state import build_capacity_cube
+
+    cube = build_capacity_cube()
+    print(f"Capacity cube: {len(cube)} cells, operating years "
+          f"{cube.years[0]}–{cube.years[-1]}" if cube.years else "Capacity cube: empty")
+
+    rows = load_table(CSV_PATH)
+
+    groups = sorted({(r["view"], int(r["year"])) for r in rows})
+    fields = {g: cube.csv_fields(*g) for g in groups}
+
+    for view, year in groups:
+        print(f"\n{view} {year}:")
+        for row in rows:
+            if (row["view"], int(row["year"])) != (view, year):
+                continue
+            c = fields[(view, year)].get(row["id"])
+            if c is None:
+                continue
+            print(f"  {row['id']:<7} CSV {row['capacity_additions_mw']:>6} MW"
+                  f" / {row['capacity_additions_elcc_mw'] or '-':>6} ELCC"
+                  f" / {row['project_count']:>4} gens   "
+                  f"EIA-860M {c['capacity_additions_mw']:>6} MW"
+                  f" / {c['capacity_additions_elcc_mw']:>6} ELCC"
+                  f" / {c['project_count']:>4} gens")
+
+
+if __name__ == "__main__":
+    main()
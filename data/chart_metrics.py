@@ -0,0 +1,132 @@
+"""Chart axis values, computed column-wise the way src/lib/scales.ts does.
+
+The scatter plot's x value is capacity per GW of system peak, nameplate
+or ELCC-weighted (CapacityWeighting), gross or net of retirements
+(CapacityBasis). Its y value is the wholesale or all-in price
+(PriceMetric); state points use the retail price when they have one.
+These functions return those values for every row of an AuditTable as
+float64 arrays, so analysis stages see the same numbers as the chart.
+
+build_from_csv.py writes X_FIELDS into every record and group_fits()
+into every dataset, so the chart switches toggles without recomputing.
+"""
+
+import numpy as np
+
+# PriceMetric -> CSV column
+PRICE_METRICS = {"energy": "wholesale_price_mwh", "all_in": "all_in_price_mwh"}
+WEIGHTINGS = ("nameplate", "elcc")   # CapacityWeighting
+BASES = ("gross", "net")             # CapacityBasis
+
+# Every toggle combination as (price metric, weighting, basis)
+COMBINATIONS = [(p, w, b) for p in PRICE_METRICS for w in WEIGHTINGS for b in BASES]
+
+# (weighting, basis) -> record field holding the x value
+X_FIELDS = {
+    ("nameplate", "gross"): "mw_per_gw_peak",
+    ("elcc", "gross"): "elcc_mw_per_gw_peak",
+    ("nameplate", "net"): "net_mw_per_gw_peak",
+    ("elcc", "net"): "net_elcc_mw_per_gw_peak",
+}
+
+
+def combination_key(price_metric, weighting, basis):
+    return f"{price_metric}/{weighting}/{basis}"
+
+
+def _filled(values, fallback):
+    """``values`` with NaN (blank) cells replaced from ``fallback``."""
+    return np.where(np.isnan(values), fallback, values)
+
+
+def capacity_terms(table, weighting):
+    """(gross MW, retirements MW, peak GW) arrays for one weighting.
+
+    ELCC falls back to nameplate where it is blank, and retirements to 0
+    (capacityPerGwPeakElcc, netCapacity).
+    """
+    nameplate = table.numbers("capacity_additions_mw")
+    gross = nameplate if weighting == "nameplate" else _filled(
+        table.numbers("capacity_additions_elcc_mw"), nameplate)
+    retirements = _filled(table.numbers("retirements_mw"), 0.0)
+    return gross, retirements, table.numbers("peak_demand_gw")
+
+
+def x_values(table, weighting, basis):
+    """getXValue for the capacity metric."""
+    gross, retirements, peak = capacity_terms(table, weighting)
+    capacity = gross - retirements if basis == "net" else gross
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return capacity / peak
+
+
+def y_values(table, price_metric, view=None):
+    """getYValue: retail price for state points that have one.
+
+    ``view`` applies one view to every row; None takes each row's own.
+    """
+    price = table.numbers(PRICE_METRICS[price_metric])
+    if view is None:
+        state = np.array(table.text("view")) == "state"
+        retail = table.numbers("retail_price_cents_kwh")
+        return np.where(state & ~np.isnan(retail), retail, price)
+    if view == "state":
+        return _filled(table.numbers("retail_price_cents_kwh"), price)
+    return price
+
+
+def derived_columns(table):
+    """{X_FIELDS name: x values} for every row."""
+    return {field: x_values(table, w, b) for (w, b), field in X_FIELDS.items()}
+
+
+def group_fits(table):
+    """Least-squares price-on-capacity fits per (view, year) and combination.
+
+    Returns {(view, year): {combination_key: {slope, intercept, r, n}}}.
+    Rows whose x or y is undefined are left out; slope, intercept and r
+    are None when a group has fewer than two distinct x values. Every
+    group is fitted at once: sums per group come from np.bincount over
+    the group code of each row, centred on the group means.
+    """
+    views = table.text("view")
+    years = table.values("year", as_int=True)
+    keys = sorted(set(zip(views, years)))
+    code_of = {k: i for i, k in enumerate(keys)}
+    group = np.array([code_of[k] for k in zip(views, years)], dtype=np.intp)
+    n_groups = len(keys)
+
+    def sums(weights, mask):
+        return np.bincount(group[mask], weights=weights, minlength=n_groups)
+
+    xs = {wb: x_values(table, *wb) for wb in X_FIELDS}
+    ys = {p: y_values(table, p) for p in PRICE_METRICS}
+    fits = {k: {} for k in keys}
+    for price_metric, weighting, basis in COMBINATIONS:
+        x, y = xs[weighting, basis], ys[price_metric]
+        ok = np.isfinite(x) & np.isfinite(y)
+        x, y = x[ok], y[ok]
+        n = sums(None, ok)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_mean = sums(x, ok) / n
+            y_mean = sums(y, ok) / n
+            dx = x - x_mean[group[ok]]
+            dy = y - y_mean[group[ok]]
+            sxx, sxy, syy = sums(dx * dx, ok), sums(dx * dy, ok), sums(dy * dy, ok)
+            slope = sxy / sxx
+            intercept = y_mean - slope * x_mean
+            r = sxy / np.sqrt(sxx * syy)
+        key = combination_key(price_metric, weighting, basis)
+        for g, group_key in enumerate(keys):
+            fits[group_key][key] = {
+                "slope": _rounded(slope[g]),
+                "intercept": _rounded(intercept[g]),
+                "r": _rounded(r[g]),
+                "n": int(n[g]),
+            }
+    return fits
+
+
+def _rounded(value, digits=6):
+    """JSON-safe float: None for NaN/inf."""
+    return round(float(value), digits) if np.isfinite(value) else None
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Cross-level consistency checks between state rows and their parent ISO.
+
+Usage: python3 data/consistency.py
+
+Rows are indexed once by (view, year, id); each state row is then joined
+to its parent ISO row (STATE_ISO) and, for proxy fields, to its own
+row of the proxy year with dictionary lookups, so every year is checked in a
+single linear pass over the CSV.
+
+Reported:
+  coverage     summed state capacity / ELCC / project count / retirements
+               as a ratio of the ISO row, per (year, ISO)
+  inheritance  state prices that differ from the parent ISO row
+  stale        values a state row says it copied ("Inherited from ...",
+               "<year> proxy") that no longer match their source row
+
+validate_data.py runs this stage after the row-level rules: stale copies
+and missing parent rows are errors, the rest are warnings.
+"""
+
+import os
+import re
+from collections import defaultdict
+
+from audit_table import load_table
+from mappings import ISOS, STATE_ISO
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+
+# State columns that should add up to the ISO row
+SUM_FIELDS = [
+    "capacity_additions_mw", "capacity_additions_elcc_mw", "project_count",
+    "retirements_mw",
+]
+
+# State prices come from the parent ISO row of the same year
+INHERITED_FIELDS = ["wholesale_price_mwh", "all_in_price_mwh"]
+
+# Fields a state row copies from its own row of another year when
+# source_peak says "<year> proxy (...)" (build_2025_state_rows)
+PROXY_FIELDS = ["peak_demand_gw"]
+PROXY_RE = re.compile(r"^(\d{4}) proxy\b")
+
+# Coverage ratios outside this band are reported. States and ISOs do not
+# nest exactly (a state's generators can sit in a neighbouring ISO), so
+# the band is wide.
+COVERAGE_BAND = (0.5, 2.0)
+
+
+def index_rows(rows):
+    """{(view, year, id): row}, built once."""
+    return {(r["view"], r["year"], r["id"]): r for r in rows}
+
+
+def check_consistency(rows):
+    """Run all cross-level checks over an AuditTable; returns a report dict.
+
+    ``coverage`` maps (year, iso) -> {field: (state_sum, iso_value, ratio)};
+    ``errors`` and ``warnings`` are message lists in CSV order.
+    """
+    index = index_rows(rows)
+    sums = defaultdict(lambda: dict.fromkeys(SUM_FIELDS, 0.0))
+    errors = []
+    warnings = []
+
+    for line, row in enumerate(rows, 2):
+        if row["view"] != "state":
+            continue
+        year, state = row["year"], row["id"]
+        prefix = f"Line {line} (state/{year}/{state})"
+        iso = STATE_ISO.get(state)
+        if iso is None:
+            warnings.append(f"{prefix}: state has no parent ISO in STATE_ISO")
+            continue
+        parent = index.get(("iso", year, iso))
+        if parent is None:
+            errors.append(f"{prefix}: parent row iso/{year}/{iso} is missing")
+            continue
+
+        totals = sums[(year, iso)]
+        for field in SUM_FIELDS:
+            totals[field] += row.number(field) or 0.0
+
+        inherited = row.get("source_price", "").startswith("Inherited from")
+        for field in INHERITED_FIELDS:
+            mine, theirs = row.get(field, ""), parent.get(field, "")
+            if row.number(field) == parent.number(field):
+                continue
+            if inherited:
+                errors.append(f"{prefix}: stale {field}={mine}, "
+                              f"{iso} {year} now has {theirs}")
+            else:
+                warnings.append(f"{prefix}: {field}={mine} differs from "
+                                f"{iso} {year} ({theirs})")
+
+        proxy = PROXY_RE.match(row.get("source_peak", ""))
+        if proxy:
+            prev_year = proxy.group(1)
+            prev = index.get(("state", prev_year, state))
+            if prev is None:
+                errors.append(f"{prefix}: proxy source state/{prev_year}/{state} is missing")
+                continue
+            for field in PROXY_FIELDS:
+                if row.number(field) != prev.number(field):
+                    errors.append(f"{prefix}: stale {field}={row.get(field)}, "
+                                  f"{state} {prev_year} now has {prev.get(field)}")
+
+    lo, hi = COVERAGE_BAND
+    coverage = {}
+    years = sorted({r["year"] for r in rows if r["view"] == "iso"})
+    for year in years:
+        for iso in ISOS:
+            parent = index.get(("iso", year, iso))
+            if parent is None or (year, iso) not in sums:
+                continue
+            cells = {}
+            for field in SUM_FIELDS:
+                total = sums[(year, iso)][field]
+                value = parent.number(field)
+                ratio = total / value if value else None
+                cells[field] = (total, value, ratio)
+                if ratio is not None and not lo <= ratio <= hi:
+                    warnings.append(
+                        f"{iso} {year}: states sum to {total:,.0f} {field}, "
+                        f"ISO row has {value:,.0f} (coverage {ratio:.2f})"
+                    )
+            coverage[(year, iso)] = cells
+
+    return {"coverage": coverage, "errors": errors, "warnings": warnings}
+
+
+def print_coverage(coverage):
+    fields = [f.replace("capacity_additions_", "").replace("_mw", "") for f in SUM_FIELDS]
+    print(f"  {'year':<6}{'iso':<8}" + "".join(f"{f:>14}" for f in fields))
+    for (year, iso), cells in sorted(coverage.items()):
+        ratios = ["-" if c[2] is None else f"{c[2]:.2f}" for c in cells.values()]
+        print(f"  {year:<6}{iso:<8}" + "".join(f"{r:>14}" for r in ratios))
+
+
+def main():
+    rows = load_table(CSV_PATH)
+
+    report = check_consistency(rows)
+    print(f"State → ISO coverage (sum of states / ISO row), {len(rows)} rows:")
+    print_coverage(report["coverage"])
+    for w in report["warnings"]:
+        print(f"  WARNING: {w}")
+    for e in report["errors"]:
+        print(f"  ERROR: {e}")
+    if not report["errors"]:
+        print("  No stale or missing inherited values.")
+
+
+if __name__ == "__main__":
+    main()
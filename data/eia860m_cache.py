@@ -0,0 +1,274 @@
+"""Content-hashed columnar cache for parsed EIA-860M sheets.
+
+The first parse of a workbook sheet stores the projected columns as one
+.npy file per column under data/.cache/eia860m/. Later runs memory-map
+those files and never open the workbook. Entries are keyed by the SHA-256
+of the workbook bytes plus a hash of the sheet name and column projection,
+so editing the workbook or changing the projection invalidates the entry.
+
+String columns are stored as int32 codes into a label table (kept in
+meta.json) so every column is a fixed-dtype array that can be mmapped.
+
+The generator-sheet projections (OPERATING_COLUMNS, RETIRED_COLUMNS)
+live here too, so every reader of the workbook (the warehouse ingest,
+the drill-down and ELCC stages, extract_2025_state.py) shares one cache
+entry per sheet.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from profiling import phase
+from xlsx_reader import XlsxReader
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(DATA_DIR, ".cache", "eia860m")
+EIA860M_PATH = os.path.join(DATA_DIR, "eia860m", "january_generator2026.xlsx")
+
+# Bump when the on-disk layout or value normalization changes
+CACHE_VERSION = 1
+
+# EIA-860M sheets carry two title rows; headers are on row 3
+HEADER_ROW = 3
+
+# Projected "Operating" sheet columns: (name, header text, kind)
+OPERATING_COLUMNS = (
+    ("state", "Plant State", "category"),
+    ("ba_code", "Balancing Authority Code", "category"),
+    ("nameplate_mw", "Nameplate Capacity (MW)", "float"),
+    ("technology", "Technology", "category"),
+    ("operating_year", "Operating Year", "int"),
+    ("generator_id", "Generator ID", "category"),
+    ("plant_id", "Plant ID", "int"),
+    ("plant_name", "Plant Name", "category"),
+)
+
+# Projected "Retired" sheet columns
+RETIRED_COLUMNS = (
+    ("state", "Plant State", "category"),
+    ("ba_code", "Balancing Authority Code", "category"),
+    ("nameplate_mw", "Nameplate Capacity (MW)", "float"),
+    ("technology", "Technology", "category"),
+    ("retirement_year", "Retirement Year", "int"),
+    ("generator_id", "Generator ID", "category"),
+    ("plant_id", "Plant ID", "int"),
+    ("plant_name", "Plant Name", "category"),
+)
+
+GENERATOR_SHEETS = {"Operating": OPERATING_COLUMNS, "Retired": RETIRED_COLUMNS}
+
+# Column kinds: (numpy dtype, missing value)
+COLUMN_KINDS = {
+    "category": ("<i4", None),
+    "float": ("<f8", np.nan),
+    "int": ("<i4", -1),
+}
+
+
+# ---------------------------------------------------------------------------
+# Columnar table
+# ---------------------------------------------------------------------------
+
+class ColumnTable:
+    """Projected sheet columns as parallel arrays.
+
+    Numeric columns are float64 (NaN = missing/invalid) or int32
+    (-1 = missing/invalid). Category columns are int32 codes into
+    ``labels(name)``; missing cells map to the label "".
+    """
+
+    __slots__ = ("columns", "_labels", "n_rows")
+
+    def __init__(self, columns, labels, n_rows):
+        self.columns = columns
+        self._labels = labels
+        self.n_rows = n_rows
+
+    def __len__(self):
+        return self.n_rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def labels(self, name):
+        """Label table for a category column."""
+        return self._labels[name]
+
+    def decode(self, name):
+        """Category column as an object array of strings."""
+        return np.asarray(self._labels[name], dtype=object)[self.columns[name]]
+
+
+def _encode(values, kind):
+    """Normalize raw cell values for one column into (array, labels)."""
+    dtype, missing = COLUMN_KINDS[kind]
+    if kind == "category":
+        index = {}
+        codes = np.empty(len(values), dtype=dtype)
+        for i, v in enumerate(values):
+            label = str(v).strip() if v is not None else ""
+            code = index.get(label)
+            if code is None:
+                code = index[label] = len(index)
+            codes[i] = code
+        return codes, list(index)
+
+    out = np.full(len(values), missing, dtype=dtype)
+    for i, v in enumerate(values):
+        if v is None or v == "":
+            continue
+        try:
+            out[i] = float(v) if kind == "float" else int(float(v))
+        except (ValueError, TypeError):
+            continue
+    return out, None
+
+
+# ---------------------------------------------------------------------------
+# Cache keys
+# ---------------------------------------------------------------------------
+
+def file_sha256(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def projection_key(sheet, columns, header_row=HEADER_ROW):
+    """Short hash identifying a sheet + column projection."""
+    spec = {
+        "version": CACHE_VERSION,
+        "sheet": sheet,
+        "header_row": header_row,
+        "columns": [list(c) for c in columns],
+    }
+    blob = json.dumps(spec, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:12]
+
+
+def _entry_dir(content_sha, proj_key):
+    return os.path.join(CACHE_DIR, f"{content_sha[:16]}-{proj_key}")
+
+
+# ---------------------------------------------------------------------------
+# Load / store
+# ---------------------------------------------------------------------------
+
+def _load_entry(entry):
+    with open(os.path.join(entry, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = {}
+    labels = {}
+    for name, spec in meta["columns"].items():
+        arrays[name] = np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r")
+        if spec["kind"] == "category":
+            labels[name] = spec["labels"]
+    return ColumnTable(arrays, labels, meta["n_rows"])
+
+
+def _store_entry(entry, meta, arrays):
+    """Write an entry into a temp dir, then rename it into place."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=CACHE_DIR, prefix=".tmp-")
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), arr)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, entry)
+    except OSError:
+        # Another process stored the same entry first
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(entry):
+            raise
+
+
+def _prune_stale(source, proj_key, keep):
+    """Drop older entries for the same workbook name and projection."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for name in os.listdir(CACHE_DIR):
+        entry = os.path.join(CACHE_DIR, name)
+        if entry == keep or not name.endswith(f"-{proj_key}"):
+            continue
+        try:
+            with open(os.path.join(entry, "meta.json")) as f:
+                if json.load(f).get("source") != source:
+                    continue
+        except (OSError, ValueError):
+            pass
+        shutil.rmtree(entry, ignore_errors=True)
+
+
+def _build_entry(columns, raw, meta):
+    arrays = {}
+    meta["n_rows"] = len(raw[0]) if raw else 0
+    meta["columns"] = {}
+    for (name, _header, kind), values in zip(columns, raw):
+        arr, labels = _encode(values, kind)
+        arrays[name] = arr
+        meta["columns"][name] = {"kind": kind}
+        if labels is not None:
+            meta["columns"][name]["labels"] = labels
+    return arrays
+
+
+def load_sheets(path, projections, header_row=HEADER_ROW):
+    """Return {sheet: ColumnTable} for several sheets of one workbook.
+
+    ``projections`` maps sheet name -> sequence of (name, header text, kind)
+    tuples, where kind is one of COLUMN_KINDS. The workbook is hashed once;
+    sheets whose entry is cached are memory-mapped, and all remaining
+    sheets are parsed through a single XlsxReader so they share one open
+    archive and one shared-strings table.
+    """
+    with phase("hash workbook"):
+        content_sha = file_sha256(path)
+    tables = {}
+    pending = {}
+    for sheet, columns in projections.items():
+        proj_key = projection_key(sheet, columns, header_row)
+        entry = _entry_dir(content_sha, proj_key)
+        if os.path.isfile(os.path.join(entry, "meta.json")):
+            with phase(f"cache hit {sheet}") as rec:
+                tables[sheet] = _load_entry(entry)
+                rec["rows"] = len(tables[sheet])
+        else:
+            pending[sheet] = (columns, proj_key, entry)
+
+    if pending:
+        with XlsxReader(path) as reader:
+            for sheet, (columns, proj_key, entry) in pending.items():
+                with phase(f"parse {sheet}") as rec:
+                    raw = reader.read_columns(sheet, [c[1] for c in columns], header_row)
+                    rec["rows"] = len(raw[0]) if raw else 0
+                meta = {
+                    "source": os.path.basename(path),
+                    "sha256": content_sha,
+                    "sheet": sheet,
+                }
+                with phase(f"encode + store {sheet}", rows=rec["rows"]):
+                    arrays = _build_entry(columns, raw, meta)
+                    _store_entry(entry, meta, arrays)
+                    _prune_stale(meta["source"], proj_key, entry)
+                    tables[sheet] = _load_entry(entry)
+
+    return {sheet: tables[sheet] for sheet in projections}
+
+
+def load_sheet(path, sheet, columns, header_row=HEADER_ROW):
+    """Return the projected columns of one sheet as a ColumnTable."""
+    return load_sheets(path, {sheet: columns}, header_row)[sheet]
+
+
+def load_generators(path=EIA860M_PATH):
+    """Projected Operating-sheet generator table (GENERATOR_SHEETS entry)."""
+    return load_sheets(path, GENERATOR_SHEETS)["Operating"]
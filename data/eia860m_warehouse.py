@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""Multi-vintage EIA-860M generator warehouse in embedded SQLite.
+
+Usage: python3 data/eia860m_warehouse.py ingest [WORKBOOK ...] [--force]
+       python3 data/eia860m_warehouse.py capacity VIEW YEAR [--vintage V]
+       python3 data/eia860m_warehouse.py revisions VIEW YEAR [--id ID]
+       python3 data/eia860m_warehouse.py changes YEAR OLD NEW [--id STATE]
+  ingest defaults to every workbook in data/eia860m/; VIEW is state or
+  iso; vintages are YYYY-MM ("2026-01" for january_generator2026.xlsx).
+
+Every monthly EIA-860M workbook is one vintage. ingest() loads its
+Operating and Retired sheets (through the eia860m_cache.py column cache)
+into one `generators` table in data/.cache/eia860m.sqlite:
+
+  vintage, plant_id, generator_id, status   primary key; status is
+                                            "operating" or "retired"
+  state, ba_code, iso, technology           indexed; iso is derived
+                                            from ba_code (BA_ISO), ""
+                                            outside the seven ISOs
+  operating_year, retirement_year, nameplate_mw, plant_name
+
+A vintage whose workbook hash is unchanged is not reloaded; a changed
+workbook replaces its vintage in one transaction.
+
+Warehouse.capacity() and .retirements() return the same dicts as
+CapacityCube.rollup() (retirements as whole MW; up to float summation
+order) for any vintage, from an indexed GROUP BY:
+milliseconds, no workbook scan. extract_2025_state.py and extract_iso.py
+read capacity and retirements this way.
+revisions() gives a region's capacity for one year in every vintage, and
+changes() lists the generators behind the difference between two
+vintages: the filing lag, e.g. 2025 units that only appear months later.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from capacity_cube import ISO_LABELS, ba_iso_codes
+from eia860m_cache import GENERATOR_SHEETS, file_sha256, load_sheets
+from mappings import ISOS, STATE_ISO, TECH_CATEGORY, get_elcc_factor, normalize_ba
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+EIA860M_DIR = os.path.join(DATA_DIR, "eia860m")
+DB_PATH = os.path.join(DATA_DIR, ".cache", "eia860m.sqlite")
+SCHEMA_VERSION = 1
+
+MONTHS = ("january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december")
+VINTAGE_RE = re.compile(rf"({'|'.join(MONTHS)})_generator(\d{{4}})", re.IGNORECASE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vintages (
+    vintage     TEXT PRIMARY KEY,
+    source      TEXT NOT NULL,
+    sha256      TEXT NOT NULL,
+    loaded_at   TEXT NOT NULL,
+    operating   INTEGER NOT NULL,
+    retired     INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS generators (
+    vintage         TEXT NOT NULL,
+    plant_id        INTEGER NOT NULL,
+    generator_id    TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    state           TEXT NOT NULL,
+    ba_code         TEXT NOT NULL,
+    iso             TEXT NOT NULL,
+    technology      TEXT NOT NULL,
+    operating_year  INTEGER,
+    retirement_year INTEGER,
+    nameplate_mw    REAL NOT NULL,
+    plant_name      TEXT,
+    PRIMARY KEY (vintage, plant_id, generator_id, status)
+);
+CREATE INDEX IF NOT EXISTS generators_year
+    ON generators (vintage, status, operating_year);
+CREATE INDEX IF NOT EXISTS generators_retirement
+    ON generators (vintage, status, retirement_year);
+CREATE INDEX IF NOT EXISTS generators_state ON generators (state, operating_year);
+CREATE INDEX IF NOT EXISTS generators_iso ON generators (iso, operating_year);
+CREATE INDEX IF NOT EXISTS generators_ba ON generators (ba_code);
+CREATE INDEX IF NOT EXISTS generators_technology ON generators (technology);
+"""
+
+
+def vintage_of(path):
+    """"YYYY-MM" from an EIA-860M file name like january_generator2026.xlsx."""
+    m = VINTAGE_RE.search(os.path.basename(path))
+    if not m:
+        raise ValueError(f"{os.path.basename(path)}: no <month>_generator<year> "
+                         f"in the name; pass the vintage explicitly")
+    return f"{m.group(2)}-{MONTHS.index(m.group(1).lower()) + 1:02d}"
+
+
+def workbooks(directory=EIA860M_DIR):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                  if VINTAGE_RE.search(f) and f.lower().endswith(".xlsx"))
+
+
+def _generator_rows(table, vintage, status, year_column):
+    """Insert tuples for the generators of one sheet (nonzero, finite MW)."""
+    mw = np.asarray(table["nameplate_mw"])
+    keep = np.flatnonzero(np.isfinite(mw) & (mw != 0))
+    year = np.asarray(table[year_column])[keep]
+    years = [int(y) if y >= 0 else None for y in year.tolist()]
+    none = [None] * len(keep)
+    columns = (
+        table["plant_id"][keep].tolist(),
+        table.decode("generator_id")[keep].tolist(),
+        table.decode("state")[keep].tolist(),
+        [normalize_ba(b) for b in table.decode("ba_code")[keep].tolist()],
+        np.asarray(ISO_LABELS, dtype=object)[ba_iso_codes(table)[keep]].tolist(),
+        table.decode("technology")[keep].tolist(),
+        years if status == "operating" else none,
+        years if status == "retired" else none,
+        mw[keep].tolist(),
+        table.decode("plant_name")[keep].tolist(),
+    )
+    return [(vintage, plant, generator, status, *rest) for plant, generator, *rest in zip(*columns)]
+
+
+class Warehouse:
+    """Connection to the generator warehouse (created on first use)."""
+
+    def __init__(self, path=DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.executescript("DROP TABLE IF EXISTS generators; DROP TABLE IF EXISTS vintages;")
+            self.db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- loading ------------------------------------------------------------
+
+    def ingest(self, path, vintage=None, force=False):
+        """Load one workbook as ``vintage``; returns (vintage, loaded).
+
+        ``loaded`` is False when the vintage already holds this workbook.
+        """
+        vintage = vintage or vintage_of(path)
+        digest = file_sha256(path)
+        known = self.db.execute("SELECT sha256 FROM vintages WHERE vintage = ?",
+                                (vintage,)).fetchone()
+        if known and known[0] == digest and not force:
+            return vintage, False
+
+        tables = load_sheets(path, GENERATOR_SHEETS)
+        operating = _generator_rows(tables["Operating"], vintage, "operating", "operating_year")
+        retired = _generator_rows(tables["Retired"], vintage, "retired", "retirement_year")
+        with self.db:
+            self.db.execute("DELETE FROM generators WHERE vintage = ?", (vintage,))
+            # Later duplicates of a (plant, generator) on one sheet replace earlier ones
+            self.db.executemany(
+                "INSERT OR REPLACE INTO generators (vintage, plant_id, generator_id, status, "
+                "state, ba_code, iso, technology, operating_year, retirement_year, "
+                "nameplate_mw, plant_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                operating + retired)
+            self.db.execute(
+                "INSERT OR REPLACE INTO vintages VALUES (?, ?, ?, ?, ?, ?)",
+                (vintage, os.path.basename(path), digest,
+                 datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                 len(operating), len(retired)))
+        return vintage, True
+
+    # -- queries ------------------------------------------------------------
+
+    def vintages(self):
+        return [v for (v,) in self.db.execute("SELECT vintage FROM vintages ORDER BY vintage")]
+
+    def latest(self):
+        vintages = self.vintages()
+        if not vintages:
+            raise LookupError(f"No EIA-860M vintages in {self.path}; run ingest first")
+        return vintages[-1]
+
+    def _by_technology(self, view, year, vintage, status, region=None):
+        """[(region, technology, state, MW, generators)] for one year."""
+        year_column = "operating_year" if status == "operating" else "retirement_year"
+        group = "state" if view == "state" else "iso"
+        if view not in ("state", "iso"):
+            raise ValueError(f"Unknown view {view!r}")
+        sql = (f"SELECT {group}, technology, SUM(nameplate_mw), COUNT(*) FROM generators "
+               f"WHERE vintage = ? AND status = ? AND {year_column} = ?")
+        params = [vintage or self.latest(), status, year]
+        if region is not None:
+            sql += f" AND {group} = ?"
+            params.append(region)
+        return self.db.execute(sql + f" GROUP BY {group}, technology", params).fetchall()
+
+    def capacity(self, view, year, vintage=None, region=None):
+        """{id: {nameplate_mw, elcc_mw, project_count}}, as CapacityCube.rollup().
+
+        State ELCC uses the state's parent ISO factors, ISO ELCC the ISO's.
+        """
+        ids = sorted(STATE_ISO) if view == "state" else list(ISOS)
+        if region is not None:
+            ids = [region]
+        sums = {i: [0.0, 0.0, 0] for i in ids}
+        for group, tech, mw, count in self._by_technology(view, year, vintage, "operating", region):
+            if group not in sums:
+                continue
+            iso = STATE_ISO.get(group, "") if view == "state" else group
+            factor = get_elcc_factor(TECH_CATEGORY.get(tech or "Unknown", "other_firm"), iso)
+            s = sums[group]
+            s[0] += mw
+            s[1] += mw * factor
+            s[2] += count
+        return {
+            i: {"nameplate_mw": round(mw, 1), "elcc_mw": round(elcc, 1), "project_count": n}
+            for i, (mw, elcc, n) in sums.items()
+        }
+
+    def technology_mw(self, view, year, vintage=None):
+        """{id: {technology: nameplate MW}} for one operating year."""
+        out = {}
+        for group, tech, mw, _count in self._by_technology(view, year, vintage, "operating"):
+            out.setdefault(group, {})[tech or "Unknown"] = mw
+        return out
+
+    def retirements(self, view, year, vintage=None):
+        """{id: retired MW (int)} for one retirement year; 0 where none."""
+        ids = sorted(STATE_ISO) if view == "state" else list(ISOS)
+        mw = dict.fromkeys(ids, 0.0)
+        for group, _tech, total, _count in self._by_technology(view, year, vintage, "retired"):
+            if group in mw:
+                mw[group] += total
+        return {i: int(round(v, 1)) for i, v in mw.items()}
+
+    def revisions(self, view, year, region=None):
+        """{id: [(vintage, nameplate MW, generators)]} across every vintage."""
+        group = "state" if view == "state" else "iso"
+        sql = (f"SELECT {group}, vintage, SUM(nameplate_mw), COUNT(*) FROM generators "
+               f"WHERE status = 'operating' AND operating_year = ?")
+        params = [year]
+        if region is not None:
+            sql += f" AND {group} = ?"
+            params.append(region)
+        ids = set(sorted(STATE_ISO) if view == "state" else ISOS)
+        out = {}
+        for rid, vintage, mw, count in self.db.execute(
+                sql + f" GROUP BY {group}, vintage ORDER BY {group}, vintage", params):
+            if rid in ids:
+                out.setdefault(rid, []).append((vintage, round(mw, 1), count))
+        return out
+
+    def changes(self, year, old, new, state=None):
+        """Generators whose operating-year ``year`` capacity differs between vintages.
+
+        Returns dicts with plant_id, generator_id, plant_name, state,
+        technology, old/new operating_year and nameplate_mw, and kind:
+        "added" (first listed in ``new``), "dropped" (gone from ``new``),
+        "moved" (operating year revised into or out of ``year``) or
+        "resized" (nameplate revised).
+        """
+        where = "status = 'operating'" + (" AND state = :state" if state else "")
+        # A full outer join spelled as two LEFT JOINs (FULL OUTER JOIN
+        # needs SQLite 3.39): every old generator with its new row, if
+        # any, then the new generators the old vintage does not have.
+        sql = f"""
+            WITH o AS (SELECT * FROM generators WHERE vintage = :old AND {where}),
+                 n AS (SELECT * FROM generators WHERE vintage = :new AND {where})
+            SELECT o.plant_id AS plant_id, o.generator_id,
+                   COALESCE(n.plant_name, o.plant_name), COALESCE(n.state, o.state) AS state,
+                   COALESCE(n.technology, o.technology),
+                   o.operating_year, n.operating_year, o.nameplate_mw, n.nameplate_mw
+            FROM o LEFT JOIN n USING (plant_id, generator_id)
+            WHERE (o.operating_year = :year OR n.operating_year = :year)
+              AND (n.plant_id IS NULL
+                   OR o.operating_year IS NOT n.operating_year
+                   OR o.nameplate_mw != n.nameplate_mw)
+            UNION ALL
+            SELECT n.plant_id, n.generator_id, n.plant_name, n.state, n.technology,
+                   NULL, n.operating_year, NULL, n.nameplate_mw
+            FROM n LEFT JOIN o USING (plant_id, generator_id)
+            WHERE o.plant_id IS NULL AND n.operating_year = :year
+            ORDER BY state, plant_id
+        """
+        out = []
+        for (pid, gid, name, st, tech, old_year, new_year, old_mw, new_mw) in self.db.execute(
+                sql, {"old": old, "new": new, "year": year, "state": state}):
+            if old_mw is None:
+                kind = "added"
+            elif new_mw is None:
+                kind = "dropped"
+            elif old_year != new_year:
+                kind = "moved"
+            else:
+                kind = "resized"
+            out.append({
+                "plant_id": pid, "generator_id": gid, "plant_name": name, "state": st,
+                "technology": tech, "kind": kind,
+                "old_operating_year": old_year, "new_operating_year": new_year,
+                "old_nameplate_mw": old_mw, "new_nameplate_mw": new_mw,
+            })
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def _option(args, name, default=None):
+    if name not in args:
+        return default
+    i = args.index(name)
+    value = args[i + 1]
+    del args[i:i + 2]
+    return value
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("ingest", "capacity", "revisions", "changes"):
+        print(__doc__)
+        sys.exit(2)
+    command = args.pop(0)
+    vintage = _option(args, "--vintage")
+    region = _option(args, "--id")
+    force = "--force" in args
+    args = [a for a in args if not a.startswith("--")]
+
+    with Warehouse() as wh:
+        if command == "ingest":
+            paths = args or workbooks()
+            if not paths:
+                print(f"No EIA-860M workbooks in {EIA860M_DIR}")
+                sys.exit(1)
+            for path in paths:
+                start = time.perf_counter()
+                v, loaded = wh.ingest(path, force=force)
+                status = f"loaded in {time.perf_counter() - start:.2f}s" if loaded else "unchanged"
+                print(f"  {v}  {os.path.basename(path)}: {status}")
+            counts = wh.db.execute("SELECT COUNT(*), COUNT(DISTINCT vintage) FROM generators").fetchone()
+            print(f"{counts[0]:,} generator rows across {counts[1]} vintage(s) in {wh.path}")
+
+        elif command == "capacity":
+            view, year = args[0], int(args[1])
+            vintage = vintage or wh.latest()
+            start = time.perf_counter()
+            capacity = wh.capacity(view, year, vintage)
+            retired = wh.retirements(view, year, vintage)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{view} {year}, vintage {vintage} ({elapsed:.1f} ms):")
+            for rid, c in capacity.items():
+                print(f"  {rid:<7} {c['nameplate_mw']:>9,.1f} MW  {c['elcc_mw']:>9,.1f} ELCC  "
+                      f"{c['project_count']:>5} gens  {retired[rid]:>7,} MW retired")
+
+        elif command == "revisions":
+            view, year = args[0], int(args[1])
+            vintages = wh.vintages()
+            print(f"{view} {year} nameplate MW by vintage: {', '.join(vintages)}")
+            for rid, rows in wh.revisions(view, year, region).items():
+                by_vintage = {v: mw for v, mw, _n in rows}
+                cells, prev = [], None
+                for v in vintages:
+                    mw = by_vintage.get(v, 0.0)
+                    delta = f" ({mw - prev:+,.1f})" if prev is not None and mw != prev else ""
+                    cells.append(f"{mw:,.1f}{delta}")
+                    prev = mw
+                print(f"  {rid:<7} " + "  →  ".join(cells))
+
+        else:
+            year, old, new = int(args[0]), args[1], args[2]
+            changes = wh.changes(year, old, new, region)
+            print(f"Operating year {year}: {len(changes)} generator(s) differ between {old} and {new}")
+            for c in changes:
+                mw = f"{c['old_nameplate_mw'] or 0:,.1f} → {c['new_nameplate_mw'] or 0:,.1f} MW"
+                years = f"{c['old_operating_year']} → {c['new_operating_year']}"
+                print(f"  {c['kind']:<8} {c['state']} {c['plant_id']}/{c['generator_id']} "
+                      f"{c['technology']}: {mw}, year {years}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""ELCC uncertainty bands from a batched sweep over factor scenarios.
+
+Usage: python3 data/elcc_scenarios.py [YEAR ...] [--scenarios N] [--seed S]
+  Defaults to every year with rows in audit_all_data.csv, 500 scenarios.
+
+The ELCC factors in mappings.py are point values inside published
+ranges (ELCC_GENERIC_RANGES, ELCC_OVERRIDE_RANGES). This stage rolls the
+capacity cube up once into a nameplate matrix with one row per chart
+point (view, year, id) and one column per factor slot (ISO context ×
+technology category), then evaluates every scenario in one matrix
+product:
+
+    elcc[point, scenario] = nameplate[point, slot] @ factor[slot, scenario]
+
+Scenario 0 uses the point factors, so its result ("mid") matches
+capacity_additions_elcc_mw from the cube rollup. The others draw every
+ranged factor uniformly and independently within its range. Slots that
+share a factor draw it once: every ISO without an override uses the same
+generic solar draw in a scenario. "low" and "high" are the 5th and 95th
+percentiles across the drawn scenarios.
+
+Output: public/data/elcc_bands.json, {"bands": {"<view>/<year>/<id>":
+{nameplate_mw, low, mid, high}}, ...}, read by src/lib/elccBands.ts.
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from audit_table import load_table
+from capacity_cube import ISO_LABELS, CapacityCube
+from mappings import (
+    ELCC_GENERIC, ELCC_GENERIC_RANGES, ELCC_OVERRIDE_RANGES, ELCC_OVERRIDES,
+    ISOS, STATE_ISO, TECH_CATEGORY,
+)
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+BANDS_PATH = os.path.join(os.path.dirname(DATA_DIR), "public", "data", "elcc_bands.json")
+VINTAGE = "Jan 2026"
+BANDS_VERSION = 1
+
+N_SCENARIOS = 500
+SEED = 0
+PERCENTILES = (5, 95)
+
+# Factor slots: ISO context (ISO_LABELS index) × technology category
+CATEGORIES = sorted(ELCC_GENERIC)
+
+
+# ---------------------------------------------------------------------------
+# Factor scenarios
+# ---------------------------------------------------------------------------
+
+def factor_parameters():
+    """Independent factors: [(iso, category, point, low, high)].
+
+    iso is "" for a generic factor. Factors without a published range
+    have low == high == point.
+    """
+    params = []
+    for cat in CATEGORIES:
+        point = ELCC_GENERIC[cat]
+        low, high = ELCC_GENERIC_RANGES.get(cat, (point, point))
+        params.append(("", cat, point, low, high))
+    for iso in sorted(ELCC_OVERRIDES):
+        for cat, point in sorted(ELCC_OVERRIDES[iso].items()):
+            low, high = ELCC_OVERRIDE_RANGES.get(iso, {}).get(cat, (point, point))
+            params.append((iso, cat, point, low, high))
+    return params
+
+
+def slot_parameters(params):
+    """Parameter index for every factor slot, as get_elcc_factor resolves it."""
+    index = {(iso, cat): k for k, (iso, cat, *_rest) in enumerate(params)}
+    return np.array([
+        index.get((iso, cat), index[("", cat)])
+        for iso in ISO_LABELS for cat in CATEGORIES
+    ])
+
+
+def factor_matrix(params, n_scenarios=N_SCENARIOS, seed=SEED):
+    """(slots × 1 + n_scenarios) factors; column 0 holds the point factors."""
+    point = np.array([p[2] for p in params])
+    low = np.array([p[3] for p in params])
+    high = np.array([p[4] for p in params])
+    rng = np.random.default_rng(seed)
+    draws = rng.uniform(size=(len(params), n_scenarios))
+    values = np.hstack([point[:, None], low[:, None] + (high - low)[:, None] * draws])
+    return values[slot_parameters(params)]
+
+
+# ---------------------------------------------------------------------------
+# Nameplate matrix
+# ---------------------------------------------------------------------------
+
+def nameplate_matrix(cube, years):
+    """Nameplate MW per (chart point, factor slot).
+
+    Returns (points, matrix): points lists (view, year, id) for every ISO
+    and STATE_ISO state in each year, zero rows included, matching
+    CapacityCube.rollup. ISO points take factors from their own ISO;
+    state points from the state's parent ISO.
+    """
+    n_cat = len(CATEGORIES)
+    n_slots = len(ISO_LABELS) * n_cat
+    cat_of_tech = np.array([
+        CATEGORIES.index(TECH_CATEGORY.get(t, "other_firm")) for t in cube.techs
+    ])
+    parent_of_state = np.array([
+        ISO_LABELS.index(STATE_ISO.get(s, "")) for s in cube.states
+    ])
+    state_row = {s: i for i, s in enumerate(sorted(STATE_ISO))}
+    row_of_state = np.array([state_row.get(s, -1) for s in cube.states])
+
+    points = []
+    blocks = []
+    tech_cat = cat_of_tech[cube.tech_idx]
+    for year in years:
+        mask = cube.year_mask(year)
+        mw = cube.nameplate_mw[mask]
+        cat = tech_cat[mask]
+
+        # ISO view: cells with a mapped ISO, factor context = that ISO
+        iso = cube.iso_idx[mask]
+        keep = iso > 0
+        block = np.bincount(
+            (iso[keep] - 1) * n_slots + iso[keep] * n_cat + cat[keep],
+            weights=mw[keep], minlength=len(ISOS) * n_slots,
+        )
+        blocks.append(block.reshape(len(ISOS), n_slots))
+        points += [("iso", year, r) for r in ISOS]
+
+        # State view: STATE_ISO states, factor context = parent ISO
+        state = cube.state_idx[mask]
+        row = row_of_state[state]
+        keep = row >= 0
+        block = np.bincount(
+            row[keep] * n_slots + parent_of_state[state[keep]] * n_cat + cat[keep],
+            weights=mw[keep], minlength=len(state_row) * n_slots,
+        )
+        blocks.append(block.reshape(len(state_row), n_slots))
+        points += [("state", year, r) for r in sorted(STATE_ISO)]
+
+    matrix = np.vstack(blocks) if blocks else np.zeros((0, n_slots))
+    return points, matrix
+
+
+# ---------------------------------------------------------------------------
+# Sweep
+# ---------------------------------------------------------------------------
+
+def sweep(cube, years, n_scenarios=N_SCENARIOS, seed=SEED):
+    """ELCC bands for every chart point; returns the elcc_bands.json dict."""
+    params = factor_parameters()
+    points, nameplate = nameplate_matrix(cube, years)
+    elcc = nameplate @ factor_matrix(params, n_scenarios, seed)
+    low, high = np.percentile(elcc[:, 1:], PERCENTILES, axis=1)
+
+    bands = {}
+    for k, (view, year, region) in enumerate(points):
+        bands[f"{view}/{year}/{region}"] = {
+            "nameplate_mw": round(float(nameplate[k].sum()), 1),
+            "low": round(float(low[k]), 1),
+            "mid": round(float(elcc[k, 0]), 1),
+            "high": round(float(high[k]), 1),
+        }
+    return {
+        "version": BANDS_VERSION,
+        "vintage": VINTAGE,
+        "scenarios": n_scenarios,
+        "seed": seed,
+        "percentiles": list(PERCENTILES),
+        "factors": [
+            {"iso": iso, "category": cat, "point": point, "low": lo, "high": hi}
+            for iso, cat, point, lo, hi in params
+        ],
+        "bands": bands,
+    }
+
+
+def write_bands(result, path=BANDS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def build_bands(table=None, years=None, n_scenarios=N_SCENARIOS, seed=SEED,
+                path=BANDS_PATH):
+    """Sweep the Operating-sheet cube and write the bands; returns the result."""
+    if table is None:
+        from eia860m_cache import load_generators
+        table = load_generators()
+    if years is None:
+        years = sorted(set(load_table(CSV_PATH).values("year", as_int=True)))
+    result = sweep(CapacityCube.from_table(table), years, n_scenarios, seed)
+    write_bands(result, path)
+    return result
+
+
+def main():
+    args = sys.argv[1:]
+    n_scenarios, seed = N_SCENARIOS, SEED
+    if "--scenarios" in args:
+        i = args.index("--scenarios")
+        n_scenarios = int(args[i + 1])
+        del args[i:i + 2]
+    if "--seed" in args:
+        i = args.index("--seed")
+        seed = int(args[i + 1])
+        del args[i:i + 2]
+    years = [int(a) for a in args] or None
+
+    start = time.perf_counter()
+    result = build_bands(years=years, n_scenarios=n_scenarios, seed=seed)
+    elapsed = time.perf_counter() - start
+
+    lo, hi = PERCENTILES
+    for key, b in result["bands"].items():
+        view, year, region = key.split("/")
+        if view != "iso":
+            continue
+        print(f"  {year} {region:<7} {b['nameplate_mw']:>9,.0f} MW nameplate  "
+              f"ELCC p{lo} {b['low']:>9,.0f}  mid {b['mid']:>9,.0f}  p{hi} {b['high']:>9,.0f}")
+    print(f"{len(result['bands'])} points × {n_scenarios} scenarios in {elapsed:.2f}s "
+          f"→ {BANDS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""Retail price cube from EIA Electric Power Monthly Tables 5.6.A / 5.6.B.
+
+Usage: python3 data/epm_retail.py [DIR] [--year Y] [--sector S]
+                                  [--ttm YYYY-MM] [--workers N]
+  DIR defaults to data/epm/; S is residential, commercial, industrial,
+  transportation or all (default).
+
+Drop every EPM Table 5.6.A (monthly) and 5.6.B (year-to-date) workbook
+you have into data/epm/, under any file name. Each workbook is located
+by its header text rather than fixed cells:
+
+  - the title names the table (A or B) and the period ("December 2025
+    and 2024", "Year-to-Date through December 2025 and 2024");
+  - the row holding "All Sectors" gives each sector's first column; the
+    row below it, when it has "<Month> <Year>" labels, the period of each
+    column (else the title's current year, then the prior year);
+  - state rows are those whose first cell is a STATE_NAMES name.
+
+Workbooks are parsed in parallel, and each result is cached under
+data/.cache/epm/ by the file's SHA-256, so adding a month only parses
+the new file. The results are assembled into (state × sector × month)
+arrays: "monthly" from 5.6.A, "ytd" (year-to-date through that month)
+from 5.6.B. Where several workbooks cover the same cell (the prior-year
+columns, revisions), the latest publication wins. The assembled cube is
+cached too, keyed by the set of file hashes.
+
+From the cube:
+  annual(year)          December YTD, the sales-weighted full-year price
+  month(YYYY-MM)        one month's price
+  trailing_12(YYYY-MM)  mean of the 12 monthly prices ending there
+                        (unweighted: the tables carry no sales)
+"""
+
+import calendar
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from mappings import STATE_NAMES
+from xlsx_reader import XlsxReader
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+EPM_DIR = os.path.join(DATA_DIR, "epm")
+CACHE_DIR = os.path.join(DATA_DIR, ".cache", "epm")
+PARSER_VERSION = 1
+
+# Sector header text -> cube sector key
+SECTOR_HEADERS = {
+    "Residential": "residential",
+    "Commercial": "commercial",
+    "Industrial": "industrial",
+    "Transportation": "transportation",
+    "All Sectors": "all",
+}
+SECTORS = list(SECTOR_HEADERS.values())
+STATES = sorted(STATE_NAMES)
+STATE_CODES = {name: code for code, name in STATE_NAMES.items()}
+
+HEADER_ROWS = 10     # title, sector and period rows are all within these
+MAX_COLUMNS = 30
+
+# Month names, full or abbreviated ("December 2025", "Dec 2025 YTD")
+_MONTHS = "|".join(rf"{m}[a-z]*\.?" for m in calendar.month_abbr[1:])
+TABLE_RE = re.compile(r"Table\s+5\.0?6\.([AB])\b", re.IGNORECASE)
+TITLE_PERIOD_RE = re.compile(rf"\b({_MONTHS})\s+(\d{{4}})\s+and\s+(\d{{4}})")
+PERIOD_RE = re.compile(rf"\b({_MONTHS})\s+(\d{{4}})")
+
+
+# ---------------------------------------------------------------------------
+# One workbook
+# ---------------------------------------------------------------------------
+
+def _month_key(month_name, year):
+    return f"{int(year):04d}-{list(calendar.month_abbr).index(month_name[:3]):02d}"
+
+
+def _price(value):
+    """Float price, or None for blanks and EIA markers ("--", "NM", "W")."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_workbook(path):
+    """Parse one EPM 5.6.A/B workbook.
+
+    Returns {"table": "A"|"B", "published": "YYYY-MM",
+    "cells": [[state, sector, "YYYY-MM", price], ...]}. Raises ValueError
+    when the title, sector row or periods cannot be found.
+    """
+    name = os.path.basename(path)
+    with XlsxReader(path) as reader:
+        sheet = reader.sheet_names[0]
+        head = [reader.row(sheet, r, MAX_COLUMNS) for r in range(1, HEADER_ROWS + 1)]
+        text = " ".join(str(v) for row in head for v in row if v is not None)
+
+        table = TABLE_RE.search(text)
+        period = TITLE_PERIOD_RE.search(text)
+        if not table or not period:
+            raise ValueError(f"{name}: no 'Table 5.6.A/B ... <Month> <Year> and <Year>' title")
+        month_name, year, prior_year = period.groups()
+
+        sector_row = next((i for i, row in enumerate(head)
+                           if any(str(v).strip() == "All Sectors" for v in row if v)), None)
+        if sector_row is None:
+            raise ValueError(f"{name}: no 'All Sectors' header in rows 1-{HEADER_ROWS}")
+        sector_cols = {
+            SECTOR_HEADERS[str(v).strip()]: c
+            for c, v in enumerate(head[sector_row]) if v and str(v).strip() in SECTOR_HEADERS
+        }
+
+        # Column -> (sector, month); period labels under the sectors if present
+        labels = head[sector_row + 1] if sector_row + 1 < len(head) else ()
+        columns = {}
+        for sector, c in sector_cols.items():
+            for offset, default_year in ((0, year), (1, prior_year)):
+                label = labels[c + offset] if c + offset < len(labels) else None
+                m = PERIOD_RE.search(str(label)) if label else None
+                columns[c + offset] = (sector, _month_key(*m.groups()) if m
+                                       else _month_key(month_name, default_year))
+        has_labels = any(PERIOD_RE.search(str(v)) for v in labels if v)
+        first_data_row = sector_row + (3 if has_labels else 2)   # head is 0-based
+
+        col_list = sorted(columns)
+        cells = []
+        for values in reader.iter_rows(sheet, [0] + col_list, min_row=first_data_row):
+            state = STATE_CODES.get(str(values[0]).strip()) if values[0] else None
+            if state is None:
+                continue
+            for c, value in zip(col_list, values[1:]):
+                price = _price(value)
+                if price is not None:
+                    sector, month = columns[c]
+                    cells.append([state, sector, month, price])
+
+    return {
+        "table": table.group(1).upper(),
+        "published": _month_key(month_name, year),
+        "cells": cells,
+    }
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_path(digest, cache_dir):
+    return os.path.join(cache_dir, "files", f"v{PARSER_VERSION}-{digest[:32]}.json")
+
+
+def _parse_to_cache(path, digest, cache_dir):
+    """Worker: parse one workbook and cache the result; returns it."""
+    try:
+        result = parse_workbook(path)
+    except ValueError as e:
+        result = {"error": str(e)}
+    out = _cache_path(digest, cache_dir)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    tmp = f"{out}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f, separators=(",", ":"))
+    os.replace(tmp, out)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Cube
+# ---------------------------------------------------------------------------
+
+def _month_range(first, last):
+    y, m = map(int, first.split("-"))
+    end = tuple(map(int, last.split("-")))
+    months = []
+    while (y, m) <= end:
+        months.append(f"{y:04d}-{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return months
+
+
+class RetailCube:
+    """(state × sector × month) retail prices, cents/kWh; NaN where absent."""
+
+    def __init__(self, months, monthly, ytd, sources=()):
+        self.months = list(months)
+        self.monthly = monthly
+        self.ytd = ytd
+        self.sources = list(sources)
+        self._month_index = {m: i for i, m in enumerate(self.months)}
+
+    @classmethod
+    def from_results(cls, results):
+        """Assemble parse_workbook results; later publications win."""
+        results = sorted(results, key=lambda r: (r["published"], r["table"]))
+        months = sorted({cell[2] for r in results for cell in r["cells"]})
+        months = _month_range(months[0], months[-1]) if months else []
+        month_index = {m: i for i, m in enumerate(months)}
+        state_index = {s: i for i, s in enumerate(STATES)}
+        sector_index = {s: i for i, s in enumerate(SECTORS)}
+        shape = (len(STATES), len(SECTORS), len(months))
+        arrays = {"A": np.full(shape, np.nan), "B": np.full(shape, np.nan)}
+        for r in results:
+            if not r["cells"]:
+                continue
+            st, se, mo, price = zip(*r["cells"])
+            arrays[r["table"]][
+                [state_index[s] for s in st],
+                [sector_index[s] for s in se],
+                [month_index[m] for m in mo],
+            ] = price
+        sources = [(r["table"], r["published"]) for r in results]
+        return cls(months, arrays["A"], arrays["B"], sources)
+
+    def _by_state(self, values):
+        return {s: float(v) for s, v in zip(STATES, values) if np.isfinite(v)}
+
+    def _column(self, array, month, sector):
+        i = self._month_index.get(month)
+        if i is None:
+            return {}
+        return self._by_state(array[:, SECTORS.index(sector), i])
+
+    def month(self, month, sector="all"):
+        """{state: price} for one month (Table 5.6.A)."""
+        return self._column(self.monthly, month, sector)
+
+    def ytd_through(self, month, sector="all"):
+        """{state: year-to-date price through ``month``} (Table 5.6.B)."""
+        return self._column(self.ytd, month, sector)
+
+    def annual(self, year, sector="all"):
+        """{state: full-year price}: the December year-to-date value."""
+        return self.ytd_through(f"{year:04d}-12", sector)
+
+    def trailing_12(self, end_month, sector="all"):
+        """{state: mean of the 12 monthly prices ending at ``end_month``}.
+
+        States missing any of the 12 months are left out.
+        """
+        end = self._month_index.get(end_month)
+        if end is None or end < 11:
+            return {}
+        window = self.monthly[:, SECTORS.index(sector), end - 11:end + 1]
+        return self._by_state(window.mean(axis=1))
+
+    def save(self, path, key):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, monthly=self.monthly, ytd=self.ytd,
+                 meta=np.array(json.dumps({"key": key, "months": self.months,
+                                           "sources": self.sources})))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, key):
+        """Cached cube, or None when missing or built from other files."""
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta["key"] != key:
+                    return None
+                return cls(meta["months"], data["monthly"], data["ytd"],
+                           [tuple(s) for s in meta["sources"]])
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+
+def workbooks(epm_dir=EPM_DIR):
+    if not os.path.isdir(epm_dir):
+        return []
+    return sorted(os.path.join(epm_dir, f) for f in os.listdir(epm_dir)
+                  if f.lower().endswith(".xlsx") and not f.startswith("~$"))
+
+
+def load_cube(epm_dir=EPM_DIR, cache_dir=CACHE_DIR, workers=None, report=None):
+    """RetailCube over every workbook in ``epm_dir``.
+
+    Only workbooks without a cached parse are read, in a process pool.
+    ``report``, if given, is called with (file name, status) per file.
+    Raises FileNotFoundError when there are no workbooks.
+    """
+    paths = workbooks(epm_dir)
+    if not paths:
+        raise FileNotFoundError(f"No EPM Table 5.6.A/B workbooks in {epm_dir}")
+    digests = [file_digest(p) for p in paths]
+    key = hashlib.sha256(f"v{PARSER_VERSION}:{','.join(sorted(digests))}".encode()).hexdigest()
+    cube_path = os.path.join(cache_dir, "cube.npz")
+    cube = RetailCube.load(cube_path, key)
+    if cube is not None:
+        return cube
+
+    results, todo = {}, []
+    for path, digest in zip(paths, digests):
+        try:
+            with open(_cache_path(digest, cache_dir), encoding="utf-8") as f:
+                results[path] = json.load(f)
+            if report:
+                report(os.path.basename(path), "cached")
+        except (FileNotFoundError, ValueError):
+            todo.append((path, digest))
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_parse_to_cache, p, d, cache_dir) for p, d in todo]
+            for (path, _digest), future in zip(todo, futures):
+                results[path] = future.result()
+                if report:
+                    report(os.path.basename(path), "parsed")
+
+    good = []
+    for path in paths:
+        r = results[path]
+        if "error" in r:
+            if report:
+                report(os.path.basename(path), f"skipped: {r['error']}")
+            continue
+        good.append(r)
+    cube = RetailCube.from_results(good)
+    cube.save(cube_path, key)
+    return cube
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def _option(args, name, default, cast=str):
+    if name not in args:
+        return default
+    i = args.index(name)
+    value = cast(args[i + 1])
+    del args[i:i + 2]
+    return value
+
+
+def main():
+    args = sys.argv[1:]
+    year = _option(args, "--year", None, int)
+    sector = _option(args, "--sector", "all")
+    ttm = _option(args, "--ttm", None)
+    workers = _option(args, "--workers", None, int)
+    epm_dir = args[0] if args else EPM_DIR
+    if sector not in SECTORS:
+        print(f"Unknown sector {sector!r}; one of {', '.join(SECTORS)}")
+        sys.exit(2)
+
+    counts = {"parsed": 0, "cached": 0}
+
+    def report(name, status):
+        if status in counts:
+            counts[status] += 1
+        else:
+            print(f"  {name}: {status}")
+
+    try:
+        cube = load_cube(epm_dir, workers=workers, report=report)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    tables = {t: sorted(p for tt, p in cube.sources if tt == t) for t in "AB"}
+    span = f"{cube.months[0]}..{cube.months[-1]}" if cube.months else "no months"
+    if counts["parsed"] or counts["cached"]:
+        print(f"Workbooks: {counts['parsed']} parsed, {counts['cached']} from cache")
+    print(f"Cube: {len(STATES)} states × {len(SECTORS)} sectors × {len(cube.months)} "
+          f"months ({span}); {len(tables['A'])} monthly, {len(tables['B'])} YTD tables")
+
+    if ttm:
+        prices, label = cube.trailing_12(ttm, sector), f"12 months to {ttm}"
+    else:
+        if year is None:
+            years = [int(p[:4]) for p in tables["B"] if p.endswith("-12")]
+            year = max(years) if years else None
+        prices = cube.annual(year, sector) if year else {}
+        label = f"{year} (December YTD)"
+    print(f"Sector {sector}, {label}: {len(prices)} states")
+    for state in sorted(prices):
+        print(f"  {state}: {prices[state]:.2f} ¢/kWh")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Extract ISO-level capacity rows from EIA-860M.
+
+Generators are assigned to ISOs by Balancing Authority Code (BA_ISO in
+mappings.py) when the workbook is loaded into the vintage warehouse
+(eia860m_warehouse.py), and rolled up there to the capacity columns of
+the `iso` rows in audit_all_data.csv, including the technology breakdown
+used in source_capacity. Retirements come from the Retired sheet of the
+same vintage. Generators with a missing or unmapped BA code are left out
+of the ISO rows and listed in one bulk report instead.
+
+Usage: python3 data/extract_iso.py [YEAR ...] [--vintage YYYY-MM]
+  Defaults to every year that has ISO rows in the CSV, and to the
+  vintage of eia860m_cache.EIA860M_PATH (loaded if it is not yet).
+"""
+
+import calendar
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from audit_table import load_table
+from eia860m_cache import EIA860M_PATH
+from eia860m_warehouse import Warehouse
+from mappings import BA_ISO, ISOS, STATE_ISO, TECH_CATEGORY
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+
+
+# ELCC category → label used in source_capacity citations
+CITATION_LABELS = {
+    "solar": "solar",
+    "battery": "battery",
+    "wind": "wind",
+    "gas": "gas",
+    "hydro": "hydro",
+    "other_firm": "other",
+}
+CATEGORIES = list(CITATION_LABELS)
+
+
+# ---------------------------------------------------------------------------
+# ISO rows
+# ---------------------------------------------------------------------------
+
+def tech_breakdown(wh, year, vintage):
+    """Nameplate MW per (ISO, ELCC category) for one year as a 2-D array."""
+    cat_index = {c: i for i, c in enumerate(CATEGORIES)}
+    sums = np.zeros((len(ISOS), len(CATEGORIES)))
+    for iso, by_tech in wh.technology_mw("iso", year, vintage).items():
+        if iso not in ISOS:
+            continue
+        for tech, mw in by_tech.items():
+            sums[ISOS.index(iso), cat_index[TECH_CATEGORY.get(tech, "other_firm")]] += mw
+    # EIA-860M MW have one decimal: drop float summation noise so the
+    # citation doesn't depend on the order the sums were taken in
+    return sums.round(1)
+
+
+def vintage_label(vintage):
+    """"Jan 2026" for warehouse vintage "2026-01"."""
+    year, month = vintage.split("-")
+    return f"{calendar.month_abbr[int(month)]} {year}"
+
+
+def source_citation(mw_by_category, vintage, max_items=4):
+    """Format the CSV source_capacity citation for one ISO-year."""
+    parts = [
+        (mw, CITATION_LABELS[cat])
+        for cat, mw in zip(CATEGORIES, mw_by_category)
+        if round(mw) > 0
+    ]
+    parts.sort(reverse=True)
+    detail = " / ".join(f"{label} {mw:,.0f}" for mw, label in parts[:max_items])
+    suffix = f" ({detail} MW)" if detail else ""
+    return f"EIA-860M {vintage_label(vintage)} vintage{suffix}"
+
+
+def iso_capacity_rows(wh, year, vintage):
+    """Capacity and retirement columns for the seven `iso` rows of one year.
+
+    Returns dict: iso -> {capacity_additions_mw, capacity_additions_elcc_mw,
+    project_count, source_capacity, retirements_mw}
+    """
+    capacity = wh.capacity("iso", year, vintage)
+    retired = wh.retirements("iso", year, vintage)
+    breakdown = tech_breakdown(wh, year, vintage)
+    return {
+        iso: {
+            "capacity_additions_mw": int(c["nameplate_mw"]),
+            "capacity_additions_elcc_mw": int(c["elcc_mw"]),
+            "project_count": c["project_count"],
+            "source_capacity": source_citation(breakdown[ISOS.index(iso)], vintage),
+            "retirements_mw": retired[iso],
+        }
+        for iso, c in capacity.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Unmapped BA report
+# ---------------------------------------------------------------------------
+
+def unmapped_ba_report(wh, vintage, years=None):
+    """Generators excluded from ISO rows, grouped by (year, BA code).
+
+    Returns a DataFrame with columns: year, ba_code, reason, generators,
+    nameplate_mw, iso_state_mw (MW located in STATE_ISO states, i.e. likely
+    a gap in BA_ISO rather than a non-ISO utility) and states.
+    """
+    sql = ("SELECT operating_year AS year, ba_code, state, nameplate_mw FROM generators "
+           "WHERE vintage = ? AND status = 'operating' AND iso = '' "
+           "AND operating_year IS NOT NULL")
+    params = [vintage]
+    if years is not None:
+        sql += f" AND operating_year IN ({', '.join('?' * len(years))})"
+        params += list(years)
+    df = pd.read_sql_query(sql, wh.db, params=params)
+    df["iso_state_mw"] = df["nameplate_mw"].where(df["state"].isin(list(STATE_ISO)), 0.0)
+
+    report = (
+        df.groupby(["year", "ba_code"], observed=True)
+        .agg(
+            generators=("nameplate_mw", "size"),
+            nameplate_mw=("nameplate_mw", "sum"),
+            iso_state_mw=("iso_state_mw", "sum"),
+            states=("state", lambda s: ",".join(sorted(set(s)))),
+        )
+        .reset_index()
+    )
+    report.insert(2, "reason", np.where(report["ba_code"] == "", "missing BA code",
+                                        "BA not in BA_ISO"))
+    return report.sort_values(["year", "nameplate_mw"], ascending=[True, False],
+                              ignore_index=True)
+
+
+def print_unmapped(report, top=10):
+    if report.empty:
+        print("\nAll generators have a mapped BA code.")
+        return
+    print("\nExcluded from ISO rows (missing or unmapped BA code):")
+    for year, group in report.groupby("year"):
+        print(f"  {year}: {int(group['generators'].sum())} generators, "
+              f"{group['nameplate_mw'].sum():,.0f} MW "
+              f"({group['iso_state_mw'].sum():,.0f} MW in ISO states)")
+        for r in group.head(top).itertuples():
+            label = r.ba_code or "(blank)"
+            print(f"    {label:<8} {r.reason:<17} {r.generators:>5} gens "
+                  f"{r.nameplate_mw:>9,.0f} MW  [{r.states}]")
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    csv_rows = {
+        (r.value("year", as_int=True), r["id"]): r
+        for r in load_table(CSV_PATH) if r["view"] == "iso"
+    }
+
+    args = sys.argv[1:]
+    vintage = None
+    if "--vintage" in args:
+        i = args.index("--vintage")
+        vintage = args[i + 1]
+        del args[i:i + 2]
+    years = [int(a) for a in args] or sorted({y for y, _ in csv_rows})
+
+    with Warehouse() as wh:
+        print("Loading EIA-860M into the vintage warehouse...")
+        loaded, _ = wh.ingest(EIA860M_PATH)
+        vintage = vintage or loaded
+        counts = dict(wh.db.execute(
+            "SELECT status, COUNT(*) FROM generators WHERE vintage = ? GROUP BY status",
+            (vintage,)))
+        print(f"  vintage {vintage}: {counts.get('operating', 0)} operating / "
+              f"{counts.get('retired', 0)} retired generators, {len(BA_ISO)} mapped BA codes")
+
+        for year in years:
+            print(f"\nISO {year}:")
+            for iso, c in iso_capacity_rows(wh, year, vintage).items():
+                row = csv_rows.get((year, iso))
+                csv_mw = row["capacity_additions_mw"] if row else "-"
+                csv_ret = row["retirements_mw"] if row else "-"
+                print(f"  {iso:<7} {c['capacity_additions_mw']:>7} MW"
+                      f" / {c['capacity_additions_elcc_mw']:>7} ELCC"
+                      f" / {c['project_count']:>5} gens"
+                      f" / {c['retirements_mw']:>6} MW retired"
+                      f"  (CSV {csv_mw} MW / {csv_ret} retired)")
+                print(f"          {c['source_capacity']}")
+
+        print_unmapped(unmapped_ba_report(wh, vintage, years))
+
+
+if __name__ == "__main__":
+    main()
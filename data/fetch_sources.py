@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""Download the declared source files into a content-addressed mirror.
+
+Usage: python3 data/fetch_sources.py [NAME ...] [--manifest PATH] [--workers N]
+                                     [--base-url URL] [--force]
+       python3 data/fetch_sources.py serve DIR [--port P]
+
+data/sources.json lists every downloadable input as {name, url, dest,
+sha256?}; dest is relative to data/ and is where extract_2025_state.py
+and the other scripts expect the file. A "{period}" in dest is filled in
+after the download with the month the file covers ("YYYY-MM", from an
+EPM table's title; see epm_retail.py), so each monthly publication
+keeps its own file next to the earlier ones. Sources are fetched
+concurrently over one pooled requests.Session:
+
+  - a source already in the mirror costs one HEAD request, sent with
+    If-None-Match / If-Modified-Since; a 304, or an unchanged ETag
+    (else Last-Modified and Content-Length), means nothing to download.
+    A server that does not allow HEAD (405) gets the GET below;
+  - otherwise it is streamed to data/.cache/mirror/partial/. An
+    interrupted download resumes from the bytes already there (Range +
+    If-Range, so a file that changed upstream restarts from zero);
+  - the result must match its Content-Length and, when the manifest
+    declares one, its sha256. It is then stored read-only as
+    data/.cache/mirror/objects/<sha256[:2]>/<sha256> and linked (or
+    copied) to dest.
+
+The validators and digest of every source are kept in
+data/.cache/mirror/state.json. When the network or the server fails, a
+source that is already mirrored is reported stale and its mirrored copy
+stays in place, so offline runs still work.
+
+--base-url replaces each URL's scheme and host, keeping its file name,
+so the whole manifest can be fetched from a local stand-in: `serve DIR`
+runs one (ETag, Last-Modified, conditional and Range requests) over the
+files in DIR.
+"""
+
+import functools
+import hashlib
+import http.server
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urljoin, urlsplit
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.path.join(DATA_DIR, "sources.json")
+MIRROR_DIR = os.path.join(DATA_DIR, ".cache", "mirror")
+
+WORKERS = 4
+TIMEOUT = 60              # seconds per connect / read
+CHUNK_SIZE = 1 << 20
+
+# HEAD responses that mean "not supported here" rather than a failure
+HEAD_UNSUPPORTED = (405, 501)
+
+
+# ---------------------------------------------------------------------------
+# Manifest and mirror state
+# ---------------------------------------------------------------------------
+
+def load_manifest(path=MANIFEST_PATH):
+    """Source entries from the manifest; raises ValueError on a bad entry."""
+    with open(path, encoding="utf-8") as f:
+        sources = json.load(f)["sources"]
+    names = set()
+    for s in sources:
+        missing = [k for k in ("name", "url", "dest") if not s.get(k)]
+        if missing:
+            raise ValueError(f"{path}: source {s.get('name', '?')} lacks {', '.join(missing)}")
+        if s["name"] in names:
+            raise ValueError(f"{path}: duplicate source name {s['name']}")
+        names.add(s["name"])
+    return sources
+
+
+def read_state(mirror_dir=MIRROR_DIR):
+    try:
+        with open(os.path.join(mirror_dir, "state.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_state(state, mirror_dir=MIRROR_DIR):
+    os.makedirs(mirror_dir, exist_ok=True)
+    path = os.path.join(mirror_dir, "state.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def object_path(digest, mirror_dir=MIRROR_DIR):
+    return os.path.join(mirror_dir, "objects", digest[:2], digest)
+
+
+def _mirrored(entry, mirror_dir):
+    """Object path of a state entry, or None when it is not on disk."""
+    if not entry or not entry.get("sha256"):
+        return None
+    path = object_path(entry["sha256"], mirror_dir)
+    return path if os.path.exists(path) else None
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def resolve_dest(source, obj):
+    """``source``'s dest relative to data/, with {period} read from ``obj``.
+
+    Raises ValueError when the file does not name its period.
+    """
+    if "{period}" not in source["dest"]:
+        return source["dest"]
+    from epm_retail import parse_workbook
+    return source["dest"].replace("{period}", parse_workbook(obj)["published"])
+
+
+def place(obj, dest):
+    """Make ``dest`` a copy of mirror object ``obj`` (hard link when possible)."""
+    if os.path.exists(dest):
+        if os.path.samefile(obj, dest):
+            return
+        if os.path.getsize(dest) == os.path.getsize(obj) and _sha256(dest) == os.path.basename(obj):
+            return
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp = dest + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(obj, tmp)
+    except OSError:
+        shutil.copyfile(obj, tmp)
+    os.replace(tmp, dest)
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+def make_session(workers=WORKERS):
+    """requests.Session with a connection pool sized for ``workers`` threads."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=("HEAD", "GET"))
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "electricity-supply-response-data fetch_sources.py"
+    return session
+
+
+def _validators(headers):
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "size": int(headers["Content-Length"]) if headers.get("Content-Length") else None,
+    }
+
+
+def _unchanged(entry, head):
+    """True when HEAD validators match the mirrored copy."""
+    if head["etag"] and entry.get("etag"):
+        return head["etag"] == entry["etag"]
+    if head["last_modified"] and entry.get("last_modified"):
+        return (head["last_modified"] == entry["last_modified"]
+                and head["size"] in (None, entry.get("size")))
+    return False
+
+
+def _download(session, url, part, expected_sha):
+    """Stream ``url`` into ``part``, resuming it when possible.
+
+    Returns (sha256, size, validators, resumed). Raises ValueError on a
+    short or corrupt body; the partial file is kept for the next try
+    unless its content is known to be wrong.
+    """
+    meta_path = part + ".json"
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        meta = {}
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = {}
+    validator = meta.get("etag") or meta.get("last_modified")
+    if offset and meta.get("url") == url and validator:
+        headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+
+    with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as r:
+        if r.status_code == 416:   # the partial file is already complete (or longer)
+            os.remove(part)
+            return _download(session, url, part, expected_sha)
+        r.raise_for_status()
+        found = _validators(r.headers)
+        resumed = r.status_code == 206
+        if resumed:
+            total = int(r.headers["Content-Range"].rsplit("/", 1)[1])
+        else:
+            offset, total = 0, found["size"]
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"url": url, "etag": found["etag"],
+                       "last_modified": found["last_modified"]}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        h = hashlib.sha256()
+        if resumed:
+            with open(part, "rb") as f:
+                for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    h.update(block)
+        with open(part, "ab" if resumed else "wb") as f:
+            for chunk in r.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                h.update(chunk)
+
+    size = os.path.getsize(part)
+    if total is not None and size != total:
+        raise ValueError(f"{url}: got {size:,} of {total:,} bytes")
+    digest = h.hexdigest()
+    if expected_sha and digest != expected_sha.lower():
+        os.remove(part)
+        os.remove(meta_path)
+        raise ValueError(f"{url}: sha256 {digest} does not match the manifest's {expected_sha}")
+    found["size"] = size
+    return digest, size, found, resumed
+
+
+def fetch_source(session, source, entry, mirror_dir=MIRROR_DIR, data_dir=DATA_DIR,
+                 force=False):
+    """Bring one source up to date; returns (status, state entry).
+
+    Status is "unchanged", "downloaded" or "resumed". Network and
+    checksum errors propagate.
+    """
+    url = source["url"]
+    obj = _mirrored(entry, mirror_dir)
+    if obj and not force and entry.get("url") == url:
+        conditional = {}
+        if entry.get("etag"):
+            conditional["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            conditional["If-Modified-Since"] = entry["last_modified"]
+        head = session.head(url, headers=conditional, allow_redirects=True, timeout=TIMEOUT)
+        if head.status_code == 304 or (head.ok and _unchanged(entry, _validators(head.headers))):
+            dest = entry.get("dest") or resolve_dest(source, obj)
+            place(obj, os.path.join(data_dir, dest))
+            return "unchanged", dict(entry, dest=dest, checked=_now())
+        if head.status_code not in HEAD_UNSUPPORTED:
+            head.raise_for_status()
+
+    partial_dir = os.path.join(mirror_dir, "partial")
+    os.makedirs(partial_dir, exist_ok=True)
+    part = os.path.join(partial_dir, source["name"] + ".part")
+    digest, size, found, resumed = _download(session, url, part, source.get("sha256"))
+
+    obj = object_path(digest, mirror_dir)
+    os.makedirs(os.path.dirname(obj), exist_ok=True)
+    if os.path.exists(obj):
+        os.remove(part)
+    else:
+        os.chmod(part, 0o444)
+        os.replace(part, obj)
+    os.remove(part + ".json")
+    dest = resolve_dest(source, obj)
+    place(obj, os.path.join(data_dir, dest))
+    return ("resumed" if resumed else "downloaded"), {
+        "url": url, "dest": dest, "etag": found["etag"],
+        "last_modified": found["last_modified"], "size": size, "sha256": digest,
+        "fetched": _now(), "checked": _now(),
+    }
+
+
+def _now():
+    return formatdate(usegmt=True)
+
+
+def _with_base(url, base_url):
+    return urljoin(base_url.rstrip("/") + "/", os.path.basename(urlsplit(url).path))
+
+
+def fetch_all(sources, mirror_dir=MIRROR_DIR, data_dir=DATA_DIR, workers=WORKERS,
+              force=False, session=None, report=None):
+    """Fetch ``sources`` concurrently; returns {name: status}.
+
+    A source that fails but is already mirrored is "stale" and keeps its
+    mirrored copy at dest; one that fails without a copy is "failed: ...".
+    ``report``, if given, is called with (source, status, entry) as each
+    finishes. The mirror state is saved after every source.
+    """
+    import requests
+
+    session = session or make_session(workers)
+    state = read_state(mirror_dir)
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(fetch_source, session, s, state.get(s["name"]),
+                        mirror_dir, data_dir, force): s
+            for s in sources
+        }
+        for future in as_completed(futures):
+            source = futures[future]
+            name, entry = source["name"], state.get(source["name"])
+            try:
+                status, entry = future.result()
+                state[name] = entry
+                write_state(state, mirror_dir)
+            except (requests.RequestException, OSError, ValueError) as e:
+                obj = _mirrored(entry, mirror_dir)
+                if obj and (entry.get("dest") or "{period}" not in source["dest"]):
+                    place(obj, os.path.join(data_dir, entry.get("dest") or source["dest"]))
+                    status = f"stale ({e})"
+                else:
+                    status = f"failed ({e})"
+            results[name] = status
+            if report:
+                report(source, status, entry)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Local stand-in server
+# ---------------------------------------------------------------------------
+
+class MirrorRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static files with ETag, conditional requests and single byte ranges."""
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            return super().send_head()
+        st = os.stat(path)
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        last_modified = self.date_time_string(int(st.st_mtime))
+        if self.headers.get("If-None-Match") == etag or (
+                "If-None-Match" not in self.headers
+                and self._not_modified_since(st.st_mtime)):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
+
+        start, end = 0, st.st_size - 1
+        ranged = self._range(st.st_size, etag, last_modified)
+        if ranged:
+            start, end = ranged
+        f = open(path, "rb")
+        f.seek(start)
+        self.send_response(206 if ranged else 200)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(end - start + 1))
+        if ranged:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{st.st_size}")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        return f
+
+    def _not_modified_since(self, mtime):
+        since = self.headers.get("If-Modified-Since")
+        try:
+            return since is not None and int(mtime) <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def _range(self, size, etag, last_modified):
+        """(start, end) of a satisfiable single-range request, else None."""
+        header = self.headers.get("Range", "")
+        if_range = self.headers.get("If-Range")
+        if not header.startswith("bytes=") or "," in header:
+            return None
+        if if_range and if_range not in (etag, last_modified):
+            return None
+        first, _, last = header[6:].partition("-")
+        if not first:
+            return None
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        return (start, end) if start <= end else None
+
+
+def serve(directory, port=8000):
+    handler = functools.partial(MirrorRequestHandler, directory=directory)
+    with http.server.ThreadingHTTPServer(("127.0.0.1", port), handler) as server:
+        print(f"Serving {directory} at http://127.0.0.1:{server.server_port}/")
+        server.serve_forever()
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def _option(args, name, default, cast=str):
+    if name not in args:
+        return default
+    i = args.index(name)
+    value = cast(args[i + 1])
+    del args[i:i + 2]
+    return value
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == "serve":
+        port = _option(args, "--port", 8000, int)
+        if len(args) != 2:
+            print(__doc__)
+            sys.exit(2)
+        serve(os.path.abspath(args[1]), port)
+        return
+
+    manifest = _option(args, "--manifest", MANIFEST_PATH)
+    workers = _option(args, "--workers", WORKERS, int)
+    base_url = _option(args, "--base-url", None)
+    force = "--force" in args
+    names = [a for a in args if not a.startswith("--")]
+
+    sources = load_manifest(manifest)
+    unknown = [n for n in names if n not in {s["name"] for s in sources}]
+    if unknown:
+        print(f"Unknown source(s): {', '.join(unknown)}; see {manifest}")
+        sys.exit(2)
+    if names:
+        sources = [s for s in sources if s["name"] in names]
+    if base_url:
+        sources = [dict(s, url=_with_base(s["url"], base_url)) for s in sources]
+
+    def report(source, status, entry):
+        size = f"{entry['size']:,} bytes, sha256 {entry['sha256'][:12]}" if entry else "not mirrored"
+        dest = entry.get("dest", source["dest"]) if entry else source["dest"]
+        print(f"  {source['name']:<18} {status:<11} {dest} ({size})")
+
+    print(f"Fetching {len(sources)} source(s) with {workers} workers...")
+    start = time.perf_counter()
+    results = fetch_all(sources, workers=workers, force=force, report=report)
+    failed = [n for n, status in results.items() if status.startswith("failed")]
+    print(f"{len(sources) - len(failed)} of {len(sources)} available in "
+          f"{time.perf_counter() - start:.2f}s → {MIRROR_DIR}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""Annual wholesale price averages from hourly / 5-minute LMP exports.
+
+Usage: python3 data/lmp_ingest.py [ISO ...] [--dir DIR] [--node NAME]
+                                  [--workers N] [--chunk-rows N]
+  Defaults to every ISO directory under data/lmp/.
+
+Layout: one directory per ISO and year holding that year's exports,
+
+    data/lmp/<ISO>/<year>/*.csv[.gz]     LMP files (hub or nodal, DA/RT)
+    data/lmp/<ISO>/<year>/load*.csv[.gz] optional hourly system load
+
+Columns are found by header name (COLUMN_ALIASES), so ISO downloads can
+be dropped in as they are. Timestamps are interval starts; offsets are
+converted to UTC, naive times are used as given. The market comes from a
+market column when there is one, else from a DA/RT token in the file
+name. --node keeps only one node (e.g. a hub); by default every node in
+the files is averaged.
+
+Files are read in fixed-size chunks (CHUNK_ROWS) and folded into
+per-hour sums for each market, so memory is bounded by the chunk size
+and the 8,784 hours of a year, not by the file size. From those sums:
+
+  simple          mean of every price record
+  time_weighted   mean over hours of the hourly mean price, so 5-minute
+                  and hourly intervals count by duration and gaps don't
+                  bias the result
+  load_weighted   hourly mean price weighted by hourly mean load (from a
+                  load column or the load files); blank without load
+
+Each (ISO, year) runs in its own worker process. Results are upserted
+into data/lmp/averages.csv together with a SHA-256 of the input files,
+so a row can be reproduced from the files that made it. The audit CSV is
+not modified: compare the averages with wholesale_price_mwh and update
+the row (and its source_price) by hand.
+"""
+
+import csv
+import hashlib
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from mappings import ISOS
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+LMP_DIR = os.path.join(DATA_DIR, "lmp")
+AVERAGES_NAME = "averages.csv"
+
+CHUNK_ROWS = 500_000
+MARKETS = ("DA", "RT")
+
+# Normalized column -> accepted headers (compared lower-cased, with
+# spaces, dashes and units stripped; see _header_key)
+COLUMN_ALIASES = {
+    "timestamp": [
+        "timestamp", "datetime", "time", "interval_start", "intervalstart",
+        "interval_start_local", "interval_start_utc", "intervalstarttime_gmt",
+        "interval_beginning", "hour_beginning", "local_datetime_he",
+        "delivery_interval_start", "datetime_beginning_utc",
+        "datetime_beginning_ept",
+    ],
+    "node": [
+        "node", "node_id", "pnode", "pnode_name", "pnode_id", "location",
+        "settlement_point", "settlementpoint", "settlement_point_name",
+        "hub", "zone", "name", "bus",
+    ],
+    "lmp": [
+        "lmp", "price", "lmp_mwh", "total_lmp", "total_lmp_da", "total_lmp_rt",
+        "settlement_point_price", "settlementpointprice", "lbmp", "mw_lmp",
+    ],
+    "market": ["market", "market_run_id", "market_type", "market_run"],
+    "load": ["load", "load_mw", "system_load", "demand", "demand_mw", "mw"],
+}
+
+OUTPUT_COLUMNS = [
+    "iso", "year", "market", "node", "records", "hours",
+    "simple_avg_mwh", "time_weighted_avg_mwh", "load_weighted_avg_mwh",
+    "files", "inputs_sha256",
+]
+
+# A timestamp that carries its UTC offset: "...T05:00:00Z", "... 00:00-05:00"
+_OFFSET_RE = re.compile(r"(Z|[+-]\d\d:?\d\d)$")
+
+_DA_RE = re.compile(r"(^|[^a-z])(da|dam|day[-_ ]?ahead)([^a-z]|$)")
+_RT_RE = re.compile(r"(^|[^a-z])(rt|rtm|rtd|real[-_ ]?time)([^a-z]|$)")
+
+
+# ---------------------------------------------------------------------------
+# File discovery and headers
+# ---------------------------------------------------------------------------
+
+def _header_key(header):
+    """'Settlement Point Price ($/MWh)' -> 'settlement_point_price'."""
+    text = re.sub(r"\(.*?\)", "", str(header)).strip().lower()
+    return re.sub(r"[\s\-/]+", "_", text).strip("_")
+
+
+def resolve_columns(headers):
+    """{normalized column: file header} for the headers present."""
+    keys = {_header_key(h): h for h in headers}
+    found = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in keys:
+                found[name] = keys[alias]
+                break
+    return found
+
+
+def timestamp_clock(path, sample_rows=100):
+    """"utc" when a file's hours come out of hour_index() in UTC, else "local".
+
+    That is a UTC/GMT timestamp column, or values that carry an offset;
+    naive times in any other column are taken as the ISO's local clock.
+    None when the file has no recognizable timestamp column.
+    """
+    columns = resolve_columns(pd.read_csv(path, nrows=0).columns)
+    if "timestamp" not in columns:
+        return None
+    header = columns["timestamp"]
+    if any(tz in _header_key(header) for tz in ("utc", "gmt")):
+        return "utc"
+    sample = pd.read_csv(path, usecols=[header], nrows=sample_rows, dtype=str,
+                         keep_default_na=False)[header]
+    return "utc" if any(_OFFSET_RE.search(v.strip()) for v in sample) else "local"
+
+
+def market_of(value):
+    """'DA', 'RT' or None for a market column value or file name."""
+    text = str(value).lower()
+    if _DA_RE.search(text):
+        return "DA"
+    if _RT_RE.search(text):
+        return "RT"
+    return None
+
+
+def _is_data_file(name):
+    return name.endswith((".csv", ".csv.gz")) and name != AVERAGES_NAME
+
+
+def discover(lmp_dir=LMP_DIR, isos=None):
+    """[(iso, year, lmp_files, load_files)] under lmp_dir, in ISOS order."""
+    if not os.path.isdir(lmp_dir):
+        return []
+    present = [d for d in os.listdir(lmp_dir) if os.path.isdir(os.path.join(lmp_dir, d))]
+    order = {iso: i for i, iso in enumerate(ISOS)}
+    tasks = []
+    for iso in sorted(present, key=lambda d: (order.get(d, len(order)), d)):
+        if isos and iso not in isos:
+            continue
+        iso_dir = os.path.join(lmp_dir, iso)
+        for year in sorted(d for d in os.listdir(iso_dir) if d.isdigit()):
+            year_dir = os.path.join(iso_dir, year)
+            files = sorted(f for f in os.listdir(year_dir) if _is_data_file(f))
+            load = [os.path.join(year_dir, f) for f in files if f.lower().startswith("load")]
+            lmp = [os.path.join(year_dir, f) for f in files if not f.lower().startswith("load")]
+            if lmp:
+                tasks.append((iso, int(year), lmp, load))
+    return tasks
+
+
+def inputs_digest(paths):
+    """SHA-256 over the names and bytes of the input files, in order."""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(os.path.basename(path).encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Streaming accumulation
+# ---------------------------------------------------------------------------
+
+def hours_in_year(year):
+    start = np.datetime64(f"{year}-01-01T00", "h")
+    return start, int((np.datetime64(f"{year + 1}-01-01T00", "h") - start).astype(np.int64))
+
+
+def hour_index(timestamps, year):
+    """Hour of year for each timestamp; -1 when unparseable or outside the year."""
+    start, n_hours = hours_in_year(year)
+    ts = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True, errors="coerce"))
+    hours = ts.tz_convert(None).values.astype("datetime64[h]")
+    idx = (hours - start).astype(np.int64)
+    idx[(idx < 0) | (idx >= n_hours) | np.isnat(hours)] = -1
+    return idx
+
+
+class HourlySums:
+    """Per-hour sums and counts for one year, folded in chunk by chunk."""
+
+    def __init__(self, year):
+        _start, self.n_hours = hours_in_year(year)
+        self.total = np.zeros(self.n_hours)
+        self.count = np.zeros(self.n_hours)
+        self.records = 0
+        self.value_sum = 0.0
+
+    def add(self, hours, values):
+        ok = (hours >= 0) & np.isfinite(values)
+        hours, values = hours[ok], values[ok]
+        self.total += np.bincount(hours, weights=values, minlength=self.n_hours)
+        self.count += np.bincount(hours, minlength=self.n_hours)
+        self.records += len(values)
+        self.value_sum += float(values.sum())
+
+    def hourly_mean(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.count > 0, self.total / self.count, np.nan)
+
+
+def _read_chunks(path, columns, chunk_rows):
+    """Chunked reader; numeric columns are left to the C parser."""
+    text = {columns[k]: str for k in ("timestamp", "node", "market") if k in columns}
+    return pd.read_csv(path, usecols=list(columns.values()), chunksize=chunk_rows,
+                       dtype=text, keep_default_na=False)
+
+
+def _numbers(column):
+    """Float array; blanks and non-numeric cells become NaN."""
+    return pd.to_numeric(column, errors="coerce").to_numpy(float)
+
+
+def _markets(column):
+    """market_of() per row, evaluated once per distinct value."""
+    codes, uniques = pd.factorize(column)
+    lookup = np.array([market_of(u) for u in uniques] + [None], dtype=object)
+    return lookup[codes]
+
+
+def price_chunks(path, year, chunk_rows=CHUNK_ROWS, node=None):
+    """Stream one LMP file as (hours, prices, markets, nodes, load) per chunk.
+
+    hours is the hour of ``year`` (-1 outside it), markets holds "DA",
+    "RT" or None per row, nodes the node names (None without a node
+    column) and load the load column (None without one). Raises
+    ValueError when the file's columns cannot be resolved.
+    """
+    columns = resolve_columns(pd.read_csv(path, nrows=0).columns)
+    wanted = {k: columns[k] for k in ("timestamp", "lmp", "node", "market", "load")
+              if k in columns}
+    file_market = market_of(os.path.basename(path))
+    if "timestamp" not in wanted or "lmp" not in wanted or (
+            "market" not in wanted and file_market is None):
+        raise ValueError(f"{os.path.basename(path)}: no recognizable "
+                         f"timestamp/price/market columns")
+
+    for chunk in _read_chunks(path, wanted, chunk_rows):
+        if node is not None and "node" in wanted:
+            chunk = chunk[chunk[wanted["node"]] == node]
+        if chunk.empty:
+            continue
+        if "market" in wanted:
+            markets = _markets(chunk[wanted["market"]])
+        else:
+            markets = np.full(len(chunk), file_market, dtype=object)
+        yield (
+            hour_index(chunk[wanted["timestamp"]], year),
+            _numbers(chunk[wanted["lmp"]]),
+            markets,
+            chunk[wanted["node"]].to_numpy() if "node" in wanted else None,
+            _numbers(chunk[wanted["load"]]) if "load" in wanted else None,
+        )
+
+
+def load_chunks(path, year, chunk_rows=CHUNK_ROWS):
+    """Stream one load file as (hours, load) per chunk; ValueError as above."""
+    columns = resolve_columns(pd.read_csv(path, nrows=0).columns)
+    if "timestamp" not in columns or "load" not in columns:
+        raise ValueError(f"{os.path.basename(path)}: no recognizable "
+                         f"timestamp/load columns")
+    wanted = {k: columns[k] for k in ("timestamp", "load")}
+    for chunk in _read_chunks(path, wanted, chunk_rows):
+        yield hour_index(chunk[wanted["timestamp"]], year), _numbers(chunk[wanted["load"]])
+
+
+def load_weighted_mean(hourly_price, hourly_load):
+    """Price weighted by load over hours with both; None without load."""
+    ok = np.isfinite(hourly_price) & np.isfinite(hourly_load) & (hourly_load > 0)
+    if not ok.any():
+        return None
+    return float((hourly_price[ok] * hourly_load[ok]).sum() / hourly_load[ok].sum())
+
+
+def ingest_iso_year(iso, year, lmp_files, load_files, node=None,
+                    chunk_rows=CHUNK_ROWS):
+    """Stream one ISO-year's files.
+
+    Returns (rows, skipped): one OUTPUT_COLUMNS dict per market found,
+    and messages for files whose columns could not be resolved.
+    """
+    prices = {m: HourlySums(year) for m in MARKETS}
+    load = HourlySums(year)
+    skipped = []
+
+    for path in lmp_files:
+        try:
+            for hours, values, markets, _nodes, load_mw in price_chunks(
+                    path, year, chunk_rows, node):
+                for market in MARKETS:
+                    mask = markets == market
+                    if mask.any():
+                        prices[market].add(hours[mask], values[mask])
+                if load_mw is not None:
+                    load.add(hours, load_mw)
+        except ValueError as e:
+            skipped.append(str(e))
+
+    for path in load_files:
+        try:
+            for hours, load_mw in load_chunks(path, year, chunk_rows):
+                load.add(hours, load_mw)
+        except ValueError as e:
+            skipped.append(str(e))
+
+    digest = inputs_digest(list(lmp_files) + list(load_files))
+    hourly_load = load.hourly_mean()
+    rows = []
+    for market in MARKETS:
+        sums = prices[market]
+        if sums.records == 0:
+            continue
+        hourly = sums.hourly_mean()
+        has_price = np.isfinite(hourly)
+        load_avg = load_weighted_mean(hourly, hourly_load)
+        rows.append({
+            "iso": iso,
+            "year": year,
+            "market": market,
+            "node": node or "*",
+            "records": sums.records,
+            "hours": int(has_price.sum()),
+            "simple_avg_mwh": _fmt(sums.value_sum / sums.records),
+            "time_weighted_avg_mwh": _fmt(float(hourly[has_price].mean())),
+            "load_weighted_avg_mwh": _fmt(load_avg),
+            "files": len(lmp_files) + len(load_files),
+            "inputs_sha256": digest,
+        })
+    return rows, skipped
+
+
+def _fmt(value):
+    return "" if value is None else f"{value:.2f}"
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def read_averages(path):
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    except FileNotFoundError:
+        return []
+
+
+def write_averages(rows, path):
+    """Upsert rows keyed by (iso, year, market, node); atomic rewrite."""
+    def key(r):
+        return (r["iso"], str(r["year"]), r["market"], r["node"])
+
+    merged = {key(r): r for r in read_averages(path)}
+    merged.update((key(r), r) for r in rows)
+    order = {iso: i for i, iso in enumerate(ISOS)}
+    ordered = sorted(merged.values(), key=lambda r: (
+        order.get(r["iso"], len(order)), r["iso"], str(r["year"]), r["market"], r["node"]))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(ordered)
+    os.replace(tmp, path)
+
+
+def csv_prices():
+    """{(iso, year): wholesale_price_mwh text} from the audit CSV."""
+    from audit_table import load_table
+    try:
+        table = load_table(CSV_PATH)
+    except FileNotFoundError:
+        return {}
+    return {
+        (r["id"], r.value("year", as_int=True)): r["wholesale_price_mwh"]
+        for r in table if r["view"] == "iso"
+    }
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def _option(args, name, default, cast=str):
+    if name not in args:
+        return default
+    i = args.index(name)
+    value = cast(args[i + 1])
+    del args[i:i + 2]
+    return value
+
+
+def main():
+    args = sys.argv[1:]
+    lmp_dir = _option(args, "--dir", LMP_DIR)
+    node = _option(args, "--node", None)
+    workers = _option(args, "--workers", None, int)
+    chunk_rows = _option(args, "--chunk-rows", CHUNK_ROWS, int)
+    isos = set(args) or None
+
+    tasks = discover(lmp_dir, isos)
+    if not tasks:
+        print(f"No LMP files under {lmp_dir} (expected <ISO>/<year>/*.csv)")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(ingest_iso_year, iso, year, lmp, load, node, chunk_rows)
+            for iso, year, lmp, load in tasks
+        ]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+
+    rows = [row for task_rows, _skipped in results for row in task_rows]
+    out_path = os.path.join(lmp_dir, AVERAGES_NAME)
+    write_averages(rows, out_path)
+
+    audit = csv_prices()
+    print(f"  {'iso':<7}{'year':<6}{'mkt':<4}{'records':>12}{'hours':>7}"
+          f"{'simple':>9}{'time-wt':>9}{'load-wt':>9}   CSV")
+    for row in rows:
+        print(f"  {row['iso']:<7}{row['year']:<6}{row['market']:<4}"
+              f"{row['records']:>12,}{row['hours']:>7}"
+              f"{row['simple_avg_mwh']:>9}{row['time_weighted_avg_mwh']:>9}"
+              f"{row['load_weighted_avg_mwh'] or '-':>9}"
+              f"   {audit.get((row['iso'], row['year']), '-')}")
+    for (iso, year, _lmp, _load), (_rows, skipped) in zip(tasks, results):
+        for message in skipped:
+            print(f"  WARNING: {iso} {year}: {message}; skipped")
+    records = sum(r["records"] for r in rows)
+    print(f"{len(tasks)} ISO-years, {records:,} price records in {elapsed:.1f}s → {out_path}")
+
+
+if __name__ == "__main__":
+    main()
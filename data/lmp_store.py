@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""Memory-mapped store of hourly LMP and load series.
+
+Usage: python3 data/lmp_store.py build [ISO ...] [--dir DIR] [--rebuild]
+       python3 data/lmp_store.py report [ISO ...] [--year Y] [--market DA|RT]
+                                        [--node NAME] [--load-weighted]
+
+build  reads the raw exports under data/lmp/<ISO>/<year>/ (the layout
+       and column detection of lmp_ingest.py) into hourly arrays. Only
+       ISO-years that are not in the store yet, or whose input files
+       changed, are parsed; existing years are never rewritten.
+report prints annual, on-peak and percentile prices for every ISO-year
+       in the store next to the CSV's wholesale_price_mwh and
+       price_2023_mwh. Nothing is parsed: the arrays are memory-mapped.
+
+Layout under data/.cache/lmp_store/ (one segment per ISO-year):
+
+    index.json                 {"version", "segments": {"PJM/2024": {...}}}
+    <ISO>/<year>/meta.json     markets, nodes, first hour, clock, records,
+                               input hash
+    <ISO>/<year>/prices.npy    float32 (market, node, hour), hourly mean LMP
+    <ISO>/<year>/load.npy      float32 (hour,), hourly mean system load
+
+Hours without data are NaN. The hour axis is the one lmp_ingest.py
+reads: UTC when the files' timestamps are (a UTC/GMT column or values
+with an offset), else the ISO's local clock; meta.json records which
+("utc", "local" or "mixed"). On-peak hours are classified on the local
+prevailing hour (ISO_TIMEZONES), so a UTC axis is converted first. A
+segment is written to a temporary
+directory and renamed into place before index.json is updated, so an
+interrupted build leaves the store as it was.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from lmp_ingest import (
+    CHUNK_ROWS, LMP_DIR, MARKETS, HourlySums, discover, hours_in_year,
+    inputs_digest, load_chunks, load_weighted_mean, price_chunks, timestamp_clock,
+)
+from mappings import ISOS
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+STORE_DIR = os.path.join(DATA_DIR, ".cache", "lmp_store")
+STORE_VERSION = 2
+
+# Node label for files without a node column
+ALL_NODES = "*"
+
+# On-peak: weekdays, hours beginning 07:00-22:00 (HE8-HE23), local time
+PEAK_HOURS = range(7, 23)
+
+# Clock each ISO's on-peak hours are defined on (MISO settles on EST
+# all year)
+ISO_TIMEZONES = {
+    "ERCOT": "America/Chicago",
+    "SPP": "America/Chicago",
+    "MISO": "Etc/GMT+5",
+    "CAISO": "America/Los_Angeles",
+    "PJM": "America/New_York",
+    "NYISO": "America/New_York",
+    "ISO-NE": "America/New_York",
+}
+PERCENTILES = (5, 50, 95)
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+class NodeSums:
+    """Per-(market, node, hour) sums, grown as new nodes appear.
+
+    Totals are float32 and counts uint16 (12 five-minute intervals an
+    hour, times a few overlapping files), the dtype the segment stores.
+    A chunk is folded in with one np.bincount over the distinct
+    node * n_hours + hour cells it touches.
+    """
+
+    def __init__(self, year):
+        _start, self.n_hours = hours_in_year(year)
+        self.nodes = {}
+        self.total = np.zeros((len(MARKETS), 16, self.n_hours), dtype=np.float32)
+        self.count = np.zeros(self.total.shape, dtype=np.uint16)
+        self.records = dict.fromkeys(MARKETS, 0)
+
+    def node_ids(self, names):
+        codes, uniques = pd.factorize(names)
+        ids = np.array([self.nodes.setdefault(n, len(self.nodes)) for n in uniques],
+                       dtype=np.intp)
+        if len(self.nodes) > self.total.shape[1]:
+            size = max(len(self.nodes), 2 * self.total.shape[1])
+            self.total = self._grown(self.total, size)
+            self.count = self._grown(self.count, size)
+        return ids[codes]
+
+    @staticmethod
+    def _grown(array, size):
+        grown = np.zeros((array.shape[0], size, array.shape[2]), dtype=array.dtype)
+        grown[:, :array.shape[1]] = array
+        return grown
+
+    def add(self, market, node_ids, hours, values):
+        ok = (hours >= 0) & np.isfinite(values)
+        cells, inverse = np.unique(node_ids[ok] * self.n_hours + hours[ok],
+                                   return_inverse=True)
+        m = MARKETS.index(market)
+        total = self.total[m].reshape(-1)  # views of the (node, hour) block
+        count = self.count[m].reshape(-1)
+        total[cells] += np.bincount(inverse, weights=values[ok]).astype(np.float32)
+        count[cells] += np.bincount(inverse).astype(np.uint16)
+        self.records[market] += len(inverse)
+
+
+def build_segment(iso, year, lmp_files, load_files, out_dir, chunk_rows=CHUNK_ROWS):
+    """Parse one ISO-year into a segment directory; returns its meta dict."""
+    sums = NodeSums(year)
+    load = HourlySums(year)
+    skipped = []
+    clocks = set()
+    for path in lmp_files:
+        try:
+            clocks.add(timestamp_clock(path))
+            for hours, values, markets, nodes, load_mw in price_chunks(path, year, chunk_rows):
+                if nodes is None:
+                    nodes = np.full(len(hours), ALL_NODES, dtype=object)
+                ids = sums.node_ids(nodes)
+                for market in MARKETS:
+                    mask = markets == market
+                    if mask.any():
+                        sums.add(market, ids[mask], hours[mask], values[mask])
+                if load_mw is not None:
+                    load.add(hours, load_mw)
+        except ValueError as e:
+            skipped.append(str(e))
+    for path in load_files:
+        try:
+            for hours, load_mw in load_chunks(path, year, chunk_rows):
+                load.add(hours, load_mw)
+        except ValueError as e:
+            skipped.append(str(e))
+
+    markets = [m for m in MARKETS if sums.records[m]]
+    m_idx = [MARKETS.index(m) for m in markets]
+    n_nodes = len(sums.nodes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prices = sums.total[m_idx, :n_nodes] / sums.count[m_idx, :n_nodes]
+    clocks.discard(None)
+
+    start, n_hours = hours_in_year(year)
+    meta = {
+        "iso": iso,
+        "year": year,
+        "start": str(start),
+        "hours": n_hours,
+        "clock": clocks.pop() if len(clocks) == 1 else "mixed" if clocks else "local",
+        "markets": markets,
+        "nodes": list(sums.nodes),
+        "records": {m: sums.records[m] for m in markets},
+        "load_hours": int((load.count > 0).sum()),
+        "files": [os.path.basename(p) for p in list(lmp_files) + list(load_files)],
+        "inputs_sha256": inputs_digest(list(lmp_files) + list(load_files)),
+        "skipped": skipped,
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "prices.npy"), prices)
+    np.save(os.path.join(out_dir, "load.npy"), load.hourly_mean().astype(np.float32))
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    return meta
+
+
+def _build_into_store(root, iso, year, lmp_files, load_files, chunk_rows):
+    """Worker: build a segment in a temp dir and move it into place."""
+    iso_dir = os.path.join(root, iso)
+    os.makedirs(iso_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=iso_dir, prefix=f".{year}-")
+    try:
+        meta = build_segment(iso, year, lmp_files, load_files, tmp, chunk_rows)
+        final = os.path.join(iso_dir, str(year))
+        if os.path.exists(final):
+            old = final + ".old"
+            os.replace(final, old)
+            os.replace(tmp, final)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, final)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return meta
+
+
+def _summary(meta):
+    return {k: meta[k] for k in ("start", "hours", "clock", "markets", "records",
+                                 "load_hours", "inputs_sha256")} | {
+        "nodes": len(meta["nodes"])}
+
+
+def build(lmp_dir=LMP_DIR, root=STORE_DIR, isos=None, rebuild=False,
+          chunk_rows=CHUNK_ROWS, workers=None):
+    """Add new or changed ISO-years to the store.
+
+    Returns [(key, status, skipped)]: status is "added", "rebuilt" or
+    "unchanged"; skipped lists files whose columns were not recognized.
+    """
+    index = read_index(root)
+    todo, statuses = [], []
+    for iso, year, lmp, load in discover(lmp_dir, isos):
+        key = f"{iso}/{year}"
+        prev = index["segments"].get(key)
+        if prev and not rebuild and prev["inputs_sha256"] == inputs_digest(lmp + load):
+            statuses.append((key, "unchanged", []))
+            continue
+        todo.append((key, iso, year, lmp, load, "rebuilt" if prev else "added"))
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_build_into_store, root, iso, year, lmp, load, chunk_rows)
+                for _key, iso, year, lmp, load, _status in todo
+            ]
+            for (key, *_rest, status), future in zip(todo, futures):
+                meta = future.result()
+                index["segments"][key] = _summary(meta)
+                statuses.append((key, status, meta["skipped"]))
+        write_index(root, index)
+    return statuses
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+def read_index(root=STORE_DIR):
+    try:
+        with open(os.path.join(root, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"version": STORE_VERSION, "segments": {}}
+    if index.get("version") != STORE_VERSION:
+        return {"version": STORE_VERSION, "segments": {}}
+    return index
+
+
+def write_index(root, index):
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, "index.json")
+    index["segments"] = dict(sorted(index["segments"].items(), key=lambda kv: _order(kv[0])))
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def _order(key):
+    iso, year = key.split("/")
+    return (ISOS.index(iso) if iso in ISOS else len(ISOS), iso, int(year))
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+class Segment:
+    """One ISO-year of the store; arrays are memory-mapped on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.markets = self.meta["markets"]
+        self.nodes = self.meta["nodes"]
+        self._node_index = {n: i for i, n in enumerate(self.nodes)}
+        self._prices = self._load = None
+
+    @property
+    def prices(self):
+        """(market, node, hour) float32 memmap."""
+        if self._prices is None:
+            self._prices = np.load(os.path.join(self.path, "prices.npy"), mmap_mode="r")
+        return self._prices
+
+    @property
+    def load(self):
+        if self._load is None:
+            self._load = np.load(os.path.join(self.path, "load.npy"), mmap_mode="r")
+        return self._load
+
+    def hours(self):
+        """datetime64[h] of every hour in the segment."""
+        start = np.datetime64(self.meta["start"], "h")
+        return start + np.arange(self.meta["hours"])
+
+    def local_hours(self):
+        """hours() on the ISO's local clock (ISO_TIMEZONES), for peak_mask.
+
+        A "local" or "mixed" axis is returned as it is.
+        """
+        hours = self.hours()
+        zone = ISO_TIMEZONES.get(self.meta["iso"])
+        if self.meta.get("clock") != "utc" or zone is None:
+            return hours
+        local = pd.DatetimeIndex(hours).tz_localize("UTC").tz_convert(zone).tz_localize(None)
+        return local.values.astype("datetime64[h]")
+
+    def hourly(self, market, node=None):
+        """Hourly price for one node, or the mean over all nodes (float64)."""
+        block = self.prices[self.markets.index(market)]
+        if node is not None:
+            return np.asarray(block[self._node_index[node]], dtype=np.float64)
+        if block.shape[0] == 1:
+            return np.asarray(block[0], dtype=np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # hours no node has
+            return np.nanmean(block, axis=0, dtype=np.float64)
+
+
+class LmpStore:
+    """Read side of the store: {"ISO/year": Segment} from index.json."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.index = read_index(root)
+        self._segments = {}
+
+    def keys(self):
+        return list(self.index["segments"])
+
+    def segment(self, iso, year):
+        key = f"{iso}/{year}"
+        if key not in self.index["segments"]:
+            return None
+        if key not in self._segments:
+            self._segments[key] = Segment(os.path.join(self.root, iso, str(year)))
+        return self._segments[key]
+
+
+def peak_mask(hours):
+    """On-peak hours: weekdays, PEAK_HOURS; ``hours`` on the local clock."""
+    days = hours.astype("datetime64[D]")
+    weekday = (days.view(np.int64) + 3) % 7      # 1970-01-01 was a Thursday
+    hour = (hours - days).astype(np.int64)
+    return (weekday < 5) & np.isin(hour, PEAK_HOURS)
+
+
+def price_stats(segment, market, node=None, load_weighted=False):
+    """Annual mean, on-peak mean and PERCENTILES of the hourly price."""
+    hourly = segment.hourly(market, node)
+    ok = np.isfinite(hourly)
+    if not ok.any():
+        return None
+    mean = (load_weighted_mean(hourly, np.asarray(segment.load, dtype=np.float64))
+            if load_weighted else float(hourly[ok].mean()))
+    peak = ok & peak_mask(segment.local_hours())
+    return {
+        "hours": int(ok.sum()),
+        "mean": mean,
+        "peak_mean": float(hourly[peak].mean()) if peak.any() else None,
+        "percentiles": dict(zip(PERCENTILES, np.percentile(hourly[ok], PERCENTILES).tolist())),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def _option(args, name, default, cast=str):
+    if name not in args:
+        return default
+    i = args.index(name)
+    value = cast(args[i + 1])
+    del args[i:i + 2]
+    return value
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+def report(store, isos=None, year=None, market="DA", node=None, load_weighted=False):
+    from audit_table import load_table
+    csv_rows = {(r["id"], r.value("year", as_int=True)): r
+                for r in load_table(CSV_PATH) if r["view"] == "iso"}
+
+    lo, mid, hi = PERCENTILES
+    print(f"  {'iso':<7}{'year':<6}{'hours':>6}{'mean':>9}{'on-peak':>9}"
+          f"{f'p{lo}':>8}{f'p{mid}':>8}{f'p{hi}':>8}   CSV wholesale / price_2023")
+    for key in store.keys():
+        iso, seg_year = key.split("/")
+        seg_year = int(seg_year)
+        if (isos and iso not in isos) or (year and seg_year != year):
+            continue
+        segment = store.segment(iso, seg_year)
+        if market not in segment.markets or (node and node not in segment.nodes):
+            continue
+        stats = price_stats(segment, market, node, load_weighted)
+        if stats is None:
+            continue
+        p = stats["percentiles"]
+        row = csv_rows.get((iso, seg_year))
+        wholesale = row["wholesale_price_mwh"] if row else ""
+        # price_2023_mwh lives on the 2024 rows
+        next_row = csv_rows.get((iso, 2024)) if seg_year == 2023 else None
+        price_2023 = next_row["price_2023_mwh"] if next_row else ""
+        print(f"  {iso:<7}{seg_year:<6}{stats['hours']:>6}{_fmt(stats['mean']):>9}"
+              f"{_fmt(stats['peak_mean']):>9}{p[lo]:>8.2f}{p[mid]:>8.2f}{p[hi]:>8.2f}"
+              f"   {wholesale or '-'} / {price_2023 or '-'}")
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("build", "report"):
+        print(__doc__)
+        sys.exit(2)
+    command = args.pop(0)
+    lmp_dir = _option(args, "--dir", LMP_DIR)
+    year = _option(args, "--year", None, int)
+    market = _option(args, "--market", "DA").upper()
+    node = _option(args, "--node", None)
+    rebuild = "--rebuild" in args
+    load_weighted = "--load-weighted" in args
+    isos = {a for a in args if not a.startswith("--")} or None
+
+    if command == "build":
+        start = time.perf_counter()
+        statuses = build(lmp_dir, isos=isos, rebuild=rebuild)
+        for key, status, skipped in statuses:
+            print(f"  {key:<12} {status}")
+            for message in skipped:
+                print(f"    WARNING: {message}; skipped")
+        if not statuses:
+            print(f"No LMP files under {lmp_dir} (expected <ISO>/<year>/*.csv)")
+        print(f"Store: {STORE_DIR} ({time.perf_counter() - start:.1f}s)")
+    else:
+        store = LmpStore()
+        if not store.keys():
+            print("Store is empty; run `python3 data/lmp_store.py build` first")
+            sys.exit(1)
+        start = time.perf_counter()
+        report(store, isos, year, market, node, load_weighted)
+        print(f"{market}{' ' + node if node else ''}"
+              f"{', load-weighted' if load_weighted else ''} "
+              f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
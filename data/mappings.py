@@ -0,0 +1,136 @@
+"""Reference mappings shared by the EIA extraction scripts.
+
+State → ISO, Balancing Authority → ISO, EIA-860M technology → ELCC
+category, the ELCC factors themselves, and EIA state names. See DATA_SOURCES.md
+("Reference Tables") for sources.
+"""
+
+# ---------------------------------------------------------------------------
+# 32 states → parent ISO mapping
+# ---------------------------------------------------------------------------
+
+STATE_ISO = {
+    "TX": "ERCOT",
+    "OK": "SPP", "KS": "SPP", "NE": "SPP", "NM": "SPP",
+    "IL": "MISO", "IN": "MISO", "MN": "MISO", "MI": "MISO",
+    "IA": "MISO", "WI": "MISO", "LA": "MISO", "MS": "MISO",
+    "MO": "MISO", "AR": "MISO", "KY": "MISO",
+    "CA": "CAISO",
+    "VA": "PJM", "PA": "PJM", "OH": "PJM", "NJ": "PJM",
+    "MD": "PJM", "WV": "PJM", "NC": "PJM", "DE": "PJM",
+    "NY": "NYISO",
+    "MA": "ISO-NE", "CT": "ISO-NE", "ME": "ISO-NE",
+    "NH": "ISO-NE", "VT": "ISO-NE", "RI": "ISO-NE",
+}
+
+ISOS = ["ERCOT", "SPP", "MISO", "CAISO", "PJM", "NYISO", "ISO-NE"]
+
+# ---------------------------------------------------------------------------
+# State names as EIA tables print them (50 states + DC)
+# ---------------------------------------------------------------------------
+
+STATE_NAMES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas",
+    "CA": "California", "CO": "Colorado", "CT": "Connecticut",
+    "DE": "Delaware", "DC": "District of Columbia", "FL": "Florida",
+    "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois",
+    "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky",
+    "LA": "Louisiana", "ME": "Maine", "MD": "Maryland",
+    "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana",
+    "NE": "Nebraska", "NV": "Nevada", "NH": "New Hampshire",
+    "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio",
+    "OK": "Oklahoma", "OR": "Oregon", "PA": "Pennsylvania",
+    "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota",
+    "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont",
+    "VA": "Virginia", "WA": "Washington", "WV": "West Virginia",
+    "WI": "Wisconsin", "WY": "Wyoming",
+}
+
+# ---------------------------------------------------------------------------
+# Balancing Authority Code → ISO (EIA-930 BA list)
+# ---------------------------------------------------------------------------
+
+BA_ISO = {
+    "ERCO": "ERCOT",
+    "SWPP": "SPP",
+    "MISO": "MISO", "EEI": "MISO", "LGEE": "MISO", "ALTW": "MISO",
+    "AMIL": "MISO", "AMMO": "MISO", "CONS": "MISO", "CWEP": "MISO",
+    "DECO": "MISO", "GRE": "MISO", "MDU": "MISO", "MEC": "MISO",
+    "MIUP": "MISO", "MP": "MISO", "NSB": "MISO", "OTP": "MISO",
+    "SMP": "MISO", "WEC": "MISO", "WPS": "MISO", "NIPS": "MISO",
+    "IPL": "MISO", "SIPC": "MISO", "CWLP": "MISO",
+    "CISO": "CAISO",
+    "PJM": "PJM", "AEP": "PJM", "AP": "PJM", "ATSI": "PJM", "CE": "PJM",
+    "DAY": "PJM", "DEOK": "PJM", "DOM": "PJM", "DPL": "PJM", "DUK": "PJM",
+    "EKPC": "PJM", "JC": "PJM", "ME": "PJM", "OVEC": "PJM", "PE": "PJM",
+    "PEP": "PJM", "PL": "PJM", "PN": "PJM", "PS": "PJM", "RECO": "PJM",
+    "NYIS": "NYISO",
+    "ISNE": "ISO-NE",
+}
+
+
+def normalize_ba(label):
+    """Canonical BA code: EIA-860M cells carry stray whitespace and case."""
+    return str(label).strip().upper() if label is not None else ""
+
+
+# ---------------------------------------------------------------------------
+# ELCC factors by technology category
+# ---------------------------------------------------------------------------
+
+# Generic ELCC factors
+ELCC_GENERIC = {
+    "gas": 0.95,
+    "battery": 0.85,
+    "solar": 0.325,   # midpoint of 30-35%
+    "wind": 0.20,     # midpoint of 15-25%
+    "other_firm": 0.80,
+    "hydro": 0.50,
+}
+
+# ISO-specific overrides
+ELCC_OVERRIDES = {
+    "SPP":   {"battery": 0.90, "wind": 0.225},
+    "CAISO": {"battery": 0.875},  # midpoint of 85-90%
+    "MISO":  {"solar": 0.50},
+}
+
+# Published ranges behind the point factors above, as (low, high); see
+# DATA_SOURCES.md. Factors without a range are fixed in every scenario
+# (elcc_scenarios.py).
+ELCC_GENERIC_RANGES = {
+    "gas": (0.95, 1.00),
+    "battery": (0.85, 0.90),
+    "solar": (0.30, 0.35),
+    "wind": (0.15, 0.25),
+}
+
+ELCC_OVERRIDE_RANGES = {
+    "SPP":   {"wind": (0.20, 0.25)},
+    "CAISO": {"battery": (0.85, 0.90)},
+}
+
+# Map EIA-860M Technology strings to ELCC categories
+TECH_CATEGORY = {
+    "Solar Photovoltaic": "solar",
+    "Batteries": "battery",
+    "Onshore Wind Turbine": "wind",
+    "Natural Gas Fired Combustion Turbine": "gas",
+    "Natural Gas Fired Combined Cycle": "gas",
+    "Natural Gas Internal Combustion Engine": "gas",
+    "Petroleum Liquids": "gas",  # treat as firm dispatchable
+    "Wood/Wood Waste Biomass": "other_firm",
+    "Landfill Gas": "other_firm",
+    "Conventional Hydroelectric": "hydro",
+    "All Other": "other_firm",
+}
+
+
+def get_elcc_factor(tech_category, iso):
+    """Get ELCC factor for a technology category within an ISO."""
+    overrides = ELCC_OVERRIDES.get(iso, {})
+    if tech_category in overrides:
+        return overrides[tech_category]
+    return ELCC_GENERIC.get(tech_category, 0.50)
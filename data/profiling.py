@@ -0,0 +1,183 @@
+"""Per-stage timing, throughput and memory instrumentation for the data scripts.
+
+Scripts call ``start(script)`` at the top of main(); it does nothing
+unless ``--profile`` is on the command line. Code then marks stages with
+
+    with phase("parse sheets") as rec:
+        ...
+        rec["rows"] = n
+        wrote(rec, path)
+
+Phases nest (sub-phases are reported as "stage/sub-phase") and are free
+when profiling is off, so library modules can mark their own internals.
+For every phase the report records wall time, rows and rows/s, peak
+traced memory (tracemalloc) and bytes written. ``finish()`` prints a
+summary and writes data/.cache/profile/<script>.json.
+
+tracemalloc hooks every allocation, so allocation-heavy stages run
+several times slower under --profile; compare profiled runs with each
+other, not with plain runs.
+
+--cprofile additionally runs cProfile around each top-level stage and
+dumps the one with the longest wall time to <script>.prof (timings in the
+report are inflated by the profiler's overhead when it is on).
+"""
+
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR = os.path.join(DATA_DIR, ".cache", "profile")
+
+_active = None
+
+
+class Profiler:
+    """Collects phase records for one script run."""
+
+    def __init__(self, script, use_cprofile=False):
+        self.script = script
+        self.use_cprofile = use_cprofile
+        self.records = []
+        self._stack = []       # open records, outermost first
+        self._profiles = {}    # top-level phase name -> cProfile.Profile
+        self._start = time.perf_counter()
+        tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name, rows=None):
+        parent = self._stack[-1] if self._stack else None
+        path = f"{parent['name']}/{name}" if parent else name
+        rec = {"name": path, "depth": len(self._stack), "rows": rows, "bytes": 0}
+        self.records.append(rec)
+
+        # tracemalloc keeps a single peak: fold the parent's peak so far into
+        # its record before resetting it for the child
+        if parent is not None:
+            parent["_peak"] = max(parent["_peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        rec["_peak"] = 0
+
+        profile = None
+        if self.use_cprofile and parent is None:
+            profile = self._profiles[path] = cProfile.Profile()
+            profile.enable()
+
+        self._stack.append(rec)
+        start = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["wall_s"] = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+            self._stack.pop()
+            rec["_peak"] = max(rec["_peak"], tracemalloc.get_traced_memory()[1])
+            if parent is not None:
+                parent["_peak"] = max(parent["_peak"], rec["_peak"])
+                parent["bytes"] += rec["bytes"]
+
+    def report(self):
+        phases = []
+        for rec in self.records:
+            wall = rec.get("wall_s", 0.0)
+            rows = rec["rows"]
+            phases.append({
+                "name": rec["name"],
+                "depth": rec["depth"],
+                "wall_s": round(wall, 6),
+                "rows": rows,
+                "rows_per_s": round(rows / wall, 1) if rows and wall > 0 else None,
+                "peak_mem_bytes": rec["_peak"],
+                "bytes_written": rec["bytes"],
+            })
+        return {
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "total_wall_s": round(time.perf_counter() - self._start, 6),
+            "peak_mem_bytes": max(
+                (p["peak_mem_bytes"] for p in phases if p["depth"] == 0), default=0),
+            "phases": phases,
+        }
+
+    def hottest(self):
+        top = [r for r in self.records if r["depth"] == 0 and "wall_s" in r]
+        return max(top, key=lambda r: r["wall_s"])["name"] if top else None
+
+
+def start(script, argv=None):
+    """Enable profiling for this run if --profile is given; returns the Profiler."""
+    global _active
+    argv = sys.argv[1:] if argv is None else argv
+    if "--profile" not in argv:
+        return None
+    _active = Profiler(script, use_cprofile="--cprofile" in argv)
+    return _active
+
+
+@contextmanager
+def phase(name, rows=None):
+    """Mark a stage or sub-phase; a no-op record when profiling is off."""
+    if _active is None:
+        yield {"rows": rows, "bytes": 0}
+        return
+    with _active.phase(name, rows) as rec:
+        yield rec
+
+
+def wrote(rec, path):
+    """Add the size of a file just written to a phase record."""
+    try:
+        rec["bytes"] += os.path.getsize(path)
+    except OSError:
+        pass
+
+
+def _fmt_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def finish(out_dir=PROFILE_DIR):
+    """Print the summary and write the JSON report; returns its path."""
+    global _active
+    prof, _active = _active, None
+    if prof is None:
+        return None
+
+    report = prof.report()
+    tracemalloc.stop()
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{prof.script}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    print(f"\nProfile ({prof.script}, {report['total_wall_s']:.3f} s total):")
+    print(f"  {'phase':<40}{'wall s':>9}{'rows':>10}{'rows/s':>12}{'peak mem':>11}{'written':>11}")
+    for p in report["phases"]:
+        label = "  " * p["depth"] + p["name"].rsplit("/", 1)[-1]
+        rows = f"{p['rows']:,}" if p["rows"] is not None else "-"
+        rate = f"{p['rows_per_s']:,.0f}" if p["rows_per_s"] is not None else "-"
+        written = _fmt_bytes(p["bytes_written"]) if p["bytes_written"] else "-"
+        print(f"  {label:<40}{p['wall_s']:>9.3f}{rows:>10}{rate:>12}"
+              f"{_fmt_bytes(p['peak_mem_bytes']):>11}{written:>11}")
+    print(f"  report: {path}")
+
+    hottest = prof.hottest()
+    if prof.use_cprofile and hottest in prof._profiles:
+        prof_path = os.path.join(out_dir, f"{prof.script}.prof")
+        prof._profiles[hottest].dump_stats(prof_path)
+        print(f"  cProfile of hottest stage '{hottest}': {prof_path}")
+    return path
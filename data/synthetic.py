@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic inputs for benchmarking the data pipeline.
+
+Usage: python3 data/synthetic.py workbook N OUT.xlsx [--seed S]
+       python3 data/synthetic.py csv N OUT.csv [--seed S]
+       python3 data/synthetic.py lmp N OUT_DIR [--seed S]
+       python3 data/synthetic.py epm N OUT_DIR [--seed S]
+
+workbook  EIA-860M-shaped .xlsx with Operating (N generators), Retired
+          (N/5) and Planned (N/10) sheets: two title rows, headers on
+          row 3, the real sheet's column names. Written as streamed XML
+          with inline strings, so a 1M-generator workbook takes seconds
+          and constant memory (openpyxl would need minutes and GBs).
+csv       audit_all_data.csv-shaped file with N rows across iso/state
+          views and ten years; values fall inside the validation rules.
+lmp       LMP exports for every ISO in lmp_ingest.py's layout
+          (OUT_DIR/<ISO>/2024/): hourly DA and 5-minute RT prices for
+          enough nodes to reach ~N rows per file, and hourly load.
+epm       EPM Table 5.6.A and 5.6.B workbooks for the N months ending
+          December 2025, laid out like EIA's (title, sector and period
+          header rows, "--" for withheld cells).
+
+Same N and seed always produce byte-identical files (benchmark.py checks
+outputs against golden digests).
+"""
+
+import calendar
+import csv
+import math
+import os
+import random
+import sys
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from mappings import BA_ISO, ISOS, STATE_ISO, STATE_NAMES, TECH_CATEGORY
+
+# Operating-sheet headers, in EIA-860M order
+OPERATING_HEADERS = [
+    "Entity ID", "Entity Name", "Plant ID", "Plant Name", "Plant State",
+    "County", "Balancing Authority Code", "Sector", "Generator ID",
+    "Unit Code", "Nameplate Capacity (MW)", "Net Summer Capacity (MW)",
+    "Net Winter Capacity (MW)", "Technology", "Energy Source Code",
+    "Prime Mover Code", "Operating Month", "Operating Year",
+    "Planned Retirement Month", "Planned Retirement Year", "Status",
+    "Latitude", "Longitude",
+]
+RETIRED_HEADERS = [
+    "Retirement Month" if h == "Operating Month" else
+    "Retirement Year" if h == "Operating Year" else h
+    for h in OPERATING_HEADERS
+]
+PLANNED_HEADERS = [
+    "Planned Operation Month" if h == "Operating Month" else
+    "Planned Operation Year" if h == "Operating Year" else h
+    for h in OPERATING_HEADERS
+]
+
+# 50 states + DC; non-ISO states get their own (unmapped) BA codes
+ALL_STATES = sorted(set(STATE_ISO) | {
+    "AK", "AL", "AZ", "CO", "DC", "FL", "GA", "HI", "ID", "MT", "ND", "NV",
+    "OR", "SC", "SD", "TN", "UT", "WA", "WY",
+})
+OTHER_BAS = ["SOCO", "FPL", "TVA", "BPAT", "PACE", "AZPS", "PSCO", "NEVP"]
+TECHNOLOGIES = list(TECH_CATEGORY) + ["Nuclear", "Geothermal"]
+TECH_WEIGHTS = [30, 20, 15, 5, 5, 4, 1, 2, 2, 3, 3, 1, 1][:len(TECHNOLOGIES)]
+YEARS = list(range(2016, 2026))
+
+
+def _bas_by_iso():
+    out = {}
+    for ba, iso in BA_ISO.items():
+        out.setdefault(iso, []).append(ba)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Workbook
+# ---------------------------------------------------------------------------
+
+def _col_letter(i):
+    s = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def _cell(ref, value):
+    if value is None or value == "":
+        return ""
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    return f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _info(name):
+    """ZipInfo with a fixed timestamp so output bytes are reproducible."""
+    info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def _write_sheet(zf, part, rows):
+    """Stream rows (lists of values) into a worksheet part."""
+    with zf.open(_info(part), "w", force_zip64=True) as f:
+        f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>")
+        letters = [_col_letter(i) for i in range(len(OPERATING_HEADERS))]
+        buf = []
+        for r, values in enumerate(rows, 1):
+            cells = "".join(_cell(f"{letters[c]}{r}", v) for c, v in enumerate(values))
+            buf.append(f'<row r="{r}">{cells}</row>')
+            if len(buf) >= 2000:
+                f.write("".join(buf).encode("utf-8"))
+                buf.clear()
+        f.write("".join(buf).encode("utf-8"))
+        f.write(b"</sheetData></worksheet>")
+
+
+def generator_rows(rng, n, headers, year_range):
+    """Title rows, header row, then ``n`` generator rows."""
+    bas = _bas_by_iso()
+    yield ["U.S. Energy Information Administration, Form EIA-860M (synthetic)"]
+    yield ["Synthetic generator inventory for benchmarking"]
+    yield headers
+    for i in range(n):
+        state = rng.choice(ALL_STATES)
+        iso = STATE_ISO.get(state)
+        if iso and rng.random() < 0.9:
+            ba = rng.choice(bas[iso])
+        else:
+            ba = rng.choice(OTHER_BAS) if rng.random() < 0.95 else None
+        tech = rng.choices(TECHNOLOGIES, TECH_WEIGHTS)[0]
+        mw = round(rng.lognormvariate(3.0, 1.3), 1)
+        plant = 10000 + i // 3
+        yield [
+            1000 + i // 50, f"Entity {i // 50}", plant, f"Plant {plant}", state,
+            "County", ba, "IPP Non-CHP", f"G{i % 3 + 1}", None, mw,
+            round(mw * 0.95, 1), round(mw * 0.97, 1), tech, "SUN", "PV",
+            rng.randint(1, 12), rng.randint(*year_range), None, None, "OP",
+            round(rng.uniform(25, 49), 4), round(rng.uniform(-124, -67), 4),
+        ]
+
+
+def write_workbook(path, n, seed=0):
+    """Write an EIA-860M-shaped workbook with Operating/Retired/Planned sheets."""
+    rng = random.Random(seed)
+    _write_xlsx(path, [
+        ("Operating", generator_rows(rng, n, OPERATING_HEADERS, (YEARS[0], YEARS[-1]))),
+        ("Retired", generator_rows(rng, n // 5, RETIRED_HEADERS, (YEARS[0], YEARS[-1]))),
+        ("Planned", generator_rows(rng, n // 10, PLANNED_HEADERS,
+                                   (YEARS[-1] + 1, YEARS[-1] + 5))),
+    ])
+
+
+def _write_xlsx(path, sheets):
+    """Write (sheet name, rows) pairs as a minimal .xlsx; rows stream in order."""
+    ns = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    rel_ns = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+    pkg_rel = "http://schemas.openxmlformats.org/package/2006/relationships"
+    doc_rel = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+    tmp = path + ".tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType='
+            f'"application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, len(sheets) + 1)
+        )
+        zf.writestr(_info("[Content_Types].xml"),
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                    '<Default Extension="xml" ContentType="application/xml"/>'
+                    '<Override PartName="/xl/workbook.xml" ContentType='
+                    '"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                    f"{overrides}</Types>")
+        zf.writestr(_info("_rels/.rels"),
+                    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    f'<Relationships xmlns="{pkg_rel}">'
+                    f'<Relationship Id="rId1" Type="{doc_rel}/officeDocument" Target="xl/workbook.xml"/>'
+                    f"</Relationships>")
+        zf.writestr(_info("xl/workbook.xml"),
+                    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    f"<workbook {ns} {rel_ns}><sheets>"
+                    + "".join(f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>'
+                              for i, (name, _rows) in enumerate(sheets, 1))
+                    + "</sheets></workbook>")
+        zf.writestr(_info("xl/_rels/workbook.xml.rels"),
+                    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    f'<Relationships xmlns="{pkg_rel}">'
+                    + "".join(f'<Relationship Id="rId{i}" Type="{doc_rel}/worksheet" '
+                              f'Target="worksheets/sheet{i}.xml"/>'
+                              for i in range(1, len(sheets) + 1))
+                    + "</Relationships>")
+        for i, (_name, rows) in enumerate(sheets, 1):
+            _write_sheet(zf, f"xl/worksheets/sheet{i}.xml", rows)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# EPM retail price tables
+# ---------------------------------------------------------------------------
+
+EPM_SECTORS = ["Residential", "Commercial", "Industrial", "Transportation", "All Sectors"]
+EPM_LAST_MONTH = (2025, 12)
+
+
+def _epm_prices(seed, months):
+    """{(state, year, month): [price per EPM_SECTORS sector]}, cents/kWh."""
+    rng = random.Random(seed)
+    out = {}
+    for state in sorted(STATE_NAMES):
+        base = [rng.uniform(10, 30), rng.uniform(8, 24), rng.uniform(5, 16), rng.uniform(8, 20)]
+        for i, (year, month) in enumerate(months):
+            season = 1 + 0.06 * math.cos((month - 7) / 6 * math.pi) + 0.003 * i
+            sectors = [round(b * season * rng.uniform(0.97, 1.03), 2) for b in base]
+            # Transportation is withheld ("--") for a few states
+            if state < "D":
+                sectors[3] = None
+            sectors.append(round((sectors[0] * 0.4 + sectors[1] * 0.35 + sectors[2] * 0.25), 2))
+            out[state, year, month] = sectors
+    return out
+
+
+def epm_rows(table, year, month, prices):
+    """EPM Table 5.6.A (monthly) or 5.6.B (year-to-date) rows for one month."""
+    abbr = calendar.month_abbr[month]
+    name = calendar.month_name[month]
+    if table == "A":
+        title = f"{name} {year} and {year - 1}"
+        periods = [f"{name} {year}", f"{name} {year - 1}"]
+    else:
+        title = f"Year-to-Date through {name} {year} and {year - 1}"
+        periods = [f"{abbr} {year} YTD", f"{abbr} {year - 1} YTD"]
+    yield [f"Table 5.6.{table}. Average Price of Electricity to Ultimate Customers by "
+           f"End-Use Sector, by State, {title} (Cents per Kilowatthour)"]
+    yield []
+    yield [None] + [h for sector in EPM_SECTORS for h in (sector, None)]
+    yield ["Census Division and State"] + periods * len(EPM_SECTORS)
+
+    def value(state, y, sector):
+        if table == "A":
+            return prices[state, y, month][sector]
+        ytd = [prices[state, y, m][sector] for m in range(1, month + 1)]
+        return None if None in ytd else round(sum(ytd) / len(ytd), 2)
+
+    yield ["New England"] + [None] * (2 * len(EPM_SECTORS))
+    for state in sorted(STATE_NAMES, key=STATE_NAMES.get):
+        row = [STATE_NAMES[state]]
+        for sector in range(len(EPM_SECTORS)):
+            row += [value(state, y, sector) for y in (year, year - 1)]
+        yield [v if v is not None else "--" for v in row]
+    yield ["U.S. Total"] + [12.5] * (2 * len(EPM_SECTORS))
+
+
+def write_epm_workbooks(out_dir, n, seed=0):
+    """Table 5.6.A and 5.6.B workbooks for the ``n`` months ending Dec 2025."""
+    last = EPM_LAST_MONTH[0] * 12 + EPM_LAST_MONTH[1] - 1   # months since year 0
+    published = [(y, m + 1) for y, m in (divmod(last - k, 12) for k in reversed(range(n)))]
+    # Prior-year columns and YTD averages reach back to January of the
+    # year before the first publication
+    first = (published[0][0] - 1) * 12
+    months = [(y, m + 1) for y, m in (divmod(k, 12) for k in range(first, last + 1))]
+    prices = _epm_prices(seed, months)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for year, month in published:
+        for table in "AB":
+            path = os.path.join(out_dir, f"epm_table_5_6_{table.lower()}_{year}_{month:02d}.xlsx")
+            _write_xlsx(path, [(f"Table 5.6.{table}", epm_rows(table, year, month, prices))])
+            paths.append(path)
+    return paths
+
+
+# ---------------------------------------------------------------------------
+# Audit CSV
+# ---------------------------------------------------------------------------
+
+def audit_rows(n, seed=0):
+    """``n`` audit CSV row dicts: ISO rows first, then state-like regions."""
+    from audit_store import CSV_COLUMNS
+
+    rng = random.Random(seed)
+    n_years = len(YEARS)
+    n_iso = min(n, len(ISOS) * n_years)
+    # ids beyond the real states are synthetic sub-regions of a state
+    ids_per_year = max(1, -(-(n - n_iso) // n_years))
+    region_ids = [
+        ALL_STATES[i] if i < len(ALL_STATES) else f"{ALL_STATES[i % len(ALL_STATES)]}-{i:06d}"
+        for i in range(ids_per_year)
+    ]
+
+    keys = [("iso", y, iso) for y in YEARS for iso in ISOS][:n_iso]
+    keys += [("state", y, r) for y in YEARS for r in region_ids][:n - n_iso]
+
+    for view, year, region in keys:
+        wholesale = round(rng.uniform(20, 60), 2)
+        cap = rng.randint(0, 15000)
+        elcc = int(cap * rng.uniform(0.2, 0.9))
+        iso = region if view == "iso" else STATE_ISO.get(region.split("-")[0], "")
+        row = dict.fromkeys(CSV_COLUMNS, "")
+        row.update({
+            "view": view,
+            "year": str(year),
+            "id": region,
+            "name": f"{region} synthetic",
+            "region": iso or "Other",
+            "is_estimate": "True" if year == YEARS[-1] else "False",
+            "color_group": rng.choice(["functional", "intermediate", "broken"]),
+            "confidence": rng.choice(["high", "medium", "estimated"]),
+            "wholesale_price_mwh": str(wholesale),
+            "all_in_price_mwh": str(round(wholesale + rng.uniform(0, 12), 2)),
+            "retail_price_cents_kwh": str(round(rng.uniform(8, 28), 2)) if view == "state" else "",
+            "capacity_additions_mw": str(cap),
+            "capacity_additions_elcc_mw": str(elcc),
+            "project_count": str(rng.randint(0, 200)),
+            "peak_demand_gw": str(round(rng.uniform(1, 150), 1)),
+            "queue_completion_pct": str(round(rng.uniform(5, 45), 1)),
+            "queue_cohort": "2018–2020",
+            "avg_queue_duration_months": str(rng.randint(24, 72)),
+            "qualitative_note": f"Synthetic note for {region} {year}.",
+            "source_price": "Synthetic",
+            "source_capacity": "Synthetic EIA-860M",
+            "source_peak": "Synthetic",
+            "source_queue": "Synthetic",
+            "retirements_mw": str(rng.randint(0, 3000)),
+        })
+        yield row
+
+
+def write_audit_csv(path, n, seed=0):
+    from audit_store import CSV_COLUMNS
+
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(audit_rows(n, seed))
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# LMP exports
+# ---------------------------------------------------------------------------
+
+LMP_YEAR = 2024
+
+
+def _lmp_frame(rng, base, stamps, nodes, market):
+    """Prices for every (node, interval): base + daily shape + noise."""
+    hour = stamps.hour.to_numpy() + stamps.minute.to_numpy() / 60
+    day = stamps.dayofyear.to_numpy()
+    shape = base * (1 + 0.25 * np.sin((hour - 8) / 24 * 2 * np.pi)
+                    + 0.15 * np.cos(day / 366 * 2 * np.pi))
+    n = len(stamps)
+    return pd.DataFrame({
+        "Interval Start": np.tile(stamps.strftime("%Y-%m-%d %H:%M"), len(nodes)),
+        "Node": np.repeat(nodes, n),
+        "Market": market,
+        "LMP ($/MWh)": np.round(np.tile(shape, len(nodes))
+                                + rng.normal(0, base * 0.2, n * len(nodes)), 2),
+    })
+
+
+def write_lmp_exports(out_dir, n, seed=0):
+    """da_lmp.csv, rt_lmp.csv and load.csv per ISO; returns the file paths."""
+    rng = np.random.default_rng(seed)
+    hourly = pd.date_range(f"{LMP_YEAR}-01-01", f"{LMP_YEAR + 1}-01-01",
+                           freq="h", inclusive="left")
+    five_min = pd.date_range(f"{LMP_YEAR}-01-01", f"{LMP_YEAR + 1}-01-01",
+                             freq="5min", inclusive="left")
+    paths = []
+    for i, iso in enumerate(ISOS):
+        year_dir = os.path.join(out_dir, iso, str(LMP_YEAR))
+        os.makedirs(year_dir, exist_ok=True)
+        base = 25 + 4 * i
+        for name, stamps, market in (("da_lmp.csv", hourly, "DAM"),
+                                     ("rt_lmp.csv", five_min, "RTM")):
+            nodes = [f"{iso}_N{k:04d}" for k in range(max(1, n // len(stamps)))]
+            path = os.path.join(year_dir, name)
+            _lmp_frame(rng, base, stamps, nodes, market).to_csv(path + ".tmp", index=False)
+            os.replace(path + ".tmp", path)
+            paths.append(path)
+        load = 20_000 * (1 + i) * (1 + 0.3 * np.sin((hourly.hour.to_numpy() - 10) / 24
+                                                    * 2 * np.pi))
+        path = os.path.join(year_dir, "load.csv")
+        pd.DataFrame({
+            "Interval Start": hourly.strftime("%Y-%m-%d %H:%M"),
+            "Load (MW)": np.round(load + rng.normal(0, 500, len(hourly)), 1),
+        }).to_csv(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    args = sys.argv[1:]
+    seed = 0
+    if "--seed" in args:
+        i = args.index("--seed")
+        seed = int(args[i + 1])
+        del args[i:i + 2]
+    if len(args) != 3 or args[0] not in ("workbook", "csv", "lmp", "epm"):
+        print(__doc__)
+        sys.exit(2)
+    kind, n, out = args[0], int(args[1]), args[2]
+    if kind == "workbook":
+        write_workbook(out, n, seed)
+    elif kind == "lmp":
+        write_lmp_exports(out, n, seed)
+    elif kind == "epm":
+        write_epm_workbooks(out, n, seed)
+    else:
+        write_audit_csv(out, n, seed)
+    print(f"Wrote {n:,}-row synthetic {kind} to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Bootstrap uncertainty for the price-vs-capacity relationship.
+
+Usage: python3 data/trend_uncertainty.py [--resamples N] [--seed S]
+
+For every (view, year) and every chart toggle combination (price metric
+× capacity weighting × capacity basis, see chart_metrics.py) this fits
+the least-squares slope of price on capacity per GW of peak and the
+Pearson correlation, then bootstraps both:
+
+  - each resample draws the group's points with replacement;
+  - points flagged as estimates (is_estimate, or confidence "estimated")
+    also have their price and capacity scaled by an independent uniform
+    draw within ±ESTIMATE_BOUNDS, once per point per resample.
+
+All resamples of a group are evaluated at once as (resamples × points)
+NumPy arrays, so 10,000 resamples of every group take a fraction of a
+second. Output: public/data/trend_uncertainty.json, with the point
+estimate and QUANTILES of slope and r per group and combination, read by
+src/lib/trendUncertainty.ts.
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from audit_table import load_table
+from chart_metrics import (
+    BASES, COMBINATIONS, PRICE_METRICS, WEIGHTINGS, capacity_terms, combination_key,
+    y_values,
+)
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+OUT_PATH = os.path.join(os.path.dirname(DATA_DIR), "public", "data", "trend_uncertainty.json")
+UNCERTAINTY_VERSION = 1
+
+N_RESAMPLES = 10_000
+SEED = 0
+QUANTILES = (2.5, 25, 50, 75, 97.5)
+
+# Relative half-width of the uniform perturbation applied to estimated
+# values. The CSV gives no numeric error bars for its estimates, so these
+# are declared here; widen them if an estimate proves further off.
+ESTIMATE_BOUNDS = {"price": 0.10, "capacity": 0.15}
+
+
+def estimated_mask(table):
+    """Rows whose price and capacity are estimates."""
+    is_estimate = np.array(table.text("is_estimate")) == "True"
+    confidence = np.array(table.text("confidence")) == "estimated"
+    return is_estimate | confidence
+
+
+def _centered(values):
+    """Deviations from the mean along the last axis, and their sum of squares."""
+    d = values - values.mean(axis=-1, keepdims=True)
+    return d, (d * d).sum(axis=-1)
+
+
+def fit_stats(x, y):
+    """Least-squares slope and Pearson r from _centered() x and y."""
+    (dx, sxx), (dy, syy) = x, y
+    sxy = (dx * dy).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return sxy / sxx, sxy / np.sqrt(sxx * syy)
+
+
+def _summary(point, samples, digits):
+    finite = samples[np.isfinite(samples)]
+    quantiles = np.percentile(finite, QUANTILES) if finite.size else [np.nan] * len(QUANTILES)
+    as_json = lambda v: None if not np.isfinite(v) else round(float(v), digits)  # noqa: E731
+    return {"point": as_json(point), "quantiles": [as_json(q) for q in quantiles]}
+
+
+def bootstrap_group(table, view, n_resamples, rng):
+    """Slope and r summaries for every combination of one (view, year)."""
+    est = estimated_mask(table)
+    terms = {w: capacity_terms(table, w) for w in WEIGHTINGS}
+    prices = {p: y_values(table, p, view) for p in PRICE_METRICS}
+
+    # Points the chart can place under every combination
+    valid = terms["nameplate"][2] > 0
+    for gross, retirements, _peak in terms.values():
+        valid &= np.isfinite(gross)
+    for y in prices.values():
+        valid &= np.isfinite(y)
+    keep = np.flatnonzero(valid)
+    n = len(keep)
+
+    idx = rng.integers(0, n, size=(n_resamples, n)) if n else np.zeros((n_resamples, 0), int)
+    est = est[keep].astype(float)
+    price_noise = 1 + ESTIMATE_BOUNDS["price"] * est * rng.uniform(-1, 1, (n_resamples, n))
+    cap_noise = 1 + ESTIMATE_BOUNDS["capacity"] * est * rng.uniform(-1, 1, (n_resamples, n))
+    price_noise = np.take_along_axis(price_noise, idx, axis=1)
+    cap_noise = np.take_along_axis(cap_noise, idx, axis=1)
+
+    # Resampled x and y are shared across combinations: centre each once
+    xs, x_points = {}, {}
+    for weighting, (gross, retirements, peak) in terms.items():
+        gross, retirements, peak = gross[keep], retirements[keep], peak[keep]
+        for basis in BASES:
+            net = retirements if basis == "net" else np.zeros(n)
+            x_points[weighting, basis] = _centered((gross - net) / peak)
+            xs[weighting, basis] = _centered((gross[idx] * cap_noise - net[idx]) / peak[idx])
+    ys, y_points = {}, {}
+    for price_metric, y in prices.items():
+        y = y[keep]
+        y_points[price_metric] = _centered(y)
+        ys[price_metric] = _centered(y[idx] * price_noise)
+
+    fits = {}
+    for price_metric, weighting, basis in COMBINATIONS:
+        point_slope, point_r = fit_stats(x_points[weighting, basis], y_points[price_metric])
+        slopes, rs = fit_stats(xs[weighting, basis], ys[price_metric])
+        fits[combination_key(price_metric, weighting, basis)] = {
+            "slope": _summary(point_slope, slopes, 4),
+            "r": _summary(point_r, rs, 3),
+        }
+    return {"n": n, "estimated": int(est.sum()), "fits": fits}
+
+
+def bootstrap(table, n_resamples=N_RESAMPLES, seed=SEED):
+    """Bootstrap every (view, year) group; returns the output dict."""
+    rng = np.random.default_rng(seed)
+    views = np.array(table.text("view"), dtype=object)
+    years = np.array(table.values("year", as_int=True), dtype=object)
+    groups = {}
+    for view, year in sorted(set(zip(views.tolist(), years.tolist()))):
+        rows = np.flatnonzero((views == view) & (years == year))
+        groups[f"{view}/{year}"] = bootstrap_group(table.take(rows), view, n_resamples, rng)
+    return {
+        "version": UNCERTAINTY_VERSION,
+        "resamples": n_resamples,
+        "seed": seed,
+        "quantiles": list(QUANTILES),
+        "estimate_bounds": ESTIMATE_BOUNDS,
+        "groups": groups,
+    }
+
+
+def write_uncertainty(result, path=OUT_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def main():
+    args = sys.argv[1:]
+    n_resamples, seed = N_RESAMPLES, SEED
+    if "--resamples" in args:
+        n_resamples = int(args[args.index("--resamples") + 1])
+    if "--seed" in args:
+        seed = int(args[args.index("--seed") + 1])
+
+    table = load_table(CSV_PATH)
+    start = time.perf_counter()
+    result = bootstrap(table, n_resamples, seed)
+    elapsed = time.perf_counter() - start
+    write_uncertainty(result)
+
+    lo, hi = QUANTILES[0], QUANTILES[-1]
+    print(f"{'group':<12}{'n':>4}{'est':>5}  all-in/nameplate/gross: "
+          f"slope [p{lo:g}, p{hi:g}]        r [p{lo:g}, p{hi:g}]")
+    for key, g in result["groups"].items():
+        fit = g["fits"]["all_in/nameplate/gross"]
+        s, r = fit["slope"], fit["r"]
+        print(f"{key:<12}{g['n']:>4}{g['estimated']:>5}  "
+              f"{s['point']} [{s['quantiles'][0]}, {s['quantiles'][-1]}]   "
+              f"{r['point']} [{r['quantiles'][0]}, {r['quantiles'][-1]}]")
+    print(f"{len(result['groups'])} groups × {n_resamples:,} resamples in {elapsed:.2f}s → {OUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,35 @@
 #!/usr/bin/env python3
 """Validate audit_all_data.csv for structural and logical errors.
 
-Usage: python3 data/validate_data.py
+Usage: python3 data/validate_data.py [--incremental] [--profile [--cprofile]]
+
+Checks are declared in RULES and run column-wise over the typed columns
+of the shared loader (audit_table.py): each rule is a vectorized mask
+over NumPy arrays. Adding a check means adding a RULES
+entry, not editing a loop.
+
+--incremental reuses the results for rows whose content is unchanged
+since the last validated revision (data/.cache/validate_state.json) and
+only evaluates new or edited rows; it saves the current results there
+for the next --incremental run. Table-wide checks (header, duplicate
+keys, state ↔ ISO consistency from consistency.py) always run.
 """
 
-import csv
+import hashlib
+import json
 import os
 import sys
 
+import numpy as np
+
+import profiling
+from audit_table import NUMERIC_FIELDS, load_table
+from consistency import check_consistency
+from profiling import phase
+
 DATA_DIR = os.path.dirname(os.path.abspath(__file__))
 CSV_PATH = os.path.join(DATA_DIR, "audit_all_data.csv")
+STATE_PATH = os.path.join(DATA_DIR, ".cache", "validate_state.json")
 
 REQUIRED_COLUMNS = [
     "view", "year", "id", "name", "region", "is_estimate", "color_group",
@@ -28,30 +48,208 @@ VALID_COLOR_GROUPS = {"functional", "intermediate", "broken"}
 VALID_VIEWS = {"iso", "state"}
 VALID_IS_ESTIMATE = {"True", "False"}
 
-NUMERIC_FIELDS = [
-    "wholesale_price_mwh", "all_in_price_mwh", "retail_price_cents_kwh",
-    "price_2023_mwh", "capacity_additions_mw", "capacity_additions_elcc_mw",
+SOURCE_COLUMNS = ["source_price", "source_capacity", "source_peak", "source_queue"]
+
+# Fields every chart point needs (build_record parses them unconditionally)
+CHART_FIELDS = [
+    "wholesale_price_mwh", "all_in_price_mwh", "capacity_additions_mw",
     "project_count", "peak_demand_gw", "queue_completion_pct",
-    "avg_queue_duration_months",
-    "retirements_mw",
 ]
 
-SOURCE_COLUMNS = ["source_price", "source_capacity", "source_peak", "source_queue"]
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+#
+# kind      fields                       fails when
+# enum      column, allowed              value not in allowed
+# numeric   columns                      non-empty cell is not a number
+# range     column, min/max              parsed value outside [min, max]
+# le        left, right                  left > right (both present)
+# required  columns, view (optional)     cell is blank (for rows of `view`)
+#
+# Messages are format strings; {value}, {left}, {right} and {column} are
+# filled from the failing row.
+
+RULES = [
+    {"kind": "enum", "column": "view", "allowed": VALID_VIEWS,
+     "message": "Invalid view '{value}'"},
+    {"kind": "enum", "column": "color_group", "allowed": VALID_COLOR_GROUPS,
+     "message": "Invalid color_group '{value}'"},
+    {"kind": "enum", "column": "is_estimate", "allowed": VALID_IS_ESTIMATE,
+     "message": "Invalid is_estimate '{value}'"},
+    {"kind": "numeric", "columns": NUMERIC_FIELDS,
+     "message": "Non-numeric {column}='{value}'"},
+    {"kind": "le", "left": "wholesale_price_mwh", "right": "all_in_price_mwh",
+     "message": "all_in_price ({right}) < wholesale_price ({left})"},
+    {"kind": "le", "left": "capacity_additions_elcc_mw", "right": "capacity_additions_mw",
+     "message": "ELCC ({left}) > nameplate capacity ({right})"},
+    {"kind": "required", "columns": SOURCE_COLUMNS, "view": "iso",
+     "message": "Missing {column} for ISO row"},
+    {"kind": "required", "columns": CHART_FIELDS,
+     "message": "Missing {column}"},
+    {"kind": "required", "columns": ["retail_price_cents_kwh"], "view": "state",
+     "message": "Missing {column} for state row"},
+    {"kind": "range", "column": "wholesale_price_mwh", "min": 0},
+    {"kind": "range", "column": "all_in_price_mwh", "min": 0},
+    {"kind": "range", "column": "retail_price_cents_kwh", "min": 0},
+    {"kind": "range", "column": "capacity_additions_mw", "min": 0},
+    {"kind": "range", "column": "capacity_additions_elcc_mw", "min": 0},
+    {"kind": "range", "column": "retirements_mw", "min": 0},
+    {"kind": "range", "column": "project_count", "min": 0},
+    {"kind": "range", "column": "peak_demand_gw", "min": 0, "exclusive": True},
+    {"kind": "range", "column": "queue_completion_pct", "min": 0, "max": 100},
+    {"kind": "range", "column": "avg_queue_duration_months", "min": 0},
+]
+
+
+# ---------------------------------------------------------------------------
+# Typed columns
+# ---------------------------------------------------------------------------
+
+def parse_columns(table):
+    """Typed columns of an AuditTable.
+
+    Returns (text, numbers, bad): text[col] is an object array of stripped
+    strings; numbers[col] is float64 with NaN for blank or unparseable
+    cells (numeric columns only); bad[col] marks non-blank cells that
+    failed to parse. Stripping works on each column's distinct strings.
+    """
+    text = {}
+    numbers = {}
+    bad = {}
+    for col in table.columns:
+        stripped = np.asarray([s.strip() for s in table.labels(col)], dtype=object)
+        text[col] = stripped[table.codes(col)]
+        if col in NUMERIC_FIELDS:
+            numbers[col] = table.numbers(col)
+            bad[col] = table.invalid(col)
+    return text, numbers, bad
+
+
+def _fmt(x):
+    return repr(float(x))
+
+
+def evaluate_rules(rows, rules=RULES):
+    """Run row-level rules over an AuditTable; returns {row_index: [message, ...]}.
+
+    Messages for a row are ordered by rule, then by column within a rule.
+    """
+    found = {}
+    if not rows:
+        return found
+    text, numbers, bad = parse_columns(rows)
+    n = len(rows)
+    present = {col: vals != "" for col, vals in text.items()}
+    view = text.get("view", np.full(n, "", dtype=object))
+
+    def add(mask, make_message):
+        for i in np.flatnonzero(mask):
+            found.setdefault(int(i), []).append(make_message(int(i)))
+
+    for rule in rules:
+        kind = rule["kind"]
+        msg = rule.get("message")
 
+        if kind == "enum":
+            col = rule["column"]
+            vals = np.array(rows.text(col), dtype=object)
+            mask = ~np.isin(vals, list(rule["allowed"]))
+            add(mask, lambda i: msg.format(value=vals[i]))
 
-def parse_float(val):
-    if val is None or val.strip() == "":
-        return None
-    return float(val)
+        elif kind == "numeric":
+            for col in rule["columns"]:
+                if col in bad:
+                    add(bad[col], lambda i, c=col: msg.format(column=c, value=text[c][i]))
 
+        elif kind == "range":
+            col = rule["column"]
+            if col not in numbers:
+                continue
+            vals = numbers[col]
+            with np.errstate(invalid="ignore"):
+                mask = np.zeros(n, dtype=bool)
+                lo, hi = rule.get("min"), rule.get("max")
+                if lo is not None:
+                    mask |= (vals <= lo) if rule.get("exclusive") else (vals < lo)
+                if hi is not None:
+                    mask |= vals > hi
+            bounds = f"[{lo if lo is not None else '-inf'}, {hi if hi is not None else 'inf'}]"
+            add(mask, lambda i, c=col, b=bounds: msg.format(value=vals[i]) if msg
+                else f"{c}={_fmt(vals[i])} outside {b}")
 
-def validate(rows):
+        elif kind == "le":
+            left, right = numbers.get(rule["left"]), numbers.get(rule["right"])
+            if left is None or right is None:
+                continue
+            with np.errstate(invalid="ignore"):
+                mask = left > right  # NaN compares False: blanks never fail
+            add(mask, lambda i: msg.format(left=_fmt(left[i]), right=_fmt(right[i])))
+
+        elif kind == "required":
+            scope = view == rule["view"] if "view" in rule else np.ones(n, dtype=bool)
+            for col in rule["columns"]:
+                missing = scope & ~present.get(col, np.zeros(n, dtype=bool))
+                add(missing, lambda i, c=col: msg.format(column=c))
+
+        else:
+            raise ValueError(f"Unknown rule kind {kind!r}")
+
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Incremental state
+# ---------------------------------------------------------------------------
+
+def rules_hash():
+    """Identity of the rule set + engine; a change invalidates saved results."""
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def row_hash(items):
+    """Hash of a row's [(column, value), ...] (AuditTable.row_items)."""
+    blob = json.dumps(items, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:24]
+
+
+def load_state():
+    try:
+        with open(STATE_PATH) as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return state.get("rows", {}) if state.get("rules") == rules_hash() else {}
+
+
+def save_state(results):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"rules": rules_hash(), "rows": results}, f)
+    os.replace(tmp, STATE_PATH)
+
+
+# ---------------------------------------------------------------------------
+# Validate
+# ---------------------------------------------------------------------------
+
+def validate(rows, previous=None):
+    """Validate an AuditTable (see audit_table.py); returns a report dict.
+
+    ``previous`` maps row hash -> row-level messages from an earlier run
+    (see load_state); rows found there are not re-evaluated. The report
+    has ``errors`` and ``warnings`` (message lists), ``results`` (the
+    map for the current rows, for save_state) and ``evaluated`` (rows
+    whose rules actually ran).
+    """
     errors = []
     warnings = []
 
     # Check required columns
     if rows:
-        header = list(rows[0].keys())
+        header = list(rows.columns)
         missing = [c for c in REQUIRED_COLUMNS if c not in header]
         if missing:
             errors.append(f"Missing columns: {missing}")
@@ -60,71 +258,61 @@ def validate(rows):
             warnings.append(f"Extra columns (ignored): {extra}")
 
     # Check for duplicate (view, year, id)
+    keys = list(zip(rows.text("view"), rows.text("year"), rows.text("id")))
     seen = set()
-    for i, row in enumerate(rows, 2):  # CSV line numbers start at 2
-        key = (row["view"], row["year"], row["id"])
+    for i, key in enumerate(keys, 2):  # CSV line numbers start at 2
         if key in seen:
             errors.append(f"Line {i}: Duplicate row {key}")
         seen.add(key)
 
-    for i, row in enumerate(rows, 2):
-        prefix = f"Line {i} ({row['view']}/{row['year']}/{row['id']})"
-
-        # View validation
-        if row["view"] not in VALID_VIEWS:
-            errors.append(f"{prefix}: Invalid view '{row['view']}'")
-
-        # color_group validation
-        if row["color_group"] not in VALID_COLOR_GROUPS:
-            errors.append(f"{prefix}: Invalid color_group '{row['color_group']}'")
-
-        # is_estimate validation
-        if row["is_estimate"] not in VALID_IS_ESTIMATE:
-            errors.append(f"{prefix}: Invalid is_estimate '{row['is_estimate']}'")
-
-        # Numeric fields
-        for field in NUMERIC_FIELDS:
-            val = row.get(field, "").strip()
-            if val:
-                try:
-                    float(val)
-                except ValueError:
-                    errors.append(f"{prefix}: Non-numeric {field}='{val}'")
-
-        # all_in_price_mwh >= wholesale_price_mwh
-        wholesale = parse_float(row.get("wholesale_price_mwh", ""))
-        all_in = parse_float(row.get("all_in_price_mwh", ""))
-        if wholesale is not None and all_in is not None:
-            if all_in < wholesale:
-                errors.append(
-                    f"{prefix}: all_in_price ({all_in}) < wholesale_price ({wholesale})"
-                )
-
-        # capacity_additions_elcc_mw <= capacity_additions_mw
-        cap = parse_float(row.get("capacity_additions_mw", ""))
-        elcc = parse_float(row.get("capacity_additions_elcc_mw", ""))
-        if cap is not None and elcc is not None:
-            if elcc > cap:
-                errors.append(
-                    f"{prefix}: ELCC ({elcc}) > nameplate capacity ({cap})"
-                )
-
-        # ISO rows should have all 4 source columns
-        if row["view"] == "iso":
-            for col in SOURCE_COLUMNS:
-                if not row.get(col, "").strip():
-                    errors.append(f"{prefix}: Missing {col} for ISO row")
-
-    return errors, warnings
+    # Row-level rules, only for rows without a saved result
+    with phase("row hashes", rows=len(rows)):
+        hashes = [row_hash(items) for items in rows.row_items()]
+    previous = previous or {}
+    todo = [i for i, h in enumerate(hashes) if h not in previous]
+    with phase("row rules", rows=len(todo)):
+        fresh = evaluate_rules(rows.take(todo))
+
+    results = {}
+    for j, i in enumerate(todo):
+        results[hashes[i]] = fresh.get(j, [])
+    for h in hashes:
+        if h not in results:
+            results[h] = previous[h]
+
+    for i, ((view, year, id_), h) in enumerate(zip(keys, hashes), 2):
+        for msg in results[h]:
+            errors.append(f"Line {i} ({view}/{year}/{id_}): {msg}")
+
+    # State rows vs their parent ISO rows
+    if rows and "view" in rows.columns:
+        with phase("state-ISO consistency", rows=len(rows)):
+            report = check_consistency(rows)
+        errors.extend(report["errors"])
+        warnings.extend(report["warnings"])
+
+    return {"errors": errors, "warnings": warnings,
+            "results": results, "evaluated": len(todo)}
 
 
 def main():
-    with open(CSV_PATH, newline="") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+    incremental = "--incremental" in sys.argv[1:]
+    profiling.start("validate_data")
+
+    with phase("read CSV") as rec:
+        rows = load_table(CSV_PATH)
+        rec["rows"] = len(rows)
 
     print(f"Validating {len(rows)} rows from {CSV_PATH}")
-    errors, warnings = validate(rows)
+    previous = load_state() if incremental else None
+    with phase("validate", rows=len(rows)):
+        report = validate(rows, previous)
+    errors, warnings = report["errors"], report["warnings"]
+    if incremental:
+        with phase("save state") as rec:
+            save_state(report["results"])
+            rec["bytes"] = os.path.getsize(STATE_PATH)
+        print(f"  Incremental: {report['evaluated']} new or changed row(s) checked")
 
     for w in warnings:
         print(f"  WARNING: {w}")
@@ -133,9 +321,11 @@ def main():
         print(f"\n  {len(errors)} error(s) found:")
         for e in errors:
             print(f"    {e}")
+        profiling.finish()
         sys.exit(1)
     else:
         print("  All checks passed.")
+        profiling.finish()
         sys.exit(0)
 
 
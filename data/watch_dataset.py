@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Keep the dataset hot in memory and rebuild the chart data on every CSV save.
+
+Usage: python3 data/watch_dataset.py [--interval MS] [--idle S]
+  (npm run data:watch, in a second terminal next to npm run dev)
+
+Polls audit_all_data.csv every --interval milliseconds (default 50).
+The parsed rows, the validation results and the built datasets stay in
+memory between saves, so a save only costs work for what it changed:
+
+  parse      the file is split into raw records and only records whose
+             text is new are run through the CSV parser
+  validate   row-level rules run only for new or edited rows (the row
+             hash map of validate_data.py); the duplicate-key and
+             state <-> ISO checks run over the whole table, which is a
+             single linear pass
+  build      only (view, year) groups whose rows changed are rebuilt; a
+             verified JSON file is rewritten only when its bytes change,
+             and the build manifest is kept current, so a later
+             `npm run data:build` skips them
+  bundle     public/data/ datasets.bundle.json and the string table are
+             rewritten from the in-memory datasets, without the .gz/.br
+             variants; the dev server (vite.config.ts) reloads the chart
+             when the bundle changes
+
+A save that fails validation prints the errors and writes nothing; the
+groups it touched are rebuilt at the next save that passes. Once no save
+has arrived for --idle seconds (default 2), the compressed bundle
+variants and the validation state (data/.cache/validate_state.json) are
+brought up to date, so the tracked .gz/.br files never stay behind the
+JSON for long. Ctrl-C, SIGTERM and SIGHUP (a closed terminal) do the
+same before exiting.
+"""
+
+import csv
+import json
+import os
+import signal
+import sys
+import time
+
+import chart_metrics
+from audit_table import AuditTable
+from build_bundle import build_bundle, load_datasets
+from build_from_csv import (
+    CSV_PATH, OUTPUT_MAP, VERIFIED_DIR, build_output, builder_hash, content_hash,
+    derived_records, file_hash, group_inputs, load_manifest, save_manifest,
+    write_atomic,
+)
+from validate_data import load_state, save_state, validate
+
+DEFAULT_INTERVAL_MS = 50
+DEFAULT_IDLE_S = 2
+
+
+# ---------------------------------------------------------------------------
+# Records
+# ---------------------------------------------------------------------------
+
+def split_records(text):
+    """Raw CSV records of ``text``; a quoted field may span lines.
+
+    Blank lines are dropped, as csv.DictReader (and parse_csv) skip them.
+    """
+    records = []
+    pending = None
+    for line in text.split("\n"):
+        line = line[:-1] if line.endswith("\r") else line
+        record = line if pending is None else pending + "\n" + line
+        if record.count('"') % 2:
+            pending = record  # inside a quoted field
+            continue
+        pending = None
+        if record:
+            records.append(record)
+    if pending is not None:
+        records.append(pending)
+    return records
+
+
+def parse_record(record, header):
+    """One raw record as a row dict (short rows padded with "")."""
+    cells = next(csv.reader([record]), [])
+    if len(cells) < len(header):
+        cells += [""] * (len(header) - len(cells))
+    return dict(zip(header, cells))
+
+
+def _group_key(row):
+    year = row.get("year", "")
+    return row.get("view", ""), int(year) if year.isdigit() else year
+
+
+# ---------------------------------------------------------------------------
+# Session
+# ---------------------------------------------------------------------------
+
+class WatchSession:
+    """Parsed CSV, validation results and built datasets, kept between saves."""
+
+    def __init__(self, path=CSV_PATH):
+        self.path = path
+        self.header = None
+        self.parsed = {}       # raw record -> row dict
+        self.groups = {}       # (view, year) -> [raw record, ...] in file order
+        self.pending = set()   # groups changed since the last successful build
+        self.unsettled = False  # bundle rebuilt without its .gz/.br variants
+        self.warnings = []
+        self.results = load_state()  # row hash -> messages (validate_data.py)
+        self.builder = builder_hash()
+        self.manifest = load_manifest()
+        self.datasets = load_datasets()
+
+    def apply(self, text):
+        """Bring the session up to date with the file's text.
+
+        Returns a summary dict, or None when no row changed.
+        """
+        records = split_records(text)
+        header = next(csv.reader(records[:1]), [])
+        records = records[1:]
+        if header != self.header:
+            self.header, self.parsed, self.groups = header, {}, {}
+
+        fresh = [r for r in dict.fromkeys(records) if r not in self.parsed]
+        parsed = {r: self.parsed.get(r) for r in records}
+        for r in fresh:
+            parsed[r] = parse_record(r, header)
+        self.parsed = parsed
+
+        groups = {}
+        positions = {}
+        for i, r in enumerate(records):
+            key = _group_key(parsed[r])
+            groups.setdefault(key, []).append(r)
+            positions.setdefault(key, []).append(i)
+        changed = {k for k in groups.keys() | self.groups.keys()
+                   if groups.get(k) != self.groups.get(k)}
+        self.groups = groups
+        if not changed:
+            return None
+        self.pending |= changed
+
+        table = AuditTable.from_rows([parsed[r] for r in records], header)
+        report = validate(table, self.results)
+        errors, warnings = report["errors"], report["warnings"]
+        self.results = report["results"]
+        new_warnings = [w for w in warnings if w not in self.warnings]
+        self.warnings = warnings
+        summary = {
+            "groups": sorted(changed, key=str),
+            "parsed": len(fresh),
+            "checked": report["evaluated"],
+            "errors": errors,
+            "warnings": new_warnings,
+            "written": [],
+        }
+        if errors:
+            return summary
+
+        built = False
+        for view, year in sorted(self.pending, key=str):
+            if (view, year) not in OUTPUT_MAP:
+                if (view, year) in groups:
+                    print(f"  WARNING: No output mapping for ({view}, {year}), skipping")
+                continue
+            if (view, year) not in groups:
+                continue  # no rows left: keep the last build, as build_all does
+            filename, top_key = OUTPUT_MAP[(view, year)]
+            out_path = os.path.join(VERIFIED_DIR, filename)
+            rows = table.take(positions[(view, year)])
+            fits = chart_metrics.group_fits(rows).get((view, year))
+            output, _n = build_output(view, year, list(rows), derived_records(rows), fits)
+            digest = content_hash(output.encode("utf-8"))
+            if digest != file_hash(out_path):
+                write_atomic(out_path, output)
+                summary["written"].append(filename)
+            self.manifest[filename] = dict(
+                group_inputs(view, year, list(rows), self.builder), output=digest)
+            self.datasets[f"{view}/{year}"] = (top_key, json.loads(output))
+            built = True
+        self.pending = set()
+
+        if built:
+            save_manifest(self.manifest)
+            summary["written"] += build_bundle(self.datasets, compress=False)
+            self.unsettled = True
+        return summary
+
+    def settle(self):
+        """Write the compressed bundle variants and the validation state.
+
+        Returns the files written.
+        """
+        written = build_bundle(self.datasets) if self.unsettled else []
+        self.unsettled = False
+        save_state(self.results)
+        return written
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def print_summary(summary, elapsed_ms, since_save_ms=None):
+    groups = ", ".join(f"{v}/{y}" for v, y in summary["groups"])
+    print(f"[{time.strftime('%H:%M:%S')}] {groups}: {summary['parsed']} record(s) "
+          f"parsed, {summary['checked']} row(s) checked")
+    for w in summary["warnings"]:
+        print(f"  WARNING: {w}")
+    if summary["errors"]:
+        print(f"  {len(summary['errors'])} error(s); nothing written:")
+        for e in summary["errors"]:
+            print(f"    {e}")
+        return
+    written = ", ".join(summary["written"]) or "nothing (output identical)"
+    after = "" if since_save_ms is None else f" ({since_save_ms:.0f} ms after save)"
+    print(f"  wrote {written} in {elapsed_ms:.0f} ms{after}")
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def watch(path=CSV_PATH, interval=DEFAULT_INTERVAL_MS / 1000, idle=DEFAULT_IDLE_S):
+    session = WatchSession(path)
+    stamp = None
+    last_change = time.monotonic()
+    for name in ("SIGTERM", "SIGHUP"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), _interrupt)
+    print(f"Watching {path} (Ctrl-C to stop)")
+    try:
+        while True:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                time.sleep(interval)  # editor replacing the file
+                continue
+            if (st.st_mtime_ns, st.st_size, st.st_ino) != stamp:
+                first = stamp is None
+                stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+                start = time.perf_counter()
+                with open(path, newline="", encoding="utf-8") as f:
+                    text = f.read()
+                summary = session.apply(text)
+                last_change = time.monotonic()
+                if summary is not None:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    since_save = None if first else (time.time_ns() - st.st_mtime_ns) / 1e6
+                    print_summary(summary, elapsed, since_save)
+            elif session.unsettled and time.monotonic() - last_change >= idle:
+                written = session.settle()
+                print(f"  idle: wrote {', '.join(written) or 'nothing (output identical)'}")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nWriting compressed bundle and validation state...")
+        session.settle()
+
+
+def _option(args, name, default, cast=str):
+    if name not in args:
+        return default
+    i = args.index(name)
+    value = cast(args[i + 1])
+    del args[i:i + 2]
+    return value
+
+
+def main():
+    args = sys.argv[1:]
+    if "--help" in args or "-h" in args:
+        print(__doc__)
+        sys.exit(0)
+    interval = _option(args, "--interval", DEFAULT_INTERVAL_MS, int)
+    idle = _option(args, "--idle", DEFAULT_IDLE_S, float)
+    watch(CSV_PATH, interval / 1000, idle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""Streaming, column-projected reader for .xlsx worksheets.
+
+openpyxl's read-only mode still materializes a tuple of every cell in
+every row. This reader streams the worksheet XML straight out of the zip
+archive with iterparse, decodes only the requested columns, and discards
+each row as soon as it has been yielded, so memory stays flat regardless
+of sheet size. The shared-strings table is streamed the same way and only
+loaded if a requested cell actually references it.
+
+Usage:
+  python3 data/xlsx_reader.py bench WORKBOOK [--sheet NAME] [--header-row N]
+      Compare throughput and peak memory against openpyxl read-only mode.
+"""
+
+import posixpath
+import re
+import sys
+import time
+import tracemalloc
+import zipfile
+import xml.etree.ElementTree as ET
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_ROW = f"{{{NS_MAIN}}}row"
+_VALUE = f"{{{NS_MAIN}}}v"
+_INLINE = f"{{{NS_MAIN}}}is"
+_TEXT = f"{{{NS_MAIN}}}t"
+_RUN = f"{{{NS_MAIN}}}r"
+_SI = f"{{{NS_MAIN}}}si"
+_SHEET_DATA = f"{{{NS_MAIN}}}sheetData"
+_SST = f"{{{NS_MAIN}}}sst"
+
+_REF_RE = re.compile(r"([A-Z]+)(\d+)")
+
+
+def column_index(letters):
+    """Zero-based column index for a column reference like 'A' or 'AB'."""
+    idx = 0
+    for ch in letters:
+        idx = idx * 26 + (ord(ch) - 64)
+    return idx - 1
+
+
+def _number(text):
+    # Match openpyxl: integral literals come back as int
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+def _string_item(elem):
+    """Text of a shared-string <si> or inline <is> element (skips phonetics)."""
+    t = elem.find(_TEXT)
+    if t is not None:
+        return t.text or ""
+    return "".join(run.findtext(_TEXT, "") for run in elem.iter(_RUN))
+
+
+class XlsxReader:
+    """Open an .xlsx archive once and stream projected columns from its sheets.
+
+    Several sheets can be read from the same reader; the archive and the
+    shared-strings table are shared between them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._sheets = self._sheet_parts()
+        self._shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    @property
+    def sheet_names(self):
+        return list(self._sheets)
+
+    # -- workbook structure -------------------------------------------------
+
+    def _sheet_parts(self):
+        """Map sheet name -> worksheet part path inside the archive."""
+        rels = {}
+        with self._zip.open("xl/_rels/workbook.xml.rels") as f:
+            for rel in ET.parse(f).getroot().iter(f"{{{NS_PKG_REL}}}Relationship"):
+                target = rel.get("Target")
+                if target.startswith("/"):
+                    target = target.lstrip("/")
+                else:
+                    target = posixpath.normpath(posixpath.join("xl", target))
+                rels[rel.get("Id")] = target
+
+        sheets = {}
+        with self._zip.open("xl/workbook.xml") as f:
+            for sheet in ET.parse(f).getroot().iter(f"{{{NS_MAIN}}}sheet"):
+                sheets[sheet.get("name")] = rels[sheet.get(f"{{{NS_REL}}}id")]
+        return sheets
+
+    def _shared_strings(self):
+        """Load the shared-strings table on first use."""
+        if self._shared is None:
+            self._shared = []
+            if "xl/sharedStrings.xml" in self._zip.namelist():
+                with self._zip.open("xl/sharedStrings.xml") as f:
+                    root = None
+                    for event, elem in ET.iterparse(f, events=("start", "end")):
+                        if event == "start":
+                            if elem.tag == _SST:
+                                root = elem
+                        elif elem.tag == _SI:
+                            self._shared.append(_string_item(elem))
+                            root.clear()
+        return self._shared
+
+    # -- row streaming ------------------------------------------------------
+
+    def _cell_value(self, c):
+        t = c.get("t")
+        if t == "inlineStr":
+            inline = c.find(_INLINE)
+            return _string_item(inline) if inline is not None else None
+        v = c.findtext(_VALUE)
+        if v is None:
+            return None
+        if t == "s":
+            return self._shared_strings()[int(v)]
+        if t is None or t == "n":
+            return _number(v)
+        if t == "b":
+            return v == "1"
+        if t == "e":
+            return None
+        return v  # "str" (formula result) and "d" (ISO date text)
+
+    def iter_rows(self, sheet, columns, min_row=1, max_row=None):
+        """Yield one tuple per row holding only the cells at ``columns``.
+
+        ``columns`` are zero-based indexes; rows are 1-based like Excel.
+        Missing cells come back as None; rows with none of the requested
+        cells present are skipped.
+        """
+        wanted = {col: pos for pos, col in enumerate(columns)}
+        width = len(columns)
+        letters_cache = {}
+
+        with self._zip.open(self._sheets[sheet]) as f:
+            sheet_data = None
+            row_num = 0
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == _SHEET_DATA:
+                        sheet_data = elem
+                    continue
+                if elem.tag != _ROW:
+                    continue
+
+                r = elem.get("r")
+                row_num = int(r) if r is not None else row_num + 1
+                if row_num < min_row:
+                    sheet_data.clear()
+                    continue
+                if max_row is not None and row_num > max_row:
+                    break
+
+                values = [None] * width
+                found = False
+                col = -1
+                for c in elem:
+                    ref = c.get("r")
+                    if ref is None:
+                        col += 1
+                    else:
+                        letters = ref.rstrip("0123456789")
+                        col = letters_cache.get(letters)
+                        if col is None:
+                            col = letters_cache[letters] = column_index(letters)
+                    pos = wanted.get(col)
+                    if pos is not None:
+                        values[pos] = self._cell_value(c)
+                        found = True
+                sheet_data.clear()
+                if found:
+                    yield tuple(values)
+
+    def row(self, sheet, row_num, width=None):
+        """Return a full row as a list (used for header rows)."""
+        cells = {}
+        with self._zip.open(self._sheets[sheet]) as f:
+            current = 0
+            for _event, elem in ET.iterparse(f):
+                if elem.tag != _ROW:
+                    continue
+                r = elem.get("r")
+                current = int(r) if r is not None else current + 1
+                if current == row_num:
+                    col = -1
+                    for c in elem:
+                        ref = c.get("r")
+                        m = _REF_RE.match(ref) if ref else None
+                        col = column_index(m.group(1)) if m else col + 1
+                        cells[col] = self._cell_value(c)
+                    break
+                if current > row_num:
+                    break
+                elem.clear()
+        n = width if width is not None else (max(cells) + 1 if cells else 0)
+        return [cells.get(i) for i in range(n)]
+
+    def resolve_columns(self, sheet, header_row, names):
+        """Map header texts on ``header_row`` to zero-based column indexes."""
+        positions = {}
+        for idx, text in enumerate(self.row(sheet, header_row)):
+            if text is not None:
+                positions.setdefault(str(text).strip(), idx)
+        missing = [n for n in names if n not in positions]
+        if missing:
+            raise KeyError(f"{sheet}: header(s) not found: {missing}")
+        return [positions[n] for n in names]
+
+    def find_cell(self, sheet, text, max_row):
+        """Locate the first cell whose stripped text equals ``text``.
+
+        Only the first ``max_row`` rows are scanned. Returns a 1-based row
+        number and zero-based column index, or raises KeyError.
+        """
+        for row_num in range(1, max_row + 1):
+            for idx, value in enumerate(self.row(sheet, row_num)):
+                if value is not None and str(value).strip() == text:
+                    return row_num, idx
+        raise KeyError(f"{sheet}: {text!r} not found in rows 1-{max_row}")
+
+    def read_columns(self, sheet, names, header_row):
+        """Read the named columns below ``header_row`` into per-column lists."""
+        indexes = self.resolve_columns(sheet, header_row, names)
+        out = [[] for _ in names]
+        appends = [col.append for col in out]
+        for values in self.iter_rows(sheet, indexes, min_row=header_row + 1):
+            for append, v in zip(appends, values):
+                append(v)
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Throughput comparison
+# ---------------------------------------------------------------------------
+
+def _measure(fn):
+    """Run ``fn`` twice: once for wall time, once under tracemalloc for peak."""
+    start = time.perf_counter()
+    n_rows = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return n_rows, elapsed, peak
+
+
+def bench(path, sheet, header_row, names):
+    """Time the openpyxl read-only path against XlsxReader on one sheet."""
+    import openpyxl
+
+    def run_openpyxl():
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        ws = wb[sheet]
+        header = next(ws.iter_rows(min_row=header_row, max_row=header_row,
+                                   values_only=True))
+        idx = [list(header).index(n) for n in names]
+        n = 0
+        for row in ws.iter_rows(min_row=header_row + 1, values_only=True):
+            _ = [row[i] for i in idx]
+            n += 1
+        wb.close()
+        return n
+
+    def run_stream():
+        n = 0
+        with XlsxReader(path) as reader:
+            idx = reader.resolve_columns(sheet, header_row, names)
+            for _values in reader.iter_rows(sheet, idx, min_row=header_row + 1):
+                n += 1
+        return n
+
+    print(f"{path} [{sheet}], {len(names)} projected columns")
+    for label, fn in (("openpyxl read-only", run_openpyxl),
+                      ("xlsx_reader", run_stream)):
+        n_rows, elapsed, peak = _measure(fn)
+        rate = n_rows / elapsed if elapsed else float("inf")
+        print(f"  {label:<20} {n_rows:>9,} rows  {elapsed:7.2f} s  "
+              f"{rate:>10,.0f} rows/s  peak {peak / 1e6:6.1f} MB")
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    if not args or args[0] != "bench" or len(args) < 2:
+        print(__doc__)
+        return 2
+
+    path = args[1]
+    sheet = "Operating"
+    header_row = 3
+    if "--sheet" in args:
+        sheet = args[args.index("--sheet") + 1]
+    if "--header-row" in args:
+        header_row = int(args[args.index("--header-row") + 1])
+
+    names = ["Plant State", "Nameplate Capacity (MW)", "Technology",
+             "Operating Year"]
+    bench(path, sheet, header_row, names)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
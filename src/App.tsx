@@ -1,43 +1,55 @@
-import { useState, useCallback } from "react";
+import { useState, useCallback, useEffect, useMemo } from "react";
 import { ElectricityScatter } from "./components/ElectricityScatter";
-import isoDataset from "../data/verified/iso_scatter_data.json";
-import isoDataset2023 from "../data/verified/iso_scatter_data_2023.json";
-import isoDataset2025 from "../data/verified/iso_scatter_data_2025_est.json";
-import stateDataset from "../data/verified/state_scatter_data.json";
-import stateDataset2023 from "../data/verified/state_scatter_data_2023.json";
-import stateDataset2025 from "../data/verified/state_scatter_data_2025_est.json";
-import type { ISOScatterDataset, ISODataPoint } from "./lib/types";
-
-type StateDataset = { metadata: ISOScatterDataset["metadata"]; states: ISODataPoint[] };
-
-const isoData2024 = (isoDataset as ISOScatterDataset).isos;
-const isoData2023 = (isoDataset2023 as ISOScatterDataset).isos;
-const isoData2025 = (isoDataset2025 as ISOScatterDataset).isos;
-const stateData2024 = (stateDataset as StateDataset).states;
-const stateData2023 = (stateDataset2023 as StateDataset).states;
-const stateData2025 = (stateDataset2025 as StateDataset).states;
+import { loadBundle, loadStrings, applyStrings } from "./lib/bundle";
+import type { BundleData } from "./lib/bundle";
+import type { ISODataPoint } from "./lib/types";
+import { FONT, COLOR } from "./lib/theme";
 
 export type YearKey = "2023" | "2024" | "2025";
 
-const isoDataByYear: Record<YearKey, ISODataPoint[]> = {
-  "2023": isoData2023,
-  "2024": isoData2024,
-  "2025": isoData2025,
-};
-
 const availableYears: YearKey[] = ["2023", "2024", "2025"];
 const stateYears: YearKey[] = ["2023", "2024", "2025"];
-const allIsoData: ISODataPoint[] = [...isoData2023, ...isoData2024, ...isoData2025];
-const allStateData: ISODataPoint[] = [...stateData2023, ...stateData2024, ...stateData2025];
 
-const stateDataByYear: Record<YearKey, ISODataPoint[]> = {
-  "2023": stateData2023,
-  "2024": stateData2024,
-  "2025": stateData2025,
-};
+const EMPTY: ISODataPoint[] = [];
 
 export default function App() {
   const [year, setYear] = useState<YearKey>("2024");
+  const [data, setData] = useState<BundleData | null>(null);
+  const [error, setError] = useState<string | null>(null);
+  const [attempt, setAttempt] = useState(0);
+
+  // First paint uses the columnar bundle; notes and sources follow lazily
+  useEffect(() => {
+    let cancelled = false;
+    setError(null);
+    loadBundle()
+      .then((bundleData) => {
+        if (cancelled) return;
+        setData(bundleData);
+        return loadStrings(bundleData.bundle)
+          .then((strings) => {
+            if (!cancelled) setData(applyStrings(bundleData, strings));
+          })
+          // The chart works without notes and sources; keep it on screen
+          .catch((err) => console.error("Failed to load dataset strings:", err));
+      })
+      .catch((err) => {
+        console.error("Failed to load dataset bundle:", err);
+        if (!cancelled) setError(err instanceof Error ? err.message : String(err));
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [attempt]);
+
+  const allIsoData = useMemo(
+    () => (data ? availableYears.flatMap((y) => data.iso[y]) : EMPTY),
+    [data],
+  );
+  const allStateData = useMemo(
+    () => (data ? stateYears.flatMap((y) => data.state[y]) : EMPTY),
+    [data],
+  );
 
   const handleYearChange = useCallback((y: YearKey) => {
     setYear(y);
@@ -53,18 +65,57 @@ export default function App() {
         background: "#fff",
       }}
     >
-      <ElectricityScatter
-        isoData={isoDataByYear[year]}
-        allIsoData={allIsoData}
-        isoDataByYear={isoDataByYear}
-        stateData={stateDataByYear[year]}
-        allStateData={allStateData}
-        stateDataByYear={stateDataByYear}
-        year={year}
-        availableYears={availableYears}
-        stateYears={stateYears}
-        onYearChange={handleYearChange}
-      />
+      {!data && (
+        <div
+          role={error ? "alert" : "status"}
+          style={{
+            marginTop: 80,
+            fontFamily: FONT.body,
+            fontSize: 14,
+            color: error ? COLOR.accent.error : COLOR.text.muted,
+            textAlign: "center",
+          }}
+        >
+          {error ? (
+            <>
+              <div>Could not load the chart data ({error}).</div>
+              <button
+                type="button"
+                onClick={() => setAttempt((n) => n + 1)}
+                style={{
+                  marginTop: 12,
+                  padding: "6px 14px",
+                  fontFamily: FONT.body,
+                  fontSize: 13,
+                  border: `1px solid ${COLOR.border.default}`,
+                  borderRadius: 6,
+                  background: COLOR.surface.subtle,
+                  color: COLOR.text.secondary,
+                  cursor: "pointer",
+                }}
+              >
+                Try again
+              </button>
+            </>
+          ) : (
+            "Loading chart data…"
+          )}
+        </div>
+      )}
+      {data && (
+        <ElectricityScatter
+          isoData={data.iso[year]}
+          allIsoData={allIsoData}
+          isoDataByYear={data.iso}
+          stateData={data.state[year]}
+          allStateData={allStateData}
+          stateDataByYear={data.state}
+          year={year}
+          availableYears={availableYears}
+          stateYears={stateYears}
+          onYearChange={handleYearChange}
+        />
+      )}
     </div>
   );
 }
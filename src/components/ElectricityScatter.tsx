@@ -14,7 +14,10 @@ import { ChartToolbar } from "./ChartToolbar";
 import { MethodologyNotes } from "./MethodologyNotes";
 import { SourceDataTable } from "./SourceDataTable";
 import { HiddenDataTable } from "./HiddenDataTable";
+import { GeneratorDrilldown } from "./GeneratorDrilldown";
 import { useContainerWidth } from "../lib/useContainerWidth";
+import { trendFit } from "../lib/trendUncertainty";
+import type { TrendInterval } from "../lib/trendUncertainty";
 
 const MAX_WIDTH = 820;
 
@@ -60,6 +63,12 @@ function getViewKey(metric: XAxisMetric, weighting: CapacityWeighting): ViewKey
   return weighting === "elcc" ? "capacity_elcc" : "capacity";
 }
 
+/** Compact number for slope / r labels */
+function formatStat(v: number | null): string {
+  if (v == null) return "n/a";
+  return Math.abs(v) >= 1 ? v.toFixed(2) : v.toPrecision(2);
+}
+
 /** ISO color mapping for horizontal band labels — matches ISO_STROKES */
 const ISO_BAND_COLORS: Record<string, string> = {
   ERCOT: "#2166ac",
@@ -94,6 +103,8 @@ export function ElectricityScatter({
   const [weighting, setWeighting] = useState<CapacityWeighting>("nameplate");
   const [basis, setBasis] = useState<CapacityBasis>("gross");
   const [tappedId, setTappedId] = useState<string | null>(null);
+  // Point whose generators are listed below the chart (click to drill down)
+  const [drillId, setDrillId] = useState<string | null>(null);
   const [playing, setPlaying] = useState(false);
   const svgRef = useRef<SVGSVGElement>(null);
 
@@ -130,6 +141,7 @@ export function ElectricityScatter({
     setViewTab(t);
     hideTooltip();
     setTappedId(null);
+    setDrillId(null);
     if (t === "state") {
       setPlaying(false);
     }
@@ -171,6 +183,23 @@ export function ElectricityScatter({
 
   const data = isStateView ? stateData : isoData;
 
+  // Bootstrap interval of the trendline (trend_uncertainty.json), capacity metric only
+  const trendKey = `${granularity}/${year}/${priceMetric}/${weighting}/${basis}`;
+  const [trend, setTrend] = useState<{ key: string; fit: TrendInterval | null } | null>(null);
+  useEffect(() => {
+    if (metric !== "capacity") return;
+    let cancelled = false;
+    trendFit(granularity, Number(year), priceMetric, weighting, basis)
+      .then((fit) => {
+        if (!cancelled) setTrend({ key: trendKey, fit });
+      })
+      .catch(() => undefined);
+    return () => {
+      cancelled = true;
+    };
+  }, [metric, granularity, year, priceMetric, weighting, basis, trendKey]);
+  const trendInterval = metric === "capacity" && trend?.key === trendKey ? trend.fit : null;
+
   // Smaller bubbles on compact
   const rRangeOverride: [number, number] | undefined = isCompact
     ? (isStateView ? [4, 18] : [8, 28])
@@ -204,9 +233,10 @@ export function ElectricityScatter({
     [showTooltip, margin.left, margin.top],
   );
 
-  // Tap-to-toggle tooltips on compact
+  // Click drills down to the point's generators; tap also toggles tooltips on compact
   const handleBubbleClick = useCallback(
     (d: ISODataPoint, cx: number, cy: number) => {
+      setDrillId(d.id);
       if (!isCompact) return;
       if (tappedId === d.id) {
         setTappedId(null);
@@ -326,6 +356,25 @@ export function ElectricityScatter({
             </span>
           )}
         </p>
+        {trendInterval && trendInterval.slope.point != null && (() => {
+          const { slope, r, levels, resamples } = trendInterval;
+          const last = levels.length - 1;
+          const coverage = Math.round(levels[last] - levels[0]);
+          return (
+            <p
+              style={{
+                fontFamily: FONT.body,
+                fontSize: isCompact ? 9 : 11,
+                color: COLOR.text.muted,
+                margin: "2px 0 0",
+              }}
+            >
+              Trend slope {formatStat(slope.point)} ({coverage}% interval {formatStat(slope.quantiles[0])} to{" "}
+              {formatStat(slope.quantiles[last])}), r = {formatStat(r.point)} ({formatStat(r.quantiles[0])} to{" "}
+              {formatStat(r.quantiles[last])}); {resamples.toLocaleString()} bootstrap resamples
+            </p>
+          );
+        })()}
       </div>
 
       {/* Controls */}
@@ -823,6 +872,17 @@ export function ElectricityScatter({
         year={year}
       />
 
+      {/* Generator drill-down for the clicked point */}
+      {drillId && (
+        <GeneratorDrilldown
+          view={granularity}
+          year={year}
+          id={drillId}
+          compact={isCompact}
+          onClose={() => setDrillId(null)}
+        />
+      )}
+
       {/* Tooltip */}
       {tooltipOpen && tooltipData && (
         <ScatterTooltip
@@ -0,0 +1,120 @@
+import { useEffect, useState } from "react";
+import type { GranularityLevel } from "../lib/types";
+import type { YearKey } from "../App";
+import { loadGenerators } from "../lib/drilldown";
+import type { GeneratorRecord } from "../lib/drilldown";
+import { FONT, COLOR } from "../lib/theme";
+
+/** Largest units listed; the header totals cover every generator */
+const MAX_ROWS = 12;
+
+interface Props {
+  view: GranularityLevel;
+  year: YearKey;
+  id: string;
+  compact?: boolean;
+  onClose: () => void;
+}
+
+/** Generators behind one clicked chart point (one drill-down shard) */
+export function GeneratorDrilldown({ view, year, id, compact, onClose }: Props) {
+  const key = `${view}/${year}/${id}`;
+  const [loaded, setLoaded] = useState<{ key: string; records: GeneratorRecord[] } | null>(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    loadGenerators(view, Number(year), id)
+      .catch((err) => {
+        console.error(`Failed to load generators for ${key}:`, err);
+        return [];
+      })
+      .then((records) => {
+        if (!cancelled) setLoaded({ key, records });
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [view, year, id, key]);
+
+  const records = loaded?.key === key ? loaded.records : null;
+  const totalMw = records?.reduce((sum, r) => sum + r.nameplate_mw, 0) ?? 0;
+  const totalElcc = records?.reduce((sum, r) => sum + r.elcc_mw, 0) ?? 0;
+
+  const cell: React.CSSProperties = { padding: "2px 8px 2px 0", whiteSpace: "nowrap" };
+  const num: React.CSSProperties = { ...cell, fontFamily: FONT.data, textAlign: "right" };
+
+  return (
+    <div
+      style={{
+        marginTop: 12,
+        padding: compact ? "8px 10px" : "10px 16px",
+        background: COLOR.surface.subtle,
+        border: `1px solid ${COLOR.border.light}`,
+        borderRadius: 8,
+        fontFamily: FONT.body,
+        fontSize: compact ? 11 : 12,
+        color: COLOR.text.secondary,
+        overflowX: "auto",
+      }}
+    >
+      <div style={{ display: "flex", justifyContent: "space-between", alignItems: "baseline", gap: 8 }}>
+        <div style={{ fontWeight: 700, fontSize: 13, color: COLOR.text.primary }}>
+          {id} {year}: generators
+          {records && records.length > 0 && (
+            <span style={{ fontWeight: 400, fontSize: 11, color: COLOR.text.muted, marginLeft: 6 }}>
+              {records.length.toLocaleString()} units, {Math.round(totalMw).toLocaleString()} MW
+              ({Math.round(totalElcc).toLocaleString()} MW ELCC)
+            </span>
+          )}
+        </div>
+        <button
+          type="button"
+          onClick={onClose}
+          aria-label="Close generator list"
+          style={{
+            border: "none",
+            background: "none",
+            cursor: "pointer",
+            fontSize: 14,
+            color: COLOR.text.muted,
+          }}
+        >
+          ×
+        </button>
+      </div>
+      {records === null && <div style={{ color: COLOR.text.muted }}>Loading generators…</div>}
+      {records !== null && records.length === 0 && (
+        <div style={{ color: COLOR.text.muted }}>No generator-level data for this point.</div>
+      )}
+      {records !== null && records.length > 0 && (
+        <table style={{ borderCollapse: "collapse", marginTop: 6 }}>
+          <thead>
+            <tr style={{ color: COLOR.text.muted, textAlign: "left" }}>
+              <th style={cell}>Plant</th>
+              <th style={cell}>Technology</th>
+              {view === "iso" && <th style={cell}>State</th>}
+              <th style={{ ...num, fontFamily: FONT.body }}>MW</th>
+              <th style={{ ...num, fontFamily: FONT.body }}>ELCC MW</th>
+            </tr>
+          </thead>
+          <tbody>
+            {records.slice(0, MAX_ROWS).map((r) => (
+              <tr key={`${r.plant_id}-${r.generator_id}`}>
+                <td style={cell}>{r.plant}</td>
+                <td style={cell}>{r.technology}</td>
+                {view === "iso" && <td style={cell}>{r.state}</td>}
+                <td style={num}>{r.nameplate_mw.toLocaleString()}</td>
+                <td style={num}>{r.elcc_mw.toLocaleString()}</td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      )}
+      {records !== null && records.length > MAX_ROWS && (
+        <div style={{ color: COLOR.text.muted, marginTop: 4 }}>
+          + {(records.length - MAX_ROWS).toLocaleString()} smaller units
+        </div>
+      )}
+    </div>
+  );
+}
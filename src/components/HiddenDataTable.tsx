@@ -1,6 +1,6 @@
 import type { ISODataPoint, XAxisMetric, PriceMetric, CapacityWeighting, CapacityBasis, GranularityLevel } from "../lib/types";
 import type { YearKey } from "../App";
-import { capacityPerGwPeak, capacityPerGwPeakElcc, netCapacity } from "../lib/types";
+import { getXValue } from "../lib/scales";
 import { SR_ONLY } from "../lib/theme";
 
 interface Props {
@@ -42,11 +42,7 @@ export function HiddenDataTable({ data, metric: _metric, priceMetric: _priceMetr
         </thead>
         <tbody>
           {data.map((d) => {
-            const perGw = basis === "net"
-              ? (showElcc
-                  ? ((d.capacity_additions_elcc_mw ?? d.capacity_additions_mw) - (d.retirements_mw ?? 0)) / d.peak_demand_gw
-                  : netCapacity(d) / d.peak_demand_gw)
-              : (showElcc ? capacityPerGwPeakElcc(d) : capacityPerGwPeak(d));
+            const perGw = getXValue(d, "capacity", weighting, basis);
             const hasRetirements = d.retirements_mw != null;
             return (
               <tr key={d.id}>
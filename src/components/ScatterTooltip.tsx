@@ -1,9 +1,12 @@
+import { useEffect, useState } from "react";
 import { defaultStyles, TooltipWithBounds } from "@visx/tooltip";
 import type { ISODataPoint, XAxisMetric, PriceMetric, CapacityWeighting, CapacityBasis, GranularityLevel } from "../lib/types";
 import type { YearKey } from "../App";
-import { capacityPerGwPeak, capacityPerGwPeakElcc, netCapacity } from "../lib/types";
+import { getXValue } from "../lib/scales";
 import { FONT, COLOR } from "../lib/theme";
 import { ISO_FILLS } from "../lib/colors";
+import { elccBand, scaleBand } from "../lib/elccBands";
+import type { ElccBand } from "../lib/elccBands";
 
 interface Props {
   data: ISODataPoint;
@@ -47,6 +50,25 @@ export function ScatterTooltip({ data, xMetric, priceMetric, weighting, basis, g
   // Check if queue rate is inherited from ISO.
   const queueInherited = data.queue_cohort?.startsWith("ISO-level");
 
+  // ELCC scenario band (elcc_bands.json); absent when it was not built
+  const bandKey = `${granularity}/${year}/${data.id}`;
+  const [band, setBand] = useState<{ key: string; band: ElccBand | null } | null>(null);
+  useEffect(() => {
+    let cancelled = false;
+    elccBand(granularity, Number(year), data.id)
+      .then((b) => {
+        if (!cancelled) setBand({ key: bandKey, band: b });
+      })
+      .catch(() => undefined);
+    return () => {
+      cancelled = true;
+    };
+  }, [granularity, year, data.id, bandKey]);
+  // The band's relative spread, around the ELCC value shown beside it
+  const elccRange = showElcc && band?.key === bandKey && band.band
+    ? scaleBand(band.band, data.capacity_additions_elcc_mw!)
+    : null;
+
   return (
     <TooltipWithBounds top={top} left={left} style={getTooltipStyles(compact)}>
       <div
@@ -99,6 +121,12 @@ export function ScatterTooltip({ data, xMetric, priceMetric, weighting, basis, g
             label="New capacity"
             value={`${data.capacity_additions_mw.toLocaleString()} MW${showElcc ? ` (${data.capacity_additions_elcc_mw!.toLocaleString()} MW ELCC)` : ""}`}
           />
+          {elccRange && (
+            <Row
+              label="ELCC range"
+              value={`${Math.round(elccRange.low).toLocaleString()}–${Math.round(elccRange.high).toLocaleString()} MW`}
+            />
+          )}
           {data.retirements_mw != null && (
             <Row
               label="Retirements"
@@ -114,17 +142,7 @@ export function ScatterTooltip({ data, xMetric, priceMetric, weighting, basis, g
           )}
           <Row
             label={basis === "net" ? "Net per GW peak" : "Per GW peak"}
-            value={(() => {
-              if (basis === "net") {
-                const net = showElcc
-                  ? (data.capacity_additions_elcc_mw ?? data.capacity_additions_mw) - (data.retirements_mw ?? 0)
-                  : netCapacity(data);
-                return `${(net / data.peak_demand_gw).toFixed(1)} MW/GW${showElcc ? " (ELCC)" : ""}`;
-              }
-              return showElcc
-                ? `${capacityPerGwPeakElcc(data).toFixed(1)} MW/GW (ELCC)`
-                : `${capacityPerGwPeak(data).toFixed(1)} MW/GW`;
-            })()}
+            value={`${getXValue(data, "capacity", weighting, basis).toFixed(1)} MW/GW${showElcc ? " (ELCC)" : ""}`}
             highlight={basis === "net"}
           />
           <Row label="Projects" value={`${data.project_count}`} />
@@ -0,0 +1,121 @@
+import type { ISODataPoint, ISOScatterDataset, GranularityLevel, LinearFit } from "./types";
+import type { YearKey } from "../App";
+
+/**
+ * Production dataset bundle written by data/build_bundle.py.
+ *
+ * Every (view, year) dataset is stored column-wise. Long strings (notes and
+ * sources) live in a separate string table that is fetched after first paint.
+ */
+type CellValue = string | number | boolean | null;
+
+interface BundleDataset {
+  key: "isos" | "states";
+  length: number;
+  metadata: ISOScatterDataset["metadata"];
+  columns: Record<string, CellValue[]>;
+  lazy: Record<string, (number | null)[]>;
+  fits?: Record<string, LinearFit>;
+}
+
+export interface DatasetBundle {
+  version: number;
+  strings: string;
+  datasets: Record<string, BundleDataset>;
+}
+
+export type DataByYear = Record<YearKey, ISODataPoint[]>;
+
+export interface BundleData {
+  bundle: DatasetBundle;
+  iso: DataByYear;
+  state: DataByYear;
+  /** True once notes and sources have been merged in */
+  hydrated: boolean;
+}
+
+const BUNDLE_NAME = "datasets.bundle.json";
+
+/** Resolve a file in public/data/ against the app's base URL */
+export function dataUrl(name: string): string {
+  return new URL(`data/${name}`, document.baseURI).toString();
+}
+
+export async function fetchJson<T>(name: string): Promise<T> {
+  const res = await fetch(dataUrl(name));
+  if (!res.ok) throw new Error(`${name}: HTTP ${res.status}`);
+  return (await res.json()) as T;
+}
+
+/** Rebuild row records from the numeric/short-string columns only */
+export function decodeBundle(bundle: DatasetBundle): BundleData {
+  const byView: Record<GranularityLevel, Partial<DataByYear>> = { iso: {}, state: {} };
+  for (const [key, ds] of Object.entries(bundle.datasets)) {
+    const [view, year] = key.split("/") as [GranularityLevel, YearKey];
+    const columns = Object.entries(ds.columns);
+    const records: ISODataPoint[] = [];
+    for (let i = 0; i < ds.length; i++) {
+      const rec: Record<string, unknown> = {
+        qualitative_note: "",
+        sources: { price: "", capacity: "", peak: "", queue: "" },
+      };
+      for (const [field, values] of columns) {
+        const v = values[i];
+        if (v !== null) rec[field] = v;
+      }
+      records.push(rec as unknown as ISODataPoint);
+    }
+    byView[view][year] = records;
+  }
+  return {
+    bundle,
+    iso: byView.iso as DataByYear,
+    state: byView.state as DataByYear,
+    hydrated: false,
+  };
+}
+
+/** Trendline fits of one dataset (see getTrendline in scales.ts) */
+export function datasetFits(
+  data: BundleData,
+  view: GranularityLevel,
+  year: YearKey,
+): Record<string, LinearFit> | undefined {
+  return data.bundle.datasets[`${view}/${year}`]?.fits;
+}
+
+/** Merge the lazily fetched string table into fresh record objects */
+export function applyStrings(data: BundleData, strings: string[]): BundleData {
+  const hydrate = (view: GranularityLevel): DataByYear => {
+    const out = {} as DataByYear;
+    for (const year of Object.keys(data[view]) as YearKey[]) {
+      const lazy = data.bundle.datasets[`${view}/${year}`].lazy;
+      out[year] = data[view][year].map((d, i) => {
+        const str = (field: string): string => {
+          const idx = lazy[field]?.[i];
+          return idx == null ? "" : strings[idx];
+        };
+        return {
+          ...d,
+          qualitative_note: str("qualitative_note"),
+          sources: {
+            price: str("sources.price"),
+            capacity: str("sources.capacity"),
+            peak: str("sources.peak"),
+            queue: str("sources.queue"),
+          },
+        };
+      });
+    }
+    return out;
+  };
+  return { ...data, iso: hydrate("iso"), state: hydrate("state"), hydrated: true };
+}
+
+export async function loadBundle(): Promise<BundleData> {
+  return decodeBundle(await fetchJson<DatasetBundle>(BUNDLE_NAME));
+}
+
+export async function loadStrings(bundle: DatasetBundle): Promise<string[]> {
+  return fetchJson<string[]>(bundle.strings);
+}
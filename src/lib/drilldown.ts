@@ -0,0 +1,95 @@
+import type { GranularityLevel } from "./types";
+import { fetchJson } from "./bundle";
+
+/**
+ * Generator-level drill-down shards written by data/build_drilldown.py.
+ *
+ * drilldown/index.json lists one shard per (view, year, id); a shard holds
+ * the EIA-860M generators behind that chart point in columnar form, with
+ * plant, technology, state and BA names interned into per-shard tables.
+ */
+interface ShardEntry {
+  path: string;
+  length: number;
+  nameplate_mw: number;
+  hash: string;
+}
+
+interface DrilldownIndex {
+  version: number;
+  vintage: string;
+  shards: Record<string, ShardEntry>;
+}
+
+interface DrilldownShard {
+  view: GranularityLevel;
+  year: number;
+  id: string;
+  vintage: string;
+  length: number;
+  totals: { nameplate_mw: number; elcc_mw: number };
+  strings: Record<"plant" | "technology" | "state" | "ba", string[]>;
+  columns: {
+    plant_id: (number | null)[];
+    plant: number[];
+    technology: number[];
+    state: number[];
+    ba: number[];
+    generator_id: string[];
+    nameplate_mw: number[];
+    elcc_factor: number[];
+  };
+}
+
+export interface GeneratorRecord {
+  plant_id: number | null;
+  plant: string;
+  generator_id: string;
+  technology: string;
+  state: string;
+  ba: string;
+  nameplate_mw: number;
+  elcc_factor: number;
+  elcc_mw: number;
+}
+
+let indexPromise: Promise<DrilldownIndex | null> | null = null;
+
+/** Shard index, fetched once; null when no drill-down data was built */
+export function loadDrilldownIndex(): Promise<DrilldownIndex | null> {
+  if (!indexPromise) {
+    indexPromise = fetchJson<DrilldownIndex>("drilldown/index.json").catch(() => null);
+  }
+  return indexPromise;
+}
+
+export function decodeShard(shard: DrilldownShard): GeneratorRecord[] {
+  const { columns: c, strings: s } = shard;
+  const records: GeneratorRecord[] = [];
+  for (let i = 0; i < shard.length; i++) {
+    records.push({
+      plant_id: c.plant_id[i],
+      plant: s.plant[c.plant[i]],
+      generator_id: c.generator_id[i],
+      technology: s.technology[c.technology[i]],
+      state: s.state[c.state[i]],
+      ba: s.ba[c.ba[i]],
+      nameplate_mw: c.nameplate_mw[i],
+      elcc_factor: c.elcc_factor[i],
+      elcc_mw: Math.round(c.nameplate_mw[i] * c.elcc_factor[i] * 10) / 10,
+    });
+  }
+  return records;
+}
+
+/** Generators behind one chart point, largest first; [] when there is no shard */
+export async function loadGenerators(
+  view: GranularityLevel,
+  year: number,
+  id: string,
+): Promise<GeneratorRecord[]> {
+  const index = await loadDrilldownIndex();
+  const entry = index?.shards[`${view}/${year}/${id}`];
+  if (!entry) return [];
+  return decodeShard(await fetchJson<DrilldownShard>(`drilldown/${entry.path}`));
+}
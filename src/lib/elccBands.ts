@@ -0,0 +1,57 @@
+import type { GranularityLevel } from "./types";
+import { fetchJson } from "./bundle";
+
+/**
+ * ELCC uncertainty bands written by data/elcc_scenarios.py.
+ *
+ * For every chart point, "mid" is the ELCC MW from the point factors
+ * (capacity_additions_elcc_mw); "low" and "high" are percentiles of the
+ * same capacity evaluated under factor scenarios drawn within each
+ * factor's published range.
+ */
+export interface ElccBand {
+  nameplate_mw: number;
+  low: number;
+  mid: number;
+  high: number;
+}
+
+interface ElccBandsFile {
+  version: number;
+  vintage: string;
+  scenarios: number;
+  percentiles: [number, number];
+  bands: Record<string, ElccBand>;
+}
+
+let bandsPromise: Promise<ElccBandsFile | null> | null = null;
+
+/** Bands file, fetched once; null when no bands were built */
+export function loadElccBands(): Promise<ElccBandsFile | null> {
+  if (!bandsPromise) {
+    bandsPromise = fetchJson<ElccBandsFile>("elcc_bands.json").catch(() => null);
+  }
+  return bandsPromise;
+}
+
+/** ELCC band for one chart point; null when there is none */
+export async function elccBand(
+  view: GranularityLevel,
+  year: number,
+  id: string,
+): Promise<ElccBand | null> {
+  const file = await loadElccBands();
+  return file?.bands[`${view}/${year}/${id}`] ?? null;
+}
+
+/**
+ * A band's spread applied to another ELCC value: low/mid × value and
+ * high/mid × value. The CSV's capacity_additions_elcc_mw is not always the
+ * EIA-860M rollup the band was computed from (estimates, industry
+ * sources), so the relative range is what carries over. Null when the
+ * band has no mid to scale by.
+ */
+export function scaleBand(band: ElccBand, value: number): { low: number; high: number } | null {
+  if (!(band.mid > 0)) return null;
+  return { low: (band.low / band.mid) * value, high: (band.high / band.mid) * value };
+}
@@ -1,9 +1,17 @@
 import { scaleLinear, scaleSqrt } from "@visx/scale";
-import type { ISODataPoint, XAxisMetric, PriceMetric, CapacityWeighting, CapacityBasis, GranularityLevel } from "./types";
+import type { ISODataPoint, XAxisMetric, PriceMetric, CapacityWeighting, CapacityBasis, GranularityLevel, LinearFit } from "./types";
 import { capacityPerGwPeak, capacityPerGwPeakElcc, netCapacity } from "./types";
 
+/** Record field holding the precomputed x value for each capacity toggle */
+const X_FIELDS = {
+  nameplate: { gross: "mw_per_gw_peak", net: "net_mw_per_gw_peak" },
+  elcc: { gross: "elcc_mw_per_gw_peak", net: "net_elcc_mw_per_gw_peak" },
+} as const;
+
 export function getXValue(d: ISODataPoint, metric: XAxisMetric, weighting?: CapacityWeighting, basis?: CapacityBasis): number {
   if (metric === "queue") return d.queue_completion_pct;
+  const precomputed = d[X_FIELDS[weighting ?? "nameplate"][basis ?? "gross"]];
+  if (precomputed != null) return precomputed;
   if (basis === "net") {
     const cap = weighting === "elcc"
       ? (d.capacity_additions_elcc_mw ?? d.capacity_additions_mw) - (d.retirements_mw ?? 0)
@@ -13,6 +21,16 @@ export function getXValue(d: ISODataPoint, metric: XAxisMetric, weighting?: Capa
   return weighting === "elcc" ? capacityPerGwPeakElcc(d) : capacityPerGwPeak(d);
 }
 
+/** Precomputed trendline for a toggle combination; null when there is none */
+export function getTrendline(
+  fits: Record<string, LinearFit> | undefined,
+  priceMetric: PriceMetric,
+  weighting: CapacityWeighting,
+  basis: CapacityBasis,
+): LinearFit | null {
+  return fits?.[`${priceMetric}/${weighting}/${basis}`] ?? null;
+}
+
 export function getXLabel(metric: XAxisMetric, weighting?: CapacityWeighting, basis?: CapacityBasis): string {
   if (metric === "queue") return "Queue Completion Rate (%)";
   const net = basis === "net" ? "Net " : "";
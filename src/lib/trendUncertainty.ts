@@ -0,0 +1,65 @@
+import type { GranularityLevel, PriceMetric, CapacityWeighting, CapacityBasis } from "./types";
+import { fetchJson } from "./bundle";
+
+/**
+ * Bootstrap distributions of the price-vs-capacity trendline, written by
+ * data/trend_uncertainty.py.
+ *
+ * For every (view, year) and toggle combination, "point" is the fit on
+ * the plotted points; "quantiles" (at the file's `quantiles`
+ * percentiles) come from resampling those points, with estimated values
+ * also perturbed within `estimate_bounds`. Null where undefined.
+ */
+export interface FitSummary {
+  point: number | null;
+  quantiles: (number | null)[];
+}
+
+export interface TrendFit {
+  slope: FitSummary;
+  r: FitSummary;
+}
+
+interface TrendGroup {
+  n: number;
+  estimated: number;
+  fits: Record<string, TrendFit>;
+}
+
+interface TrendUncertaintyFile {
+  version: number;
+  resamples: number;
+  seed: number;
+  quantiles: number[];
+  estimate_bounds: { price: number; capacity: number };
+  groups: Record<string, TrendGroup>;
+}
+
+let uncertaintyPromise: Promise<TrendUncertaintyFile | null> | null = null;
+
+/** Uncertainty file, fetched once; null when it was not built */
+export function loadTrendUncertainty(): Promise<TrendUncertaintyFile | null> {
+  if (!uncertaintyPromise) {
+    uncertaintyPromise = fetchJson<TrendUncertaintyFile>("trend_uncertainty.json").catch(() => null);
+  }
+  return uncertaintyPromise;
+}
+
+/** A TrendFit with the percentile levels of its quantiles */
+export interface TrendInterval extends TrendFit {
+  levels: number[];
+  resamples: number;
+}
+
+/** Slope and r distributions for one chart state; null when there are none */
+export async function trendFit(
+  view: GranularityLevel,
+  year: number,
+  priceMetric: PriceMetric,
+  weighting: CapacityWeighting,
+  basis: CapacityBasis,
+): Promise<TrendInterval | null> {
+  const file = await loadTrendUncertainty();
+  const fit = file?.groups[`${view}/${year}`]?.fits[`${priceMetric}/${weighting}/${basis}`];
+  return file && fit ? { ...fit, levels: file.quantiles, resamples: file.resamples } : null;
+}
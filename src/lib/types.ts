@@ -23,6 +23,11 @@ export interface ISODataPoint {
   retirements_mw?: number;
   project_count: number;
   peak_demand_gw: number;
+  /** Precomputed x values per capacity toggle (data/chart_metrics.py) */
+  mw_per_gw_peak?: number;
+  elcc_mw_per_gw_peak?: number;
+  net_mw_per_gw_peak?: number;
+  net_elcc_mw_per_gw_peak?: number;
   queue_completion_pct: number;
   queue_cohort?: string;
   price_2023_mwh?: number;
@@ -40,6 +45,14 @@ export interface ISODataPoint {
   };
 }
 
+/** Least-squares trendline of price on capacity; null where undefined */
+export interface LinearFit {
+  slope: number | null;
+  intercept: number | null;
+  r: number | null;
+  n: number;
+}
+
 export interface ISOScatterDataset {
   metadata: {
     title: string;
@@ -48,6 +61,8 @@ export interface ISOScatterDataset {
     primary_year: number;
     notes: string;
   };
+  /** Keyed "<PriceMetric>/<CapacityWeighting>/<CapacityBasis>" */
+  fits?: Record<string, LinearFit>;
   isos: ISODataPoint[];
 }
 
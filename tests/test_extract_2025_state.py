@@ -0,0 +1,66 @@
+"""extract_2025_state.py reruns: extracted fields update, curated fields stay."""
+
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
+import extract_2025_state  # noqa: E402
+from audit_store import AuditStore  # noqa: E402
+from mappings import STATE_ISO  # noqa: E402
+
+NOTE = "Hand-written 2025 note"
+
+
+def _extracted(path):
+    """Rows the extractor would build from the CSV's own 2025 values."""
+    store = AuditStore(path)
+    capacity, retail, retired = {}, {}, {}
+    for sc in STATE_ISO:
+        row = store.get(("state", 2025, sc))
+        capacity[sc] = {"nameplate_mw": float(row["capacity_additions_mw"]),
+                        "elcc_mw": float(row["capacity_additions_elcc_mw"]),
+                        "project_count": row["project_count"]}
+        retail[sc] = row["retail_price_cents_kwh"]
+        retired[sc] = row["retirements_mw"]
+    iso_2025, state_2024 = extract_2025_state.read_existing_csv(path)
+    return extract_2025_state.build_2025_state_rows(capacity, retail, iso_2025, state_2024,
+                                                    retired)
+
+
+def test_rerun_keeps_curated_fields(tmp_path):
+    path = str(tmp_path / "audit_all_data.csv")
+    shutil.copyfile(extract_2025_state.CSV_PATH, path)
+    store = AuditStore(path)
+    store.upsert([{"view": "state", "year": "2025", "id": "TX", "qualitative_note": NOTE}])
+    store.save()
+
+    rows = _extracted(path)
+    tx = next(r for r in rows if r["id"] == "TX")
+    tx["capacity_additions_mw"] += 100
+    result = extract_2025_state.write_2025_state_rows(rows, path)
+
+    assert result["inserted"] == []
+    assert result["updated"] == {("state", "2025", "TX"): ["capacity_additions_mw"]}
+    row = AuditStore(path).get(("state", 2025, "TX"))
+    assert row["qualitative_note"] == NOTE
+    assert row["capacity_additions_mw"] == str(tx["capacity_additions_mw"])
+
+
+def test_new_key_gets_defaults(tmp_path):
+    path = str(tmp_path / "audit_all_data.csv")
+    shutil.copyfile(extract_2025_state.CSV_PATH, path)
+    rows = _extracted(path)
+
+    with open(path, encoding="utf-8") as f:
+        lines = [line for line in f if not line.startswith("state,2025,TX,")]
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+
+    result = extract_2025_state.write_2025_state_rows(rows, path)
+    assert result["inserted"] == [("state", "2025", "TX")]
+    row = AuditStore(path).get(("state", 2025, "TX"))
+    tx_2024 = AuditStore(path).get(("state", 2024, "TX"))
+    assert row["qualitative_note"] == tx_2024["qualitative_note"]
+    assert row["source_price"] == "Inherited from ERCOT 2025 estimate"
@@ -0,0 +1,137 @@
+"""fetch_sources.py against its local stand-in server (MirrorRequestHandler)."""
+
+import functools
+import hashlib
+import http.server
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
+import fetch_sources  # noqa: E402
+from fetch_sources import MirrorRequestHandler, fetch_all, object_path, read_state  # noqa: E402
+
+BODY = bytes(range(256)) * 4096  # 1 MiB
+
+
+class RecordingHandler(MirrorRequestHandler):
+    """Records (method, status) of every request in ``server.log``."""
+
+    def log_request(self, code="-", size="-"):
+        self.server.log.append((self.command, int(code)))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NoHeadHandler(RecordingHandler):
+    def do_HEAD(self):
+        self.send_error(405)
+
+
+def _serve(directory, handler):
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(handler, directory=str(directory)))
+    server.log = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def site(tmp_path):
+    """(server, source, dirs): BODY served as blob.bin, fetched to data/blob.bin."""
+    served = tmp_path / "served"
+    served.mkdir()
+    (served / "blob.bin").write_bytes(BODY)
+    server = _serve(served, RecordingHandler)
+    source = {"name": "blob", "url": f"http://127.0.0.1:{server.server_port}/blob.bin",
+              "dest": "blob.bin"}
+    dirs = {"mirror_dir": str(tmp_path / "mirror"), "data_dir": str(tmp_path / "data")}
+    yield server, source, dirs
+    server.shutdown()
+    server.server_close()
+
+
+def test_second_run_is_head_only(site):
+    server, source, dirs = site
+    assert fetch_all([source], **dirs) == {"blob": "downloaded"}
+    assert server.log == [("GET", 200)]
+
+    server.log.clear()
+    assert fetch_all([source], **dirs) == {"blob": "unchanged"}
+    assert server.log == [("HEAD", 304)]
+    with open(os.path.join(dirs["data_dir"], "blob.bin"), "rb") as f:
+        assert f.read() == BODY
+
+
+def test_truncated_part_resumes(site):
+    server, source, dirs = site
+    head = fetch_sources.make_session(1).head(source["url"])
+    partial = os.path.join(dirs["mirror_dir"], "partial")
+    os.makedirs(partial)
+    part = os.path.join(partial, "blob.part")
+    with open(part, "wb") as f:
+        f.write(BODY[:300_000])
+    with open(part + ".json", "w", encoding="utf-8") as f:
+        json.dump({"url": source["url"], "etag": head.headers["ETag"],
+                   "last_modified": head.headers["Last-Modified"]}, f)
+
+    server.log.clear()
+    assert fetch_all([source], **dirs) == {"blob": "resumed"}
+    assert server.log == [("GET", 206)]
+    digest = hashlib.sha256(BODY).hexdigest()
+    assert read_state(dirs["mirror_dir"])["blob"]["sha256"] == digest
+    with open(object_path(digest, dirs["mirror_dir"]), "rb") as f:
+        assert f.read() == BODY
+    assert not os.path.exists(part)
+
+
+def test_checksum_mismatch_is_not_mirrored(site):
+    _server, source, dirs = site
+    results = fetch_all([dict(source, sha256="0" * 64)], **dirs)
+    assert results["blob"].startswith("failed")
+    assert "blob" not in read_state(dirs["mirror_dir"])
+    objects = os.path.join(dirs["mirror_dir"], "objects")
+    assert not os.path.exists(objects) or not any(files for _, _, files in os.walk(objects))
+    assert not os.listdir(os.path.join(dirs["mirror_dir"], "partial"))
+    assert not os.path.exists(os.path.join(dirs["data_dir"], "blob.bin"))
+
+
+def test_head_not_allowed_falls_back_to_get(site):
+    server, source, dirs = site
+    assert fetch_all([source], **dirs) == {"blob": "downloaded"}
+
+    no_head = _serve(server.RequestHandlerClass.keywords["directory"], NoHeadHandler)
+    try:
+        moved = dict(source, url=f"http://127.0.0.1:{no_head.server_port}/blob.bin")
+        state = read_state(dirs["mirror_dir"])
+        state["blob"]["url"] = moved["url"]
+        fetch_sources.write_state(state, dirs["mirror_dir"])
+        assert fetch_all([moved], **dirs) == {"blob": "downloaded"}
+        assert no_head.log == [("HEAD", 405), ("GET", 200)]
+    finally:
+        no_head.shutdown()
+        no_head.server_close()
+
+
+def test_period_in_dest(tmp_path):
+    from synthetic import write_epm_workbooks
+
+    served = tmp_path / "served"
+    paths = write_epm_workbooks(str(served), 1)
+    name = next(os.path.basename(p) for p in paths if "_a_" in os.path.basename(p))
+    server = _serve(served, RecordingHandler)
+    try:
+        source = {"name": "epm_5_6_a", "url": f"http://127.0.0.1:{server.server_port}/{name}",
+                  "dest": "epm/table_5_06_a_{period}.xlsx"}
+        dirs = {"mirror_dir": str(tmp_path / "mirror"), "data_dir": str(tmp_path / "data")}
+        assert fetch_all([source], **dirs) == {"epm_5_6_a": "downloaded"}
+        assert os.listdir(tmp_path / "data" / "epm") == ["table_5_06_a_2025-12.xlsx"]
+        assert read_state(dirs["mirror_dir"])["epm_5_6_a"]["dest"] == "epm/table_5_06_a_2025-12.xlsx"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -1,7 +1,24 @@
-import { defineConfig } from "vite";
+import { fileURLToPath } from "node:url";
+import { defineConfig, type Plugin } from "vite";
 import react from "@vitejs/plugin-react";
 
+// `npm run data:watch` rewrites the dataset bundle on every CSV save. Files in
+// public/ are not part of the module graph, so reload the page when it changes.
+function reloadOnBundleChange(): Plugin {
+  const bundle = fileURLToPath(new URL("public/data/datasets.bundle.json", import.meta.url));
+  return {
+    name: "reload-on-bundle-change",
+    apply: "serve",
+    configureServer(server) {
+      server.watcher.add(bundle);
+      server.watcher.on("change", (file) => {
+        if (file === bundle) server.ws.send({ type: "full-reload" });
+      });
+    },
+  };
+}
+
 export default defineConfig({
-  plugins: [react()],
+  plugins: [react(), reloadOnBundleChange()],
   base: "/electricity-supply-response/",
 });